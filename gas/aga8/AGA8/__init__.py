@@ -1,43 +1,39 @@
 """AGA8Detail.py module contains the functionality used in the DETAIL method."""
 
 import math
+from collections import OrderedDict
+from typing import Iterable, NamedTuple, Optional
 
-from .initialise import (
-    initialise_an,
-    initialise_bn,
-    initialise_bs,
-    initialise_bsnij2,
-    initialise_csn,
-    initialise_ei,
-    initialise_fi,
-    initialise_fn,
-    initialise_gi,
-    initialise_gn,
-    initialise_i25_arrays,
-    initialise_ij5_arrays,
-    initialise_ij_arrays,
-    initialise_ki,
-    initialise_kn,
-    initialise_n0i,
-    initialise_qi,
-    initialise_qn,
-    initialise_si,
-    initialise_sn,
-    initialise_th0i,
-    initialise_tun,
-    initialise_un,
-    initialise_wi,
-    initialise_wn,
-)
+from .initialise import initialise_bs, initialise_csn, initialise_tun
 from .molecule import MmDetail
+from .tables import detail_tables
+
+
+class XTerms(NamedTuple):
+    """Terms of the DETAIL method which depend only on the gas composition (see AGA8Detail.x_terms_detail())."""
+    K3: float
+    U: float
+    G: float
+    Q: float
+    F: float
+    Q2: float
+    bs: tuple
+    csn: tuple
 
 
 class AGA8Detail:
     """Class to approximate the compressibility factor, Z for a gas given its composition x, Pressure, 
     P and temperature, T using AGA8 Detail method."""
 
-    def __init__(self, p_bara: float, t_celsius: float, x: list) -> None:
-        """Initialisation."""
+    def __init__(self, p_bara: float, t_celsius: float, x: list, x_cache: Optional['XTermsCache'] = None) -> None:
+        """Initialisation.
+
+        Arguments:
+            p_bara: pressure in bara
+            t_celsius: temperature in degrees Celsius
+            x: gas composition as mole fractions (index 0 is a placeholder)
+            x_cache: optional XTermsCache, when set the composition terms are read from it
+        """
         # constant terms
         self.nterms = 58
         self.ncdetail = 21
@@ -54,13 +50,15 @@ class AGA8Detail:
         # convert to Kelvin
         self.T = t_celsius + 273.15
         self.x = x
+        self.x_cache = x_cache
 
         # outputs
         self.P2 = 0  # approximated P from DensityDetail() (Kpa)
         self.P3 = 0  # approximated P from PropertiesDetail() (Kpa)
         self.z = None  # (no units)
         self.zd = None  # (no units)
-        self.D = 1e10  # molar density (mol/l)
+        self.D = 1e10  # molar density (mol/l), set it to -D0 before run() to start iteration from D0
+        self.n_iter = 0  # number of iterations done by density_detail()
         self.MM = 0  # Molar Mass (g/mol)
         self.ar = None
         self.dpddsave = None  # d(P)/d(D) (kPa/(mol/l)) (at constant temperature)
@@ -85,82 +83,45 @@ class AGA8Detail:
         self.JT = 0  # Joule-Thomson coefficient (K/kPa)
         self.kappa = 0  # Isentropic exponent
 
-        # initialise arrays
-        self.bs = initialise_bs()
-        self.bsnij2 = initialise_bsnij2(n=self.maxflds)
-        self.an = initialise_an(n=self.nterms)
-        self.bn = initialise_bn(n=self.nterms)
-        self.kn = initialise_kn(n=self.nterms)
-        self.un = initialise_un(n=self.nterms)
-        self.fn = initialise_fn(n=self.nterms)
-        self.gn = initialise_gn(n=self.nterms)
-        self.qn = initialise_qn(n=self.nterms)
-        self.sn = initialise_sn(n=self.nterms)
-        self.wn = initialise_wn(n=self.nterms)
-        self.ei = initialise_ei(n=self.maxflds)  # energy params
-        self.ki = initialise_ki(n=self.maxflds)  # size params
-        self.gi = initialise_gi(n=self.maxflds)  # orientation params
-        self.eij, self.uij, self.kij, self.gij = initialise_ij_arrays(n=self.maxflds)
+        # constant tables (shared by all instances, see tables.py)
+        tables = detail_tables()
+        self.an = tables.an
+        self.bn = tables.bn
+        self.kn = tables.kn
+        self.un = tables.un
+        self.fn = tables.fn
+        self.gn = tables.gn
+        self.qn = tables.qn
+        self.sn = tables.sn
+        self.wn = tables.wn
+        self.ei = tables.ei  # energy params
+        self.ki = tables.ki  # size params
+        self.gi = tables.gi  # orientation params
+        self.eij, self.uij, self.kij, self.gij = tables.eij, tables.uij, tables.kij, tables.gij
         # quadrupole params
-        self.qi = initialise_qi(n=self.maxflds)
-        self.fi = initialise_fi(n=self.maxflds)
-        self.si = initialise_si(n=self.maxflds)
-        self.wi = initialise_wi(n=self.maxflds)
+        self.qi = tables.qi
+        self.fi = tables.fi
+        self.si = tables.si
+        self.wi = tables.wi
         # ideal gas params
-        self.n0i = initialise_n0i(n=self.maxflds)
-        self.th0i = initialise_th0i(n=self.maxflds)
+        self.n0i = tables.n0i
+        self.th0i = tables.th0i
         # precalculation of constants
-        self.ki25, self.ei25 = initialise_i25_arrays(n=self.maxflds)
-        self.kij5, self.uij5, self.gij5 = initialise_ij5_arrays(n=self.maxflds)
+        self.ki25, self.ei25 = tables.ki25, tables.ei25
+        self.bsnij2 = tables.bsnij2
+        self.kij5, self.uij5, self.gij5 = tables.kij5, tables.uij5, tables.gij5
+
+        # initialise arrays (gas dependent)
+        self.bs = initialise_bs()
         self.csn = initialise_csn(n=self.nterms)
         self.tun = initialise_tun(n=self.nterms)
 
     def setup_detail(self):
-        """Initialize all the constants and parameters in the DETAIL model."""
-        for i in range(1, self.maxflds + 1):
-            self.ki25[i] = math.pow(self.ki[i], 2.5)
-            self.ei25[i] = math.pow(self.ei[i], 2.5)
-
-        for i in range(1, self.maxflds + 1):
-            for j in range(1, self.maxflds + 1):
-                for n in range(1, 18 + 1):
-                    bsnij = 1  # initialise Bs_nij @ 1
-                    if self.gn[n] == 1:
-                        bsnij = self.gij[i][j] * (self.gi[i] + self.gi[j]) / 2
-                    if self.qn[n] == 1:
-                        bsnij = bsnij * self.qi[i] * self.qi[j]
-                    if self.fn[n] == 1:
-                        bsnij = bsnij * self.fi[i] * self.fi[j]
-                    if self.sn[n] == 1:
-                        bsnij = bsnij * self.si[i] * self.si[j]
-                    if self.wn[n] == 1:
-                        bsnij = bsnij * self.wi[i] * self.wi[j]
-
-                    self.bsnij2[i][j][n] = (
-                        self.an[n]
-                        * math.pow(
-                            self.eij[i][j] * math.sqrt(self.ei[i] * self.ei[j]),
-                            self.un[n],
-                        )
-                        * math.pow(self.ki[i] * self.ki[j], 1.5)
-                        * bsnij
-                    )
-
-                self.kij5[i][j] = (
-                    (math.pow(self.kij[i][j], 5) - 1) * self.ki25[i] * self.ki25[j]
-                )
-                self.uij5[i][j] = (
-                    (math.pow(self.uij[i][j], 5) - 1) * self.ei25[i] * self.ei25[j]
-                )
-                self.gij5[i][j] = (self.gij[i][j] - 1) * (self.gi[i] + self.gi[j]) / 2
-
-        # Ideal gas terms
-        d0 = 101.325 / self.R / 298.15
-
-        for i in range(1, self.maxflds + 1):
-            self.n0i[i][3] = self.n0i[i][3] - 1
-            self.n0i[i][1] = self.n0i[i][1] - math.log(d0)
+        """Initialize all the constants and parameters in the DETAIL model.
 
+        The constant tables are now computed once per process by tables.detail_tables() and bound to the
+        instance at init, so this step does nothing more (kept for API compatibility).
+        """
         return self
 
     def molar_mass_detail(self):
@@ -174,6 +135,9 @@ class AGA8Detail:
 
     def x_terms_detail(self):
         """Calculate all of the variables related to the input gas composition."""
+        if self.x_cache is not None:
+            return self.load_x_terms(self.x_cache.get(self.x))
+
         # Calculate pure fluid contributions
         for i in range(1, self.ncdetail + 1):
             if self.x[i] > 0:
@@ -228,6 +192,14 @@ class AGA8Detail:
 
         return self
 
+    def load_x_terms(self, terms: XTerms):
+        """Set the variables related to the gas composition from precomputed terms (instead of x_terms_detail())."""
+        self.K3, self.U, self.G, self.Q, self.F, self.Q2 = terms.K3, terms.U, terms.G, terms.Q, terms.F, terms.Q2
+        # bs and csn are only read after this step: cached tuples can be shared
+        self.bs, self.csn = terms.bs, terms.csn
+
+        return self
+
     def alpha_r_detail(self, itau):
         """Calculate the derivatives of the residual Helmholtz energy (ar) with respect to T and D.
 
@@ -416,6 +388,7 @@ class AGA8Detail:
         plog = math.log(self.P)
         vlog = (-1) * math.log(self.D)
 
+        self.n_iter = 0
         for _ in range(1, 20 + 1):
             if (vlog < -7) | (vlog > 100):
                 # fail to converge
@@ -428,6 +401,7 @@ class AGA8Detail:
                 return self
 
             self.D = math.exp(-vlog)  # update the density
+            self.n_iter += 1
 
             # run pressure calculations
             self.pressure_detail()
@@ -509,6 +483,23 @@ class AGA8Detail:
 
         return self
 
+    @classmethod
+    def batch(cls, p_bara, t_celsius, x):
+        """Call the AGA8 DETAIL method for arrays of P, T and x at once (NumPy vectorized).
+
+        Arguments:
+            p_bara: pressures in bara, array of shape (n,)
+            t_celsius: temperatures in degrees Celsius, array of shape (n,)
+            x: compositions (same layout as x arg of __init__), array of shape (n, 22) or (22,) for a single
+               composition shared by all states
+
+        Return a DetailBatchResult with one array per property (same names as AGA8Detail attributes).
+        """
+        # numpy is only required for batch mode
+        from .batch import detail_batch
+
+        return detail_batch(p_bara=p_bara, t_celsius=t_celsius, x=x)
+
     def run(self):
         """Call the AGA8 DETAIL method for a given P, T and x."""
         # 1. Initialise constants and parameters for DETAIL
@@ -523,3 +514,68 @@ class AGA8Detail:
         self.properties_detail()
 
         return self
+
+
+class XTermsCache:
+    """LRU cache of the composition terms of the DETAIL method.
+
+    The key is the composition normalized to a canonical form (mole fractions rounded to 1e-12, so float noise
+    from the analyser does not create new entries), terms are computed from the composition exactly as given
+    (as without cache). Evaluations at a new P and T for an already seen gas skip the composition stage entirely.
+
+    Usage:
+        cache = XTermsCache(maxsize=64)
+        aga8 = AGA8Detail(p_bara=60.0, t_celsius=10.0, x=x, x_cache=cache).run()
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        """Initialisation.
+
+        Arguments:
+            maxsize: max number of compositions kept in cache (least recently used are evicted first)
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._terms = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    @staticmethod
+    def key(x: list) -> tuple:
+        """Return the cache key of composition x (mole fractions rounded to 1e-12)."""
+        return tuple(round(xi, 12) for xi in x[1:])
+
+    def get(self, x: list) -> XTerms:
+        """Return the composition terms of x, compute and store them on a cache miss."""
+        key = self.key(x)
+        try:
+            terms = self._terms[key]
+            self._terms.move_to_end(key)
+            self.hits += 1
+            return terms
+        except KeyError:
+            self.misses += 1
+        aga8 = AGA8Detail(p_bara=0.0, t_celsius=0.0, x=x).x_terms_detail()
+        terms = XTerms(K3=aga8.K3, U=aga8.U, G=aga8.G, Q=aga8.Q, F=aga8.F, Q2=aga8.Q2,
+                       bs=tuple(aga8.bs), csn=tuple(aga8.csn))
+        self._terms[key] = terms
+        if len(self._terms) > self.maxsize:
+            self._terms.popitem(last=False)
+        return terms
+
+    def warm(self, compositions: Iterable[list]) -> None:
+        """Pre-warm the cache from a list of known gas compositions (does not change hit/miss counters)."""
+        hits, misses = self.hits, self.misses
+        for x in compositions:
+            self.get(x)
+        self.hits, self.misses = hits, misses
+
+    def clear(self) -> None:
+        """Remove all cached compositions and reset counters."""
+        self._terms.clear()
+        self.hits = 0
+        self.misses = 0
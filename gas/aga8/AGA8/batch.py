@@ -0,0 +1,336 @@
+"""batch.py module contains a NumPy vectorized version of the DETAIL method.
+
+All states (P, T, x) are evaluated at once: every loop of the scalar AGA8Detail class over terms, components
+and iterations is replaced by array operations over the whole set of states.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from .molecule import MmDetail
+from .tables import detail_tables
+
+# DETAIL method constants (same as AGA8Detail)
+NTERMS = 58
+NCDETAIL = 21
+EPSILON = 1e-15
+TOLR = 0.0000001
+R = 8.31451
+# max number of compositions processed at once by x_terms() (memory use is ~3.5 kB per composition)
+X_BLOCK_SIZE = 4096
+# max number of states processed at once by detail_batch() (memory use is ~10 kB per state)
+STATE_BLOCK_SIZE = 8192
+
+
+@dataclass
+class DetailBatchResult:
+    """Results of a batch DETAIL evaluation, each field is an array with one value per state.
+
+    Field names and units are the same as the AGA8Detail attributes. Values of states for which the density
+    iteration fails are set to NaN (D is then the ideal gas density) and their ierr is set to 1.
+    """
+    P: np.ndarray  # pressure (kPa)
+    T: np.ndarray  # temperature (K)
+    D: np.ndarray  # molar density (mol/l)
+    MM: np.ndarray  # molar mass (g/mol)
+    z: np.ndarray  # compressibility factor (from PropertiesDetail)
+    zd: np.ndarray  # compressibility factor (from DensityDetail)
+    P3: np.ndarray  # approximated P from PropertiesDetail (kPa)
+    dpdd: np.ndarray  # kPa/(mol/l)
+    dpdt: np.ndarray  # kPa/K
+    d2pdd2: np.ndarray
+    A: np.ndarray  # Helmholtz energy (J/mol)
+    U: np.ndarray  # energy (J/mol)
+    H: np.ndarray  # enthalpy (J/mol)
+    S: np.ndarray  # entropy (Jmol-1K-1)
+    cv: np.ndarray  # isochoric heat capacity (Jmol-1K-1)
+    cp: np.ndarray  # isobaric heat capacity (Jmol-1K-1)
+    W: np.ndarray  # speed of sound (m/s)
+    G: np.ndarray  # Gibbs energy (J/mol)
+    JT: np.ndarray  # Joule-Thomson coefficient (K/kPa)
+    kappa: np.ndarray  # isentropic exponent
+    ierr: np.ndarray  # 0 if density iteration converged, 1 otherwise
+
+
+@dataclass
+class _XTerms:
+    """Composition dependent terms for a set of states."""
+    K3: np.ndarray
+    U: np.ndarray
+    G: np.ndarray
+    Q: np.ndarray
+    F: np.ndarray
+    bs: np.ndarray  # shape (n, 18), terms 1 to 18
+    csn: np.ndarray  # shape (n, 58), terms 1 to 58 (0 below term 13)
+
+    def __len__(self) -> int:
+        return len(self.K3)
+
+    def take(self, idx: np.ndarray) -> '_XTerms':
+        """Return the terms of states idx (terms of a single composition are broadcast, not repeated)."""
+        if len(self) == 1:
+            return self
+        return _XTerms(*(getattr(self, f)[idx] for f in self.__dataclass_fields__))
+
+
+@lru_cache(maxsize=None)
+def _tables() -> dict:
+    """Return the DETAIL parameters as read-only NumPy arrays (0-based indexes)."""
+    detail = detail_tables()
+    tables = dict(
+        an=np.array(detail.an[1:], dtype=float),
+        bn=np.array(detail.bn[1:], dtype=int),
+        kn=np.array(detail.kn[1:], dtype=int),
+        un=np.array(detail.un[1:], dtype=float),
+        fn=np.array(detail.fn[1:], dtype=bool),
+        gn=np.array(detail.gn[1:], dtype=bool),
+        qn=np.array(detail.qn[1:], dtype=bool),
+        gi=np.array(detail.gi[1:], dtype=float),
+        qi=np.array(detail.qi[1:], dtype=float),
+        fi=np.array(detail.fi[1:], dtype=float),
+        ki25=np.array(detail.ki25[1:], dtype=float),
+        ei25=np.array(detail.ei25[1:], dtype=float),
+        kij5=np.array([row[1:] for row in detail.kij5[1:]], dtype=float),
+        uij5=np.array([row[1:] for row in detail.uij5[1:]], dtype=float),
+        gij5=np.array([row[1:] for row in detail.gij5[1:]], dtype=float),
+        bsnij2=np.array([[col[1:] for col in row[1:]] for row in detail.bsnij2[1:]], dtype=float),
+        n0i=np.array([row[1:] for row in detail.n0i[1:]], dtype=float),
+        th0i=np.array([row[4:] for row in detail.th0i[1:]], dtype=float),
+        mm=np.array(list(MmDetail.values()), dtype=float),
+    )
+    for array in tables.values():
+        array.flags.writeable = False
+    return tables
+
+
+def x_terms(x: np.ndarray) -> _XTerms:
+    """Calculate all of the variables related to the gas compositions x of shape (n, 21)."""
+    tb = _tables()
+    # binary pairs are summed over i < j with a 2 * xi * xj weight
+    upper = np.triu(np.ones((NCDETAIL, NCDETAIL), dtype=bool), k=1)
+    xij = 2 * x[:, :, None] * x[:, None, :] * upper
+    xi2 = x ** 2
+    # K, U, and G are the sums of a pure fluid contribution and a binary pair contribution
+    k3 = (x @ tb['ki25']) ** 2 + np.einsum('nij,ij->n', xij, tb['kij5'])
+    u = (x @ tb['ei25']) ** 2 + np.einsum('nij,ij->n', xij, tb['uij5'])
+    g = x @ tb['gi'] + np.einsum('nij,ij->n', xij, tb['gij5'])
+    # Q and F depend only on the pure fluid parts
+    q = x @ tb['qi']
+    f = xi2 @ tb['fi']
+    # second virial coefficients of mixture
+    bs = np.einsum('ni,iik->nk', xi2, tb['bsnij2']) + np.einsum('nij,ijk->nk', xij, tb['bsnij2'])
+    k3 = k3 ** 0.6
+    u = u ** 0.2
+    # third virial and higher coefficients
+    csn = tb['an'] * u[:, None] ** tb['un']
+    csn = np.where(tb['gn'], csn * g[:, None], csn)
+    csn = np.where(tb['qn'], csn * (q ** 2)[:, None], csn)
+    csn = np.where(tb['fn'], csn * f[:, None], csn)
+    csn[:, :12] = 0.0
+    return _XTerms(K3=k3, U=u, G=g, Q=q, F=f, bs=bs, csn=csn)
+
+
+def alpha_r(t: np.ndarray, d: np.ndarray, xt: _XTerms, itau: int = 0) -> dict:
+    """Calculate the derivatives of the residual Helmholtz energy (ar) with respect to T and D.
+
+    Return a dict with keys (0, 0) to (0, 3) and, if itau > 0, (1, 0), (1, 1) and (2, 0).
+    """
+    tb = _tables()
+    an_idx = np.arange(NTERMS)
+    tun = t[:, None] ** -tb['un']
+    # powers and exponents of reduced density
+    dred = xt.K3 * d
+    dknn = dred[:, None] ** np.arange(10)
+    expn = np.exp(-dknn[:, :5])
+    expn[:, 0] = 1.0
+    # contributions to the virial coefficients (terms 1 to 18)
+    sumb = np.zeros_like(tun)
+    sumb[:, :18] = xt.bs * d[:, None]
+    sumb[:, 12:18] -= xt.csn[:, 12:18] * dred[:, None]
+    sumb[:, :18] *= tun[:, :18]
+    # contributions to the residual part of the Helmholtz energy (terms 13 to 58)
+    high = an_idx >= 12
+    dk = dknn[:, tb['kn']]
+    sum0 = np.where(high, xt.csn * dknn[:, tb['bn']] * tun * expn[:, tb['kn']], 0.0)
+    # contributions to the derivatives of the Helmholtz energy with respect to density
+    bkd = tb['bn'] - tb['kn'] * dk
+    ckd = tb['kn'] * tb['kn'] * dk
+    coefd1 = np.where(high, bkd, 0.0)
+    coefd2 = np.where(high, bkd * (bkd - 1) - ckd, 0.0)
+    coefd3 = np.where(high, (bkd - 2) * coefd2 + ckd * (1 - tb['kn'] - 2 * bkd), 0.0)
+    # density derivatives
+    s0 = sum0 + sumb
+    s1 = sum0 * coefd1 + sumb
+    s2 = sum0 * coefd2
+    s3 = sum0 * coefd3
+    rt = R * t
+    ar = {
+        (0, 0): rt * s0.sum(axis=1),
+        (0, 1): rt * s1.sum(axis=1),
+        (0, 2): rt * s2.sum(axis=1),
+        (0, 3): rt * s3.sum(axis=1),
+    }
+    # temperature derivatives
+    if itau > 0:
+        coeft1 = R * (tb['un'] - 1)
+        coeft2 = coeft1 * tb['un']
+        ar[(1, 0)] = -(s0 @ coeft1)
+        ar[(1, 1)] = -(s1 @ coeft1)
+        ar[(2, 0)] = s0 @ coeft2
+    return ar
+
+
+def alpha_0(t: np.ndarray, d: np.ndarray, x: np.ndarray) -> tuple:
+    """Calculate the ideal gas Helmholtz energy and its derivatives with respect to T and D."""
+    tb = _tables()
+    n0i, th0i = tb['n0i'], tb['th0i']
+    logd = np.log(np.maximum(d, EPSILON))
+    logt = np.log(t)
+    present = x > 0
+    logxd = logd[:, None] + np.log(np.where(present, x, 1.0))
+    # hyperbolic terms (j = 4 to 7): sinh for j = 4 and 6, cosh for j = 5 and 7
+    used = th0i > 0
+    th0t = np.where(used, th0i, 1.0)[None, :, :] / t[:, None, None]
+    ep = np.exp(th0t)
+    em = 1 / ep
+    hsn = (ep - em) / 2
+    hcn = (ep + em) / 2
+    is_sinh = np.array([True, False, True, False])
+    hyp = np.where(is_sinh, hsn, hcn)
+    hyp_other = np.where(is_sinh, hcn, hsn)
+    sign = np.where(is_sinh, 1.0, -1.0)
+    n0 = np.where(used, n0i[:, 3:], 0.0)
+    loghyp = np.log(np.abs(hyp))
+    sumhyp0 = (sign * n0 * loghyp).sum(axis=2)
+    sumhyp1 = (sign * n0 * (loghyp - th0t * hyp_other / hyp)).sum(axis=2)
+    sumhyp2 = (n0 * (th0t / hyp) ** 2).sum(axis=2)
+    a0_0 = (x * (logxd + n0i[:, 0] + n0i[:, 1] / t[:, None] - n0i[:, 2] * logt[:, None] + sumhyp0)).sum(axis=1)
+    a0_1 = (x * (logxd + n0i[:, 0] - n0i[:, 2] * (1 + logt[:, None]) + sumhyp1)).sum(axis=1)
+    a0_2 = -(x * (n0i[:, 2] + sumhyp2)).sum(axis=1)
+    return a0_0 * R * t, a0_1 * R, a0_2 * R
+
+
+def density(p: np.ndarray, t: np.ndarray, xt: _XTerms) -> tuple:
+    """Calculate density as a function of temperature, T and pressure, P (Newton's iteration on log(v)).
+
+    Return the tuple (D, zd, ierr) where zd is the compressibility factor of the last iteration.
+    """
+    n = len(p)
+    d = p / R / t  # start with ideal gas estimate
+    zd = np.full(n, np.nan)
+    ierr = np.ones(n, dtype=int)
+    active = np.abs(p) >= EPSILON
+    d[~active] = 0.0
+    plog = np.log(np.where(active, p, 1.0))
+    vlog = -np.log(np.where(active, d, 1.0))
+    for _ in range(20):
+        # fail to converge (ideal gas density is kept)
+        active &= (vlog >= -7) & (vlog <= 100)
+        idx = np.flatnonzero(active)
+        if not len(idx):
+            break
+        d_it = np.exp(-vlog[idx])
+        t_it = t[idx]
+        ar = alpha_r(t_it, d_it, xt.take(idx))
+        z = 1 + ar[(0, 1)] / R / t_it
+        p2 = d_it * R * t_it * z
+        dpdd = R * t_it + 2 * ar[(0, 1)] + ar[(0, 2)]
+        # first order Newton's type iterative scheme, with log(P) as the known variable and log(v) as the unknown
+        bad = (dpdd < EPSILON) | (p2 < EPSILON)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vdiff = (np.log(np.where(bad, 1.0, p2)) - plog[idx]) * p2 / (-d_it * dpdd)
+        vdiff = np.where(bad, -0.1, vdiff)
+        vlog[idx] -= vdiff
+        done = ~bad & (np.abs(vdiff) < TOLR)
+        d[idx[done]] = np.exp(-vlog[idx[done]])
+        zd[idx[done]] = z[done]
+        ierr[idx[done]] = 0
+        active[idx[done]] = False
+    return d, zd, ierr
+
+
+def detail_batch(p_bara, t_celsius, x, block_size: int = STATE_BLOCK_SIZE) -> DetailBatchResult:
+    """Evaluate the DETAIL method for arrays of states.
+
+    Arguments:
+        p_bara: pressures in bara, array of shape (n,) (or scalar)
+        t_celsius: temperatures in degrees Celsius, array of shape (n,) (or scalar)
+        x: compositions as mole fractions with the AGA8Detail layout (placeholder at index 0), array of shape
+           (n, 22) or (22,) for a composition shared by all states
+        block_size: max number of states evaluated at once (bound the memory use)
+    """
+    # inputs (convert bara to kPa and °C to K)
+    p, t = np.broadcast_arrays(np.asarray(p_bara, dtype=float) * 100, np.asarray(t_celsius, dtype=float) + 273.15)
+    p, t = np.atleast_1d(p).astype(float), np.atleast_1d(t).astype(float)
+    if np.any(p < 0):
+        raise ValueError('pressures must not be negative')
+    x = np.asarray(x, dtype=float)
+    shared_x = x.ndim == 1
+    if shared_x:
+        x = np.broadcast_to(x, (len(p), x.shape[0]))
+    if x.shape != (len(p), NCDETAIL + 1):
+        raise ValueError(f'x must be of shape ({NCDETAIL + 1},) or ({len(p)}, {NCDETAIL + 1})')
+    x = x[:, 1:]
+    fields = [f for f in DetailBatchResult.__dataclass_fields__ if f not in ('P', 'T')]
+    if not len(p):
+        return DetailBatchResult(P=p, T=t, **{f: np.empty(0, dtype=int if f == 'ierr' else float) for f in fields})
+    # as in the scalar path, components with a null (or negative) mole fraction are ignored by the equation
+    x_eq = np.where(x[:1] > 0, x[:1], 0.0) if shared_x else np.where(x > 0, x, 0.0)
+
+    # composition terms are computed once per distinct composition (by blocks to bound memory use)
+    if shared_x:
+        x_uniq, x_inv = x_eq, np.zeros(len(p), dtype=int)
+        x_eq = np.broadcast_to(x_eq, x.shape)
+    else:
+        x_uniq, x_inv = np.unique(x_eq, axis=0, return_inverse=True)
+        x_inv = x_inv.reshape(-1)
+    blocks = [x_terms(x_uniq[i:i + X_BLOCK_SIZE]) for i in range(0, len(x_uniq), X_BLOCK_SIZE)]
+    xt_uniq = _XTerms(*(np.concatenate([getattr(b, f) for b in blocks]) for f in _XTerms.__dataclass_fields__))
+
+    # states are evaluated by blocks, results are written to preallocated arrays
+    res = {f: np.empty(len(p), dtype=int if f == 'ierr' else float) for f in fields}
+    for start in range(0, len(p), block_size):
+        blk = slice(start, start + block_size)
+        values = _detail_block(p[blk], t[blk], x[blk], x_eq[blk], xt_uniq.take(x_inv[blk]))
+        for f in fields:
+            res[f][blk] = values[f]
+    return DetailBatchResult(P=p, T=t, **res)
+
+
+def _detail_block(p: np.ndarray, t: np.ndarray, x: np.ndarray, x_eq: np.ndarray, xt: _XTerms) -> dict:
+    """Evaluate density and thermodynamic properties of a block of states (see detail_batch())."""
+    tb = _tables()
+    mm = x @ tb['mm']
+
+    # density and thermodynamic properties
+    d, zd, ierr = density(p, t, xt)
+    a0 = alpha_0(t, d, x_eq)
+    ar = alpha_r(t, d, xt, itau=2)
+    rt = R * t
+    z = 1 + ar[(0, 1)] / rt
+    p3 = d * rt * z
+    dpdd = rt + 2 * ar[(0, 1)] + ar[(0, 2)]
+    dpdt = d * R + d * ar[(1, 1)]
+    a = a0[0] + ar[(0, 0)]
+    s = -a0[1] - ar[(1, 0)]
+    u = a + t * s
+    cv = -(a0[2] + ar[(2, 0)])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        has_d = d > EPSILON
+        h = np.where(has_d, u + p3 / d, u + rt)
+        g = np.where(has_d, a + p3 / d, a + rt)
+        cp = np.where(has_d, cv + t * (dpdt / d) ** 2 / dpdd, cv + R)
+        d2pdd2 = np.where(has_d, (2 * ar[(0, 1)] + 4 * ar[(0, 2)] + ar[(0, 3)]) / d, 0.0)
+        jt = np.where(has_d, (t / d * dpdt / dpdd - 1) / cp / d, 1e20)
+        w = np.sqrt(np.maximum(1000 * cp / cv * dpdd / mm, 0.0))
+        kappa = w ** 2 * mm / (rt * 1000 * z)
+
+    # invalidate properties of states for which the density iteration failed
+    def _valid(values: np.ndarray) -> np.ndarray:
+        return np.where(ierr == 0, values, np.nan)
+
+    return dict(D=d, MM=mm, z=_valid(z), zd=zd, P3=_valid(p3), dpdd=_valid(dpdd), dpdt=_valid(dpdt),
+                d2pdd2=_valid(d2pdd2), A=_valid(a), U=_valid(u), H=_valid(h), S=_valid(s), cv=_valid(cv),
+                cp=_valid(cp), W=_valid(w), G=_valid(g), JT=_valid(jt), kappa=_valid(kappa), ierr=ierr)
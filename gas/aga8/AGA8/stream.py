@@ -0,0 +1,74 @@
+"""stream.py module contains a streaming evaluator of the DETAIL method for time series of P/T readings."""
+
+from typing import Dict, Hashable, Optional
+
+from . import AGA8Detail, XTermsCache
+
+
+class AGA8DetailStream:
+    """Evaluate the DETAIL method on samples of slowly varying P and T for several meters.
+
+    The last converged density of each meter is used as the initial estimate of the next density iteration
+    (instead of the ideal gas density) and composition terms are shared through an XTermsCache.
+
+    Usage:
+        stream = AGA8DetailStream()
+        for p_bara, t_celsius in readings:
+            z = stream.evaluate('meter_1', p_bara, t_celsius, x).z
+        print(f'{stream.mean_iterations=}')
+    """
+
+    def __init__(self, x_cache: Optional[XTermsCache] = None) -> None:
+        """Initialisation.
+
+        Arguments:
+            x_cache: cache of composition terms (a private cache is created if not set)
+        """
+        self.x_cache = x_cache if x_cache is not None else XTermsCache()
+        # last converged density (mol/l) by meter
+        self.last_d: Dict[Hashable, float] = {}
+        # instrumentation
+        self.samples = 0
+        self.warm_samples = 0
+        self.iterations = 0
+        self.warm_iterations = 0
+        self.failures = 0
+
+    @property
+    def mean_iterations(self) -> float:
+        """Mean number of density iterations by sample."""
+        return self.iterations / self.samples if self.samples else 0.0
+
+    @property
+    def mean_warm_iterations(self) -> float:
+        """Mean number of density iterations by warm started sample."""
+        return self.warm_iterations / self.warm_samples if self.warm_samples else 0.0
+
+    def evaluate(self, meter_id: Hashable, p_bara: float, t_celsius: float, x: list) -> AGA8Detail:
+        """Run the DETAIL method for a new sample of meter_id and return the AGA8Detail instance."""
+        aga8 = AGA8Detail(p_bara=p_bara, t_celsius=t_celsius, x=x, x_cache=self.x_cache)
+        last_d = self.last_d.get(meter_id)
+        if last_d is not None:
+            # a negative density tells density_detail() to start from its absolute value
+            aga8.D = -last_d
+        aga8.run()
+        # update instrumentation
+        self.samples += 1
+        self.iterations += aga8.n_iter
+        if last_d is not None:
+            self.warm_samples += 1
+            self.warm_iterations += aga8.n_iter
+        # keep converged density only
+        if aga8.ierr == 0:
+            self.last_d[meter_id] = aga8.D
+        else:
+            self.failures += 1
+            self.last_d.pop(meter_id, None)
+        return aga8
+
+    def reset(self, meter_id: Optional[Hashable] = None) -> None:
+        """Forget the last density of meter_id (of all meters if not set), next sample will start cold."""
+        if meter_id is None:
+            self.last_d.clear()
+        else:
+            self.last_d.pop(meter_id, None)
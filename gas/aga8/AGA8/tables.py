@@ -0,0 +1,179 @@
+"""tables.py module contains the constant parameter tables of the DETAIL method.
+
+The tables (from initialise.py plus the ones derived by the DETAIL setup) do not depend on the gas, they are
+computed once per process and shared by all AGA8Detail instances as immutable tuples (same indexes as the
+initialise_* lists). They can optionally be saved to and loaded from a .npz file (requires numpy).
+"""
+
+import math
+from typing import NamedTuple, Optional
+
+from .initialise import (
+    initialise_an,
+    initialise_bn,
+    initialise_bsnij2,
+    initialise_ei,
+    initialise_fi,
+    initialise_fn,
+    initialise_gi,
+    initialise_gn,
+    initialise_i25_arrays,
+    initialise_ij5_arrays,
+    initialise_ij_arrays,
+    initialise_ki,
+    initialise_kn,
+    initialise_n0i,
+    initialise_qi,
+    initialise_qn,
+    initialise_si,
+    initialise_sn,
+    initialise_th0i,
+    initialise_un,
+    initialise_wi,
+    initialise_wn,
+)
+
+NTERMS = 58
+MAXFLDS = 21
+R = 8.31451
+
+
+class DetailTables(NamedTuple):
+    """Constant tables of the DETAIL method (nested tuples, index 0 is a placeholder as in initialise.py)."""
+    an: tuple
+    bn: tuple
+    kn: tuple
+    un: tuple
+    fn: tuple
+    gn: tuple
+    qn: tuple
+    sn: tuple
+    wn: tuple
+    ei: tuple
+    ki: tuple
+    gi: tuple
+    eij: tuple
+    uij: tuple
+    kij: tuple
+    gij: tuple
+    qi: tuple
+    fi: tuple
+    si: tuple
+    wi: tuple
+    n0i: tuple
+    th0i: tuple
+    ki25: tuple
+    ei25: tuple
+    bsnij2: tuple
+    kij5: tuple
+    uij5: tuple
+    gij5: tuple
+
+
+# process wide tables (see detail_tables())
+_tables: Optional[DetailTables] = None
+
+
+def _freeze(value):
+    """Convert nested lists to nested tuples."""
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def build_detail_tables() -> DetailTables:
+    """Initialize all the constants and parameters in the DETAIL model (this is the costly part, see detail_tables())."""
+    an = initialise_an(n=NTERMS)
+    bn = initialise_bn(n=NTERMS)
+    kn = initialise_kn(n=NTERMS)
+    un = initialise_un(n=NTERMS)
+    fn = initialise_fn(n=NTERMS)
+    gn = initialise_gn(n=NTERMS)
+    qn = initialise_qn(n=NTERMS)
+    sn = initialise_sn(n=NTERMS)
+    wn = initialise_wn(n=NTERMS)
+    ei = initialise_ei(n=MAXFLDS)  # energy params
+    ki = initialise_ki(n=MAXFLDS)  # size params
+    gi = initialise_gi(n=MAXFLDS)  # orientation params
+    eij, uij, kij, gij = initialise_ij_arrays(n=MAXFLDS)
+    # quadrupole params
+    qi = initialise_qi(n=MAXFLDS)
+    fi = initialise_fi(n=MAXFLDS)
+    si = initialise_si(n=MAXFLDS)
+    wi = initialise_wi(n=MAXFLDS)
+    # ideal gas params
+    n0i = initialise_n0i(n=MAXFLDS)
+    th0i = initialise_th0i(n=MAXFLDS)
+    # precalculation of constants
+    ki25, ei25 = initialise_i25_arrays(n=MAXFLDS)
+    bsnij2 = initialise_bsnij2(n=MAXFLDS)
+    kij5, uij5, gij5 = initialise_ij5_arrays(n=MAXFLDS)
+
+    for i in range(1, MAXFLDS + 1):
+        ki25[i] = math.pow(ki[i], 2.5)
+        ei25[i] = math.pow(ei[i], 2.5)
+
+    for i in range(1, MAXFLDS + 1):
+        for j in range(1, MAXFLDS + 1):
+            for n in range(1, 18 + 1):
+                bsnij = 1  # initialise Bs_nij @ 1
+                if gn[n] == 1:
+                    bsnij = gij[i][j] * (gi[i] + gi[j]) / 2
+                if qn[n] == 1:
+                    bsnij = bsnij * qi[i] * qi[j]
+                if fn[n] == 1:
+                    bsnij = bsnij * fi[i] * fi[j]
+                if sn[n] == 1:
+                    bsnij = bsnij * si[i] * si[j]
+                if wn[n] == 1:
+                    bsnij = bsnij * wi[i] * wi[j]
+
+                bsnij2[i][j][n] = (
+                    an[n]
+                    * math.pow(eij[i][j] * math.sqrt(ei[i] * ei[j]), un[n])
+                    * math.pow(ki[i] * ki[j], 1.5)
+                    * bsnij
+                )
+
+            kij5[i][j] = (math.pow(kij[i][j], 5) - 1) * ki25[i] * ki25[j]
+            uij5[i][j] = (math.pow(uij[i][j], 5) - 1) * ei25[i] * ei25[j]
+            gij5[i][j] = (gij[i][j] - 1) * (gi[i] + gi[j]) / 2
+
+    # Ideal gas terms
+    d0 = 101.325 / R / 298.15
+
+    for i in range(1, MAXFLDS + 1):
+        n0i[i][3] = n0i[i][3] - 1
+        n0i[i][1] = n0i[i][1] - math.log(d0)
+
+    tables = dict(
+        an=an, bn=bn, kn=kn, un=un, fn=fn, gn=gn, qn=qn, sn=sn, wn=wn, ei=ei, ki=ki, gi=gi,
+        eij=eij, uij=uij, kij=kij, gij=gij, qi=qi, fi=fi, si=si, wi=wi, n0i=n0i, th0i=th0i,
+        ki25=ki25, ei25=ei25, bsnij2=bsnij2, kij5=kij5, uij5=uij5, gij5=gij5,
+    )
+    return DetailTables(**{name: _freeze(table) for name, table in tables.items()})
+
+
+def detail_tables() -> DetailTables:
+    """Return the process wide DETAIL tables (built on first call)."""
+    global _tables
+    if _tables is None:
+        _tables = build_detail_tables()
+    return _tables
+
+
+def save_npz(path: str) -> None:
+    """Save the process wide DETAIL tables to a .npz file (requires numpy)."""
+    import numpy as np
+
+    np.savez(path, **detail_tables()._asdict())
+
+
+def load_npz(path: str) -> DetailTables:
+    """Load DETAIL tables from a .npz file saved by save_npz() and use them as the process wide tables."""
+    import numpy as np
+
+    global _tables
+    with np.load(path) as npz:
+        _tables = DetailTables._make(_freeze(npz[field].tolist()) for field in DetailTables._fields)
+    return _tables
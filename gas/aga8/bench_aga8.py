@@ -0,0 +1,53 @@
+"""
+Micro-benchmark of the AGA8 DETAIL calculator construction and run.
+
+Before the shared tables, every AGA8Detail() built all the initialise_* tables and setup_detail() derived
+bsnij2, kij5, uij5, gij5 and n0i with nested loops: this is the cost of build_detail_tables(). Now these
+tables are computed once per process and only bound to the new instance.
+
+The last runs show the effect of the composition terms cache (XTermsCache) and of the density warm start
+(AGA8DetailStream) for a fixed gas.
+"""
+
+import timeit
+
+from AGA8 import AGA8Detail, XTermsCache
+from AGA8.initialise import initialise_bs, initialise_csn, initialise_tun
+from AGA8.stream import AGA8DetailStream
+from AGA8.tables import build_detail_tables
+
+# some const
+X = [0.0, 0.9278, 0.0116, 0.0118, 0.0401, 0.0064] + [0.0] * 16
+N_RUN = 200
+
+
+def legacy_setup():
+    # per instance work done by AGA8Detail() + setup_detail() without shared tables
+    build_detail_tables()
+    initialise_bs(), initialise_csn(n=58), initialise_tun(n=58)
+
+
+def shared_setup():
+    AGA8Detail(p_bara=60.0, t_celsius=10.0, x=X).setup_detail()
+
+
+def full_run():
+    AGA8Detail(p_bara=60.0, t_celsius=10.0, x=X).run()
+
+
+def cached_run(cache=XTermsCache()):
+    AGA8Detail(p_bara=60.0, t_celsius=10.0, x=X, x_cache=cache).run()
+
+
+def stream_run(stream=AGA8DetailStream()):
+    stream.evaluate('meter_1', p_bara=60.0, t_celsius=10.0, x=X)
+
+
+if __name__ == '__main__':
+    for name, func in [('construction + setup_detail() (before)', legacy_setup),
+                       ('construction + setup_detail() (after)', shared_setup),
+                       ('full run() (after)', full_run),
+                       ('full run() with x terms cache', cached_run),
+                       ('streaming (warm start + cache)', stream_run)]:
+        t_run = min(timeit.repeat(func, number=N_RUN, repeat=5)) / N_RUN
+        print(f'{name:<40}: {t_run * 1e6:10.1f} µs')
@@ -36,3 +36,7 @@ x = [
 # use AGA8Detail class
 aga8_detail = AGA8Detail(p_bara=1.013, t_celsius=0.0, x=x).run()
 print(f'Z factor = {aga8_detail.z}')
+
+# batch mode (requires numpy): evaluate an array of states at once
+aga8_batch = AGA8Detail.batch(p_bara=[1.013, 20.0, 60.0], t_celsius=[0.0, 10.0, 20.0], x=x)
+print(f'Z factors = {aga8_batch.z}')
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from AGA8 import AGA8Detail, XTermsCache
+from AGA8.stream import AGA8DetailStream
+from AGA8.tables import build_detail_tables, load_npz, save_npz
+
+# test compositions (AGA8Detail layout: placeholder at index 0)
+X_GAS1 = [0.0, 0.9278, 0.0116, 0.0118, 0.0401, 0.0064] + [0.0] * 16
+X_GAS2 = [0.0, 0.77824, 0.02, 0.06, 0.08, 0.03, 0.0015, 0.003, 0.0005, 0.00165, 0.00215, 0.00088,
+          0.00024, 0.00015, 0.00009, 0.004, 0.005, 0.002, 0.0001, 0.0025, 0.007, 0.001]
+PROPERTIES = ['D', 'MM', 'z', 'zd', 'P3', 'dpdd', 'dpdt', 'A', 'U', 'H', 'S', 'cv', 'cp', 'W', 'G', 'JT', 'kappa']
+
+
+def valid_batch_vs_scalar(p_bar: list, t_celsius: list, x: list, rel_tolerance: float = 1e-12):
+    res = AGA8Detail.batch(p_bara=p_bar, t_celsius=t_celsius, x=x)
+    for idx, (p, t) in enumerate(zip(p_bar, t_celsius)):
+        aga8 = AGA8Detail(p_bara=p, t_celsius=t, x=x).run()
+        for name in PROPERTIES:
+            ref, value = getattr(aga8, name), getattr(res, name)[idx]
+            assert abs(value - ref) <= rel_tolerance * abs(ref), \
+                f'{name} at {p} bara {t} °C: scalar {ref} batch {value}'
+
+
+def test_batch_gas1():
+    valid_batch_vs_scalar(p_bar=[1.013, 20.0, 60.0, 120.0], t_celsius=[0.0, -20.0, 16.85, 60.0], x=X_GAS1)
+
+
+def test_batch_gas2():
+    valid_batch_vs_scalar(p_bar=[1.013, 20.0, 60.0, 120.0], t_celsius=[0.0, -20.0, 16.85, 60.0], x=X_GAS2)
+
+
+def test_batch_mixed_compositions():
+    res = AGA8Detail.batch(p_bara=[60.0, 60.0], t_celsius=[10.0, 10.0], x=[X_GAS1, X_GAS2])
+    assert res.z[0] == AGA8Detail.batch(p_bara=60.0, t_celsius=10.0, x=X_GAS1).z[0]
+    assert res.z[1] == AGA8Detail.batch(p_bara=60.0, t_celsius=10.0, x=X_GAS2).z[0]
+
+
+def test_batch_null_pressure():
+    res = AGA8Detail.batch(p_bara=[0.0], t_celsius=[0.0], x=X_GAS1)
+    assert res.ierr[0] == 1
+    assert res.D[0] == 0.0
+
+
+def test_batch_blocks():
+    from AGA8.batch import detail_batch
+
+    p_bar, t_celsius = [1.013, 20.0, 60.0, 120.0, 80.0], [0.0, -20.0, 16.85, 60.0, 5.0]
+    for x in (X_GAS1, [X_GAS1, X_GAS2, X_GAS1, X_GAS2, X_GAS2]):
+        ref = detail_batch(p_bara=p_bar, t_celsius=t_celsius, x=x)
+        res = detail_batch(p_bara=p_bar, t_celsius=t_celsius, x=x, block_size=2)
+        assert (res.ierr == ref.ierr).all()
+        for name in PROPERTIES:
+            assert np.allclose(getattr(res, name), getattr(ref, name), rtol=1e-13, atol=0.0), name
+
+
+def test_batch_negative_pressure():
+    with pytest.raises(ValueError):
+        AGA8Detail.batch(p_bara=[60.0, -1.0], t_celsius=[10.0, 10.0], x=X_GAS1)
+
+
+def test_batch_empty():
+    for x in (X_GAS1, np.empty((0, len(X_GAS1)))):
+        res = AGA8Detail.batch(p_bara=[], t_celsius=[], x=x)
+        assert len(res.P) == len(res.z) == len(res.ierr) == 0
+        assert res.ierr.dtype == int
+
+
+def test_shared_tables(tmp_path):
+    aga8_a = AGA8Detail(p_bara=60.0, t_celsius=10.0, x=X_GAS1).setup_detail()
+    aga8_b = AGA8Detail(p_bara=60.0, t_celsius=10.0, x=X_GAS2).setup_detail()
+    assert aga8_a.bsnij2 is aga8_b.bsnij2
+    # setup_detail() must be idempotent now that n0i is shared
+    z_ref = AGA8Detail(p_bara=60.0, t_celsius=10.0, x=X_GAS1).run().z
+    assert AGA8Detail(p_bara=60.0, t_celsius=10.0, x=X_GAS1).setup_detail().run().z == z_ref
+    # npz round trip
+    save_npz(tmp_path / 'detail.npz')
+    assert load_npz(tmp_path / 'detail.npz') == build_detail_tables()
+    assert AGA8Detail(p_bara=60.0, t_celsius=10.0, x=X_GAS1).run().z == z_ref
+
+
+def test_x_terms_cache():
+    cache = XTermsCache(maxsize=2)
+    cache.warm([X_GAS1])
+    assert (len(cache), cache.hits, cache.misses) == (1, 0, 0)
+    for t in (0.0, 10.0, 20.0):
+        z_ref = AGA8Detail(p_bara=60.0, t_celsius=t, x=X_GAS2).run().z
+        assert AGA8Detail(p_bara=60.0, t_celsius=t, x=X_GAS2, x_cache=cache).run().z == z_ref
+    assert (cache.hits, cache.misses) == (2, 1)
+    # float noise does not create a new entry
+    assert cache.key([xi + 1e-15 for xi in X_GAS2]) == cache.key(X_GAS2)
+    # least recently used composition (X_GAS1) is evicted
+    cache.get([0.0, 1.0] + [0.0] * 20)
+    assert len(cache) == 2
+    cache.get(X_GAS1)
+    assert cache.misses == 3
+
+
+def test_x_terms_cache_not_normalized():
+    # composition not summing to 1: cached and uncached runs must give the same results
+    x = [0.0] + [xi * 1.02 for xi in X_GAS2[1:]]
+    cache = XTermsCache()
+    for _ in range(2):
+        aga8_ref = AGA8Detail(p_bara=60.0, t_celsius=10.0, x=x).run()
+        aga8 = AGA8Detail(p_bara=60.0, t_celsius=10.0, x=x, x_cache=cache).run()
+        assert (aga8.z, aga8.D, aga8.MM) == (aga8_ref.z, aga8_ref.D, aga8_ref.MM)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_stream_warm_start():
+    stream = AGA8DetailStream()
+    cold_iterations = 0
+    for k in range(20):
+        p_bar, t_celsius = 60.0 + 0.01 * k, 10.0 + 0.005 * k
+        aga8_ref = AGA8Detail(p_bara=p_bar, t_celsius=t_celsius, x=X_GAS1).run()
+        cold_iterations += aga8_ref.n_iter
+        aga8 = stream.evaluate('meter_1', p_bar, t_celsius, X_GAS1)
+        assert abs(aga8.z - aga8_ref.z) < 1e-12
+    assert (stream.samples, stream.warm_samples) == (20, 19)
+    assert stream.iterations < cold_iterations
@@ -7,6 +7,39 @@ TEMP_REF_K = 273.15
 R = 8.314_51
 M_AIR = 28.962_6
 
+# components (same order as x args of ISO_6976), tables below follow this order
+COMPONENTS = ('n2', 'o2', 'co2', 'h2', 'ch4', 'c2h6', 'c3h8', 'iso_c4h10', 'n_c4h10',
+              'iso_c5h12', 'n_c5h12', 'neo_c5h12', 'n_c6h14')
+
+# summation factors by metering temperature (°C)
+SUM_FACTOR = {
+    0: (0.022_4, 0.031_6, 0.081_9, -0.004_0, 0.049_0, 0.100_0, 0.145_3,
+        0.204_9, 0.206_9, 0.251_0, 0.286_4, 0.238_7, 0.328_6),
+    15: (0.017_3, 0.028_3, 0.074_8, -0.004_8, 0.044_7, 0.092_2, 0.133_8,
+         0.178_9, 0.187_1, 0.228_0, 0.251_0, 0.212_1, 0.295_0),
+}
+
+# higher heating values (kj/mol x 1000) by (combustion, metering) temperatures (°C)
+HHV_KJ = {
+    (0, 0): (0, 0, 0, 12_788, 39_840, 69_790, 99_220, 128_230, 128_660, 157_760, 158_070, 157_120, 187_530),
+    (25, 0): (0, 0, 0, 12_752, 39_735, 69_630, 99_010, 127_960, 128_370, 157_440, 145_960, 156_800, 187_160),
+    (15, 15): (0, 0, 0, 12_102, 37_706, 66_070, 93_940, 121_400, 121_790, 149_360, 149_660, 148_760, 177_550),
+}
+
+# lower heating values (kj/mol x 1000) by (combustion, metering) temperatures (°C)
+LHV_KJ = {
+    (0, 0): (0, 0, 0, 10_777, 35_818, 63_760, 91_180, 118_180, 118_610, 145_690, 146_000, 145_060, 173_450),
+    (25, 0): (0, 0, 0, 10_788, 35_808, 63_740, 91_150, 118_150, 118_560, 145_660, 145_960, 145_020, 173_410),
+    (15, 15): (0, 0, 0, 10_223, 33_948, 60_430, 86_420, 112_010, 112_400, 138_090, 138_380, 137_490, 164_400),
+}
+
+# molar masses (kg/kmol)
+MOLAR_MASS = (28.013_5, 31.998_8, 44.010, 2.015_9, 16.043, 30.070, 44.097,
+              58.123, 58.123, 72.150, 72.150, 72.150, 86.177)
+
+# compression factor of air by metering temperature (°C)
+Z_AIR = {0: 0.999_41, 15: 0.999_58}
+
 
 class ISO_6976:
     def __init__(self,  t_combustion: Literal[0, 15, 25] = 0, t_metering: Literal[0, 15] = 0,
@@ -52,99 +85,60 @@ class ISO_6976:
         self.x_neo_c5h12 = x_neo_c5h12
         self.x_n_c6h14 = x_n_c6h14
 
+    @classmethod
+    def batch(cls, x, t_combustion: Literal[0, 15, 25] = 0, t_metering: Literal[0, 15] = 0,
+              x_as_ratio: bool = False):
+        """
+        Compute all properties for a table of analyses at once (NumPy columnar version).
+
+        Args:
+            x (array): mole fractions array of shape (n, 13), rows are analyses, columns follow __init__
+                       x args order (n2, o2, co2, h2, ch4, c2h6, c3h8, iso_c4h10, n_c4h10, iso_c5h12, n_c5h12,
+                       neo_c5h12, n_c6h14)
+            t_combustion (int): combustion reference temperature (default is 0 for measurement at 0°C)
+            t_metering (int): metering reference temperature (default is 0 for measurement at 0°C)
+            x_as_ratio (bool): X-components are expressed as ratios when x_as_ratio is True (default is percent)
+
+        Return:
+            ISO6976BatchResult: an array for each property (same names as ISO_6976 properties)
+        """
+        # numpy is only required for batch mode
+        from .batch import iso_6976_batch
+
+        return iso_6976_batch(x=x, t_combustion=t_combustion, t_metering=t_metering, x_as_ratio=x_as_ratio)
+
     @property
     def x_sum(self) -> float:
-        _sum = self.x_n2 + self.x_o2 + self.x_co2 + self.x_h2 + self.x_ch4 + self.x_c2h6 + self.x_c3h8
-        _sum += self.x_iso_c4h10 + self.x_n_c4h10 + self.x_iso_c5h12 + self.x_n_c5h12
-        _sum += self.x_neo_c5h12 + self.x_n_c6h14
+        return sum(self._x)
+
+    @property
+    def _x(self) -> tuple:
+        """Mole fractions in COMPONENTS order."""
+        return tuple(getattr(self, f'x_{name}') for name in COMPONENTS)
+
+    def _sum(self, coefs: tuple) -> float:
+        """Sum of mole fractions weighted by coefs (in COMPONENTS order), as ratio."""
+        _sum = sum(coef * x for coef, x in zip(coefs, self._x))
+        if not self.x_as_ratio:
+            _sum /= 100
         return _sum
 
     @property
     def z0(self) -> float:
         """Compression factor at selected standard condition."""
-        if self.t_metering == 0:
-            z_sum = 0.022_4 * self.x_n2
-            z_sum += 0.031_6 * self.x_o2
-            z_sum += 0.081_9 * self.x_co2
-            z_sum += -0.004_0 * self.x_h2
-            z_sum += 0.049_0 * self.x_ch4
-            z_sum += 0.100_0 * self.x_c2h6
-            z_sum += 0.145_3 * self.x_c3h8
-            z_sum += 0.206_9 * self.x_n_c4h10
-            z_sum += 0.204_9 * self.x_iso_c4h10
-            z_sum += 0.286_4 * self.x_n_c5h12
-            z_sum += 0.251_0 * self.x_iso_c5h12
-            z_sum += 0.238_7 * self.x_neo_c5h12
-            z_sum += 0.328_6 * self.x_n_c6h14
-        elif self.t_metering == 15:
-            z_sum = 0.017_3 * self.x_n2
-            z_sum += 0.028_3 * self.x_o2
-            z_sum += 0.074_8 * self.x_co2
-            z_sum += -0.004_8 * self.x_h2
-            z_sum += 0.044_7 * self.x_ch4
-            z_sum += 0.092_2 * self.x_c2h6
-            z_sum += 0.133_8 * self.x_c3h8
-            z_sum += 0.187_1 * self.x_n_c4h10
-            z_sum += 0.178_9 * self.x_iso_c4h10
-            z_sum += 0.251_0 * self.x_n_c5h12
-            z_sum += 0.228_0 * self.x_iso_c5h12
-            z_sum += 0.212_1 * self.x_neo_c5h12
-            z_sum += 0.295_0 * self.x_n_c6h14
-        else:
-            raise ValueError('unsupported value for t_metering argument')
-        if not self.x_as_ratio:
-            z_sum /= 100
+        try:
+            z_sum = self._sum(SUM_FACTOR[self.t_metering])
+        except KeyError:
+            raise ValueError('unsupported value for t_metering argument') from None
         return 1 - z_sum**2
 
     @property
     def hhv_kj(self) -> float:
         """Higher heating value (in kj/nm3)."""
-        if self.t_combustion == 0 and self.t_metering == 0:
-            hhv_kj_sum = 0 * self.x_n2
-            hhv_kj_sum += 0 * self.x_o2
-            hhv_kj_sum += 0 * self.x_co2
-            hhv_kj_sum += 12_788 * self.x_h2
-            hhv_kj_sum += 39_840 * self.x_ch4
-            hhv_kj_sum += 69_790 * self.x_c2h6
-            hhv_kj_sum += 99_220 * self.x_c3h8
-            hhv_kj_sum += 128_660 * self.x_n_c4h10
-            hhv_kj_sum += 128_230 * self.x_iso_c4h10
-            hhv_kj_sum += 158_070 * self.x_n_c5h12
-            hhv_kj_sum += 157_760 * self.x_iso_c5h12
-            hhv_kj_sum += 157_120 * self.x_neo_c5h12
-            hhv_kj_sum += 187_530 * self.x_n_c6h14
-        elif self.t_combustion == 25 and self.t_metering == 0:
-            hhv_kj_sum = 0 * self.x_n2
-            hhv_kj_sum += 0 * self.x_o2
-            hhv_kj_sum += 0 * self.x_co2
-            hhv_kj_sum += 12_752 * self.x_h2
-            hhv_kj_sum += 39_735 * self.x_ch4
-            hhv_kj_sum += 69_630 * self.x_c2h6
-            hhv_kj_sum += 99_010 * self.x_c3h8
-            hhv_kj_sum += 128_370 * self.x_n_c4h10
-            hhv_kj_sum += 127_960 * self.x_iso_c4h10
-            hhv_kj_sum += 145_960 * self.x_n_c5h12
-            hhv_kj_sum += 157_440 * self.x_iso_c5h12
-            hhv_kj_sum += 156_800 * self.x_neo_c5h12
-            hhv_kj_sum += 187_160 * self.x_n_c6h14
-        elif self.t_combustion == 15 and self.t_metering == 15:
-            hhv_kj_sum = 0 * self.x_n2
-            hhv_kj_sum += 0 * self.x_o2
-            hhv_kj_sum += 0 * self.x_co2
-            hhv_kj_sum += 12_102 * self.x_h2
-            hhv_kj_sum += 37_706 * self.x_ch4
-            hhv_kj_sum += 66_070 * self.x_c2h6
-            hhv_kj_sum += 93_940 * self.x_c3h8
-            hhv_kj_sum += 121_790 * self.x_n_c4h10
-            hhv_kj_sum += 121_400 * self.x_iso_c4h10
-            hhv_kj_sum += 149_660 * self.x_n_c5h12
-            hhv_kj_sum += 149_360 * self.x_iso_c5h12
-            hhv_kj_sum += 148_760 * self.x_neo_c5h12
-            hhv_kj_sum += 177_550 * self.x_n_c6h14
-        else:
-            raise ValueError('unsupported value for t_combustion and/or t_metering argument')
-        if not self.x_as_ratio:
-            hhv_kj_sum /= 100
+        try:
+            hhv_kj_sum = self._sum(HHV_KJ[(self.t_combustion, self.t_metering)])
+        except KeyError:
+            raise ValueError('unsupported value for t_combustion and/or t_metering argument') from None
         return hhv_kj_sum / self.z0
 
     @property
@@ -155,52 +149,10 @@ class ISO_6976:
     @property
     def lhv_kj(self) -> float:
         """Lower heating value (in kj/nm3)."""
-        if self.t_combustion == 0 and self.t_metering == 0:
-            lhv_kj_sum = 0 * self.x_n2
-            lhv_kj_sum += 0 * self.x_o2
-            lhv_kj_sum += 0 * self.x_co2
-            lhv_kj_sum += 10_777 * self.x_h2
-            lhv_kj_sum += 35_818 * self.x_ch4
-            lhv_kj_sum += 63_760 * self.x_c2h6
-            lhv_kj_sum += 91_180 * self.x_c3h8
-            lhv_kj_sum += 118_610 * self.x_n_c4h10
-            lhv_kj_sum += 118_180 * self.x_iso_c4h10
-            lhv_kj_sum += 146_000 * self.x_n_c5h12
-            lhv_kj_sum += 145_690 * self.x_iso_c5h12
-            lhv_kj_sum += 145_060 * self.x_neo_c5h12
-            lhv_kj_sum += 173_450 * self.x_n_c6h14
-        elif self.t_combustion == 25 and self.t_metering == 0:
-            lhv_kj_sum = 0 * self.x_n2
-            lhv_kj_sum += 0 * self.x_o2
-            lhv_kj_sum += 0 * self.x_co2
-            lhv_kj_sum += 10_788 * self.x_h2
-            lhv_kj_sum += 35_808 * self.x_ch4
-            lhv_kj_sum += 63_740 * self.x_c2h6
-            lhv_kj_sum += 91_150 * self.x_c3h8
-            lhv_kj_sum += 118_560 * self.x_n_c4h10
-            lhv_kj_sum += 118_150 * self.x_iso_c4h10
-            lhv_kj_sum += 145_960 * self.x_n_c5h12
-            lhv_kj_sum += 145_660 * self.x_iso_c5h12
-            lhv_kj_sum += 145_020 * self.x_neo_c5h12
-            lhv_kj_sum += 173_410 * self.x_n_c6h14
-        elif self.t_combustion == 15 and self.t_metering == 15:
-            lhv_kj_sum = 0 * self.x_n2
-            lhv_kj_sum += 0 * self.x_o2
-            lhv_kj_sum += 0 * self.x_co2
-            lhv_kj_sum += 10_223 * self.x_h2
-            lhv_kj_sum += 33_948 * self.x_ch4
-            lhv_kj_sum += 60_430 * self.x_c2h6
-            lhv_kj_sum += 86_420 * self.x_c3h8
-            lhv_kj_sum += 112_400 * self.x_n_c4h10
-            lhv_kj_sum += 112_010 * self.x_iso_c4h10
-            lhv_kj_sum += 138_380 * self.x_n_c5h12
-            lhv_kj_sum += 138_090 * self.x_iso_c5h12
-            lhv_kj_sum += 137_490 * self.x_neo_c5h12
-            lhv_kj_sum += 164_400 * self.x_n_c6h14
-        else:
-            raise ValueError('unsupported value for t_combustion and/or t_metering argument')
-        if not self.x_as_ratio:
-            lhv_kj_sum /= 100
+        try:
+            lhv_kj_sum = self._sum(LHV_KJ[(self.t_combustion, self.t_metering)])
+        except KeyError:
+            raise ValueError('unsupported value for t_combustion and/or t_metering argument') from None
         return lhv_kj_sum / self.z0
 
     @property
@@ -211,49 +163,16 @@ class ISO_6976:
     @property
     def density(self) -> float:
         """Density (volumetric mass density or specific mass): mass per unit of volume (in kg/nm3)."""
-        d_comp_coef = PRES_REF_KPA/(R*TEMP_REF_K)
-        density_sum = 28.013_5 * d_comp_coef * self.x_n2
-        density_sum += 31.998_8 * d_comp_coef * self.x_o2
-        density_sum += 44.010 * d_comp_coef * self.x_co2
-        density_sum += 2.015_9 * d_comp_coef * self.x_h2
-        density_sum += 16.043 * d_comp_coef * self.x_ch4
-        density_sum += 30.070 * d_comp_coef * self.x_c2h6
-        density_sum += 44.097 * d_comp_coef * self.x_c3h8
-        density_sum += 58.123 * d_comp_coef * self.x_n_c4h10
-        density_sum += 58.123 * d_comp_coef * self.x_iso_c4h10
-        density_sum += 72.150 * d_comp_coef * self.x_n_c5h12
-        density_sum += 72.150 * d_comp_coef * self.x_iso_c5h12
-        density_sum += 72.150 * d_comp_coef * self.x_neo_c5h12
-        density_sum += 86.177 * d_comp_coef * self.x_n_c6h14
-        if not self.x_as_ratio:
-            density_sum /= 100
-        return density_sum / self.z0
+        return self._sum(MOLAR_MASS) * (PRES_REF_KPA / (R * TEMP_REF_K)) / self.z0
 
     @property
     def rel_density(self) -> float:
         """Relative density (or specific gravity): ratio of the density (mass of a unit volume) vs air."""
-        rel_density_sum = (28.013_5 / M_AIR) * self.x_n2
-        rel_density_sum += (31.998_8 / M_AIR) * self.x_o2
-        rel_density_sum += (44.010 / M_AIR) * self.x_co2
-        rel_density_sum += (2.015_9 / M_AIR) * self.x_h2
-        rel_density_sum += (16.043 / M_AIR) * self.x_ch4
-        rel_density_sum += (30.070 / M_AIR) * self.x_c2h6
-        rel_density_sum += (44.097 / M_AIR) * self.x_c3h8
-        rel_density_sum += (58.123 / M_AIR) * self.x_n_c4h10
-        rel_density_sum += (58.123 / M_AIR) * self.x_iso_c4h10
-        rel_density_sum += (72.150 / M_AIR) * self.x_n_c5h12
-        rel_density_sum += (72.150 / M_AIR) * self.x_iso_c5h12
-        rel_density_sum += (72.150 / M_AIR) * self.x_neo_c5h12
-        rel_density_sum += (86.177 / M_AIR) * self.x_n_c6h14
-        if not self.x_as_ratio:
-            rel_density_sum /= 100
-        if self.t_metering == 0:
-            z_air = 0.999_41
-        elif self.t_metering == 15:
-            z_air = 0.999_58
-        else:
-            raise ValueError('unsupported value for t_metering argument')
-        return z_air * rel_density_sum / self.z0
+        try:
+            z_air = Z_AIR[self.t_metering]
+        except KeyError:
+            raise ValueError('unsupported value for t_metering argument') from None
+        return z_air * (self._sum(MOLAR_MASS) / M_AIR) / self.z0
 
     @property
     def wobbe_kj(self) -> float:
@@ -0,0 +1,63 @@
+"""batch.py module contains a NumPy columnar version of ISO_6976 for tables of gas analyses.
+
+All properties are computed in one pass: a single matrix product gives the summation factor, the heating
+values and the molar mass sums of every analysis, then z0 is shared by all derived properties.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from . import COMPONENTS, HHV_KJ, LHV_KJ, M_AIR, MOLAR_MASS, PRES_REF_KPA, R, SUM_FACTOR, TEMP_REF_K, Z_AIR
+
+
+@dataclass
+class ISO6976BatchResult:
+    """Properties of a table of analyses, each field is an array with one value per analysis."""
+    x_sum: np.ndarray
+    z0: np.ndarray
+    hhv_kj: np.ndarray
+    hhv_wh: np.ndarray
+    lhv_kj: np.ndarray
+    lhv_wh: np.ndarray
+    density: np.ndarray
+    rel_density: np.ndarray
+    wobbe_kj: np.ndarray
+    wobbe_wh: np.ndarray
+
+
+def iso_6976_batch(x, t_combustion: int = 0, t_metering: int = 0, x_as_ratio: bool = False) -> ISO6976BatchResult:
+    """Compute ISO_6976 properties of a table of analyses.
+
+    Arguments:
+        x: mole fractions array of shape (n, 13), rows are analyses and columns follow COMPONENTS order
+        t_combustion: combustion reference temperature (0, 15 or 25)
+        t_metering: metering reference temperature (0 or 15)
+        x_as_ratio: mole fractions are expressed as ratios when x_as_ratio is True (default is percent)
+    """
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    if x.shape[1] != len(COMPONENTS):
+        raise ValueError(f'x must have {len(COMPONENTS)} columns ({", ".join(COMPONENTS)})')
+    if t_metering not in SUM_FACTOR:
+        raise ValueError('unsupported value for t_metering argument')
+    if (t_combustion, t_metering) not in HHV_KJ:
+        raise ValueError('unsupported value for t_combustion and/or t_metering argument')
+
+    # all the sums in one pass
+    coefs = np.array([SUM_FACTOR[t_metering], HHV_KJ[(t_combustion, t_metering)],
+                      LHV_KJ[(t_combustion, t_metering)], MOLAR_MASS]).T
+    sums = x @ coefs
+    if not x_as_ratio:
+        sums /= 100
+    z_sum, hhv_sum, lhv_sum, mm_sum = sums.T
+
+    # derived properties share z0
+    z0 = 1 - z_sum**2
+    hhv_kj = hhv_sum / z0
+    lhv_kj = lhv_sum / z0
+    density = mm_sum * (PRES_REF_KPA / (R * TEMP_REF_K)) / z0
+    rel_density = Z_AIR[t_metering] * (mm_sum / M_AIR) / z0
+    sqrt_rel_density = np.sqrt(rel_density)
+    return ISO6976BatchResult(x_sum=x.sum(axis=1), z0=z0, hhv_kj=hhv_kj, hhv_wh=hhv_kj / 3.6, lhv_kj=lhv_kj,
+                              lhv_wh=lhv_kj / 3.6, density=density, rel_density=rel_density,
+                              wobbe_kj=hhv_kj / sqrt_rel_density, wobbe_wh=hhv_kj / 3.6 / sqrt_rel_density)
@@ -40,3 +40,11 @@ print(f'{iso_6976.lhv_wh=}')
 print(f'{iso_6976.density=}')
 print(f'{iso_6976.rel_density=}')
 print(f'{iso_6976.wobbe_wh=}')
+
+# batch mode (requires numpy): one row per analysis, columns in ISO_6976 args order
+analyses = [[INIT_N2, INIT_O2, INIT_CO2, INIT_H2, INIT_CH4, INIT_C2H6, INIT_C3H8, INIT_ISO_C4H10, INIT_N_C4H10,
+             INIT_ISO_C5H12, INIT_N_C5H12, INIT_NEO_C5H12, INIT_N_C6H14],
+            [1.0, 0.0, 1.0, 0.0, 95.0, 3.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]]
+batch = ISO_6976.batch(analyses, t_combustion=0, t_metering=0, x_as_ratio=False)
+print(f'{batch.hhv_wh=}')
+print(f'{batch.wobbe_wh=}')
@@ -0,0 +1,21 @@
+import numpy as np
+
+from ISO_6976 import ISO_6976
+from ISO_6976.batch import COMPONENTS
+
+PROPERTIES = ['x_sum', 'z0', 'hhv_kj', 'hhv_wh', 'lhv_kj', 'lhv_wh', 'density', 'rel_density', 'wobbe_kj', 'wobbe_wh']
+
+
+def test_batch_vs_scalar():
+    rng = np.random.default_rng(seed=0)
+    x = rng.uniform(0.0, 1.0, size=(20, len(COMPONENTS)))
+    x[:, COMPONENTS.index('ch4')] += 20.0
+    x = 100 * x / x.sum(axis=1, keepdims=True)
+    for t_combustion, t_metering in [(0, 0), (25, 0), (15, 15)]:
+        res = ISO_6976.batch(x, t_combustion=t_combustion, t_metering=t_metering)
+        for idx, row in enumerate(x):
+            iso_6976 = ISO_6976(t_combustion=t_combustion, t_metering=t_metering,
+                                **{f'x_{name}': value for name, value in zip(COMPONENTS, row)})
+            for name in PROPERTIES:
+                ref = getattr(iso_6976, name)
+                assert abs(getattr(res, name)[idx] - ref) <= 1e-12 * abs(ref), name
@@ -8,6 +8,9 @@ Usage:
     sgerg = SGERG(hs=40.66, d=0.581, x_co2=0.006, x_h2=0.0)
     z, rho_m = sgerg.run(p_bar=60, t_celsius=-3.15)
 
+    # with NumPy arrays of P and T (returns arrays)
+    z, rho_m = sgerg.run(p_bar=np.array([60.0, 120.0]), t_celsius=np.array([-3.15, 6.85]))
+
 
 Input Ranges:
 - x_co2: CO2 mole fraction: 0.0 to 0.3
@@ -74,6 +77,17 @@ H_H2 = 285.83
 H_CO = 282.98
 
 
+# some functions
+def _all(cond) -> bool:
+    """Check a condition which is a bool or a NumPy array of bool."""
+    return bool(cond.all()) if hasattr(cond, 'all') else cond
+
+
+def _any(cond) -> bool:
+    """Check if any item of a condition (bool or NumPy array of bool) is True."""
+    return bool(cond.any()) if hasattr(cond, 'any') else cond
+
+
 class SGERG:
     def __init__(self, hs: float, d: float = 0.610, x_co2: float = 0.0069, x_h2: float = 0.0):
         """
@@ -96,26 +110,42 @@ class SGERG:
         """Gas density (kg/m³) at 0 °C and 1 ATM (also call Specific Mass)."""
         return self.d * RHO_N_AIR
 
-    def run(self, p_bar: float, t_celsius: float):
+    def run(self, p_bar, t_celsius):
         """
         Calculates the compression factor (z) and molar density (d) of a natural gas
         using a simplified gas analysis and the GERG-88 virial equation.
 
+        Pressure and temperature can also be NumPy arrays (broadcast together): the intermediate data (step 1),
+        which only depends on gas quality, is computed once and the other steps are vectorized.
+
         Args:
-            p_bar (float): pressure in absolute bar (0.0 to 120.0)
-            t_celsius (float): temperature in degrees Celsius (-23.0 to 65.0)
+            p_bar (float or np.ndarray): pressure in absolute bar (0.0 to 120.0)
+            t_celsius (float or np.ndarray): temperature in degrees Celsius (-23.0 to 65.0)
 
         Return:
-            z (float): output compression factor
-            rho_m (float): output molar density in mol/m3
+            z (float or np.ndarray): output compression factor
+            rho_m (float or np.ndarray): output molar density in kmol/m3
 
         Raises:
             ValueError: If pressure (p_bar) or temperature (t_celsius) is outside the valid range.
         """
+        # array args: numpy is only required here
+        is_array = False
+        if not (isinstance(p_bar, (int, float)) and isinstance(t_celsius, (int, float))):
+            import numpy as np
+
+            if np.ndim(p_bar) == 0 and np.ndim(t_celsius) == 0:
+                # NumPy scalars (np.float32, np.int64...) use the scalar path
+                p_bar, t_celsius = float(p_bar), float(t_celsius)
+            else:
+                is_array = True
+                p_bar, t_celsius = np.broadcast_arrays(np.asarray(p_bar, dtype=float),
+                                                       np.asarray(t_celsius, dtype=float))
+
         # check args
-        if not 0.0 <= p_bar <= 120.0:
+        if not _all((0.0 <= p_bar) & (p_bar <= 120.0)):
             raise ValueError('pressure (p_bar) is out of range (0.0 to 120.0).')
-        if not -23.0 <= t_celsius <= 65.0:
+        if not _all((-23.0 <= t_celsius) & (t_celsius <= 65.0)):
             raise ValueError('temperature (tc) is out of range (-23.0 to 65.0).')
 
         # input data must satisfy the following condition
@@ -133,15 +163,17 @@ class SGERG:
         if not self.d > 0.55 + .4*x_n2 + 0.97*self.x_co2 - 0.45*self.x_h2:
             raise ValueError('internal inconsistency of input data')
 
-        # 1. calculation of intermediate data
-        x_ch, x_n2, x_co, h_ch = self._step1_calc_intermed_data()
-
         # 2. calculation of virial coefficients
         # find factors B and C of the virial equation z = 1 + B * rho_m + C * rho_m**2
         b_coef, c_coef = self._step2_calc_virial_coefs(t_celsius=t_celsius, h_ch=h_ch, x_ch=x_ch, x_n2=x_n2, x_co=x_co)
 
         # 3. calculation of compression factor and molar density
-        z, rho_m = self._step3_calc_z_and_molar_density(p_bar=p_bar, t_celsius=t_celsius, b_coef=b_coef, c_coef=c_coef)
+        if is_array:
+            z, rho_m = self._step3_calc_z_and_molar_density_array(p_bar=p_bar, t_celsius=t_celsius,
+                                                                  b_coef=b_coef, c_coef=c_coef)
+        else:
+            z, rho_m = self._step3_calc_z_and_molar_density(p_bar=p_bar, t_celsius=t_celsius,
+                                                            b_coef=b_coef, c_coef=c_coef)
 
         return z, rho_m
 
@@ -219,6 +251,10 @@ class SGERG:
                                         b_coef: float, c_coef: float, ) -> Tuple[float, float]:
         """ step3 : compute z and molar density (kmol/m3) """
 
+        # ideal gas limit (avoid a division by zero)
+        if p_bar == 0.0:
+            return 1.0, 0.0
+
         # t celsius to kelvin
         t_kelvin = t_celsius + T_0C_K
         rt = R_IDEAL_GAS * t_kelvin
@@ -245,6 +281,46 @@ class SGERG:
         rho_m = round(rho_m, 3)
         return z, rho_m
 
+    def _step3_calc_z_and_molar_density_array(self, p_bar, t_celsius, b_coef, c_coef):
+        """ step3 : compute z and molar density (kmol/m3) for NumPy arrays (same iteration as the scalar step3) """
+        import numpy as np
+
+        # work on flat arrays
+        shape = p_bar.shape
+        p_bar, t_celsius = p_bar.ravel(), t_celsius.ravel()
+        b_coef, c_coef = b_coef.ravel(), c_coef.ravel()
+        # t celsius to kelvin
+        t_kelvin = t_celsius + T_0C_K
+        rt = R_IDEAL_GAS * t_kelvin
+        # ideal gas limit at p = 0.0 (z = 1.0, rho_m = 0.0)
+        null_p = p_bar == 0.0
+        with np.errstate(divide='ignore'):
+            rt_p = np.where(null_p, np.inf, rt / np.where(null_p, 1.0, p_bar))
+        # rho_m(w=0)
+        rho_m = (rt_p + b_coef)**-1
+        z = np.ones_like(rho_m)
+        # iteration w: only items not yet converged are updated
+        todo = ~null_p
+        w = 0
+        while todo.any():
+            # avoid infinite loop
+            w += 1
+            if w > 20:
+                raise ValueError('no convergency (iteration w)')
+            b, c, rho = b_coef[todo], c_coef[todo], rho_m[todo]
+            # rho_m(w)=(RT/p)(1 + B x rho_m(w-1) + C x rho_m(w-1)**2)
+            rho = (rt_p[todo] * (1 + b * rho + c * rho**2))**-1
+            # z(w) = 1 + B.rho_m(w) + C.rho_m(w)**2
+            z_w = 1 + b * rho + c * rho**2
+            rho_m[todo] = rho
+            z[todo] = z_w
+            # convergence condition: measured pressure vs calculated pressure lower than 10**-5
+            p_w = rho * rt[todo] * z_w
+            idx = np.flatnonzero(todo)
+            todo[idx[np.abs(p_bar[todo] - p_w) < 1e-5]] = False
+        # apply the roundings
+        return np.round(z, 5).reshape(shape), np.round(rho_m, 3).reshape(shape)
+
     def _b_coef(self, t_kelvin: float, h_ch: float, x_ch: float, x_n2: float, x_co: float) -> float:
         """ Compute second virial coef B """
         # calculates second virial coefficients (with thermal expansion coefficients BCxx[x])
@@ -262,7 +338,7 @@ class SGERG:
         b11 += (BC11H2[0] + BC11H2[1] * t_kelvin + BC11H2[2] * t_kelvin**2) * h_ch**2
         # specific case of b12
         b12 = (0.72 + 1.875e-5 * (320.0-t_kelvin)**2) * (b11 + b22) / 2.0
-        if b11 * b33 < 0.0:
+        if _any(b11 * b33 < 0.0):
             raise ValueError('no solution')
         # specific case of b13
         b13 = -0.865 * (b11 * b33)**.5
@@ -1,3 +1,6 @@
+import numpy as np
+import pytest
+
 from SGERG_88 import SGERG
 
 
@@ -24,6 +27,32 @@ def test_gas1():
     valid_sgerg(sgerg, p_bar=120.0, t_celsius=56.85, z_ref=0.883_22, tolerance=0.01)
 
 
+def test_null_pressure():
+    sgerg = SGERG(hs=40.66, d=0.581, x_co2=0.006, x_h2=0.0)
+    assert sgerg.run(p_bar=0.0, t_celsius=16.85) == (1.0, 0.0)
+
+
+def test_array_vs_scalar():
+    sgerg = SGERG(hs=34.16, d=0.599, x_co2=0.016, x_h2=0.095)
+    p_bar, t_celsius = np.meshgrid(np.linspace(0.0, 120.0, 13), np.linspace(-23.0, 65.0, 9))
+    z, rho_m = sgerg.run(p_bar=p_bar, t_celsius=t_celsius)
+    assert z.shape == rho_m.shape == p_bar.shape
+    for idx in np.ndindex(p_bar.shape):
+        assert (z[idx], rho_m[idx]) == sgerg.run(p_bar=float(p_bar[idx]), t_celsius=float(t_celsius[idx]))
+    # out of range item in array
+    with pytest.raises(ValueError):
+        sgerg.run(p_bar=np.array([60.0, 121.0]), t_celsius=0.0)
+
+
+def test_numpy_scalars():
+    sgerg = SGERG(hs=34.16, d=0.599, x_co2=0.016, x_h2=0.095)
+    z_ref, rho_m_ref = sgerg.run(p_bar=60.0, t_celsius=10.0)
+    for p_bar, t_celsius in [(np.float32(60.0), 10.0), (np.int64(60), np.float64(10.0)), (np.array(60.0), 10)]:
+        z, rho_m = sgerg.run(p_bar=p_bar, t_celsius=t_celsius)
+        assert type(z) is float and type(rho_m) is float
+        assert (z, rho_m) == (z_ref, rho_m_ref)
+
+
 def test_gas2():
     sgerg = SGERG(hs=40.62, d=0.609, x_co2=0.005, x_h2=0.0)
     # 60 bara
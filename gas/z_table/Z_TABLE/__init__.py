@@ -0,0 +1,143 @@
+"""
+Tabulated compression factor Z(P, T) for a fixed gas quality, with a sampled max error.
+
+The exact equation (SGERG, AGA8 DETAIL...) is evaluated once on a regular P/T grid, then Z is computed by
+bicubic interpolation in O(1). The grid is refined until the max relative error vs the exact equation, sampled
+on a check_div x check_div sub-grid of each cell (edges included), is lower than the requested bound. This is
+an estimate, not a proven bound: the error between sampled points can be a little higher. Outside the grid the
+exact equation is called.
+
+Usage:
+    from SGERG_88 import SGERG
+    from Z_TABLE import ZTable
+
+    sgerg = SGERG(hs=40.66, d=0.581, x_co2=0.006, x_h2=0.0)
+    z_table = ZTable(z_func=lambda p, t: sgerg.run(p_bar=p, t_celsius=t)[0])
+    z = z_table.z(p_bar=60.0, t_celsius=-3.15)
+"""
+
+from typing import Callable
+
+import numpy as np
+
+# bicubic interpolation matrix: coefs = M @ [[f, f_t], [f_p, f_pt]] @ M.T
+_M = np.array([[1.0, 0.0, 0.0, 0.0],
+               [0.0, 0.0, 1.0, 0.0],
+               [-3.0, 3.0, -2.0, -1.0],
+               [2.0, -2.0, 1.0, 1.0]])
+
+
+class ZTable:
+    def __init__(self, z_func: Callable[[float, float], float],
+                 p_min: float = 0.0, p_max: float = 120.0, t_min: float = -23.0, t_max: float = 65.0,
+                 max_rel_error: float = 5e-5, p_step: float = 10.0, t_step: float = 11.0, max_refine: int = 5,
+                 check_div: int = 4):
+        """
+        ZTable class
+
+        Args:
+            z_func (callable): exact equation z_func(p_bar, t_celsius) -> z
+            p_min (float): grid min pressure in absolute bar (default is SGERG validated range 0.0 to 120.0)
+            p_max (float): grid max pressure in absolute bar
+            t_min (float): grid min temperature in degrees Celsius (default is SGERG range -23.0 to 65.0)
+            t_max (float): grid max temperature in degrees Celsius
+            max_rel_error (float): max relative error of interpolated Z vs z_func (sampled)
+            p_step (float): initial pressure step of the grid (halved on each refinement)
+            t_step (float): initial temperature step of the grid (halved on each refinement)
+            max_refine (int): max number of grid refinements
+            check_div (int): number of divisions of each cell side where the error is sampled
+
+        Raises:
+            ValueError: If max_rel_error is not reached after max_refine refinements.
+        """
+        # public args
+        self.z_func = z_func
+        self.p_min = p_min
+        self.p_max = p_max
+        self.t_min = t_min
+        self.t_max = t_max
+        self.max_rel_error = max_rel_error
+        self.check_div = check_div
+        # stats
+        self.n_exact = 0
+        # build the table
+        for _ in range(max_refine + 1):
+            self._build(n_p=max(1, round((p_max - p_min) / p_step)), n_t=max(1, round((t_max - t_min) / t_step)))
+            if self.rel_error <= max_rel_error:
+                break
+            p_step /= 2
+            t_step /= 2
+        else:
+            raise ValueError(f'max relative error {max_rel_error:.1e} not reached (got {self.rel_error:.1e})')
+
+    def _build(self, n_p: int, n_t: int) -> None:
+        """Build an (n_p x n_t cells) table and sample its max relative error."""
+        self.n_p, self.n_t = n_p, n_t
+        self.p_step = (self.p_max - self.p_min) / n_p
+        self.t_step = (self.t_max - self.t_min) / n_t
+        p_nodes = np.linspace(self.p_min, self.p_max, n_p + 1).tolist()
+        t_nodes = np.linspace(self.t_min, self.t_max, n_t + 1).tolist()
+        # exact values at nodes and derivatives (scaled to a unit cell) by finite differences
+        f = np.array([[self.z_func(p, t) for t in t_nodes] for p in p_nodes], dtype=float)
+        edge_order = 2 if min(n_p, n_t) >= 2 else 1
+        f_p = np.gradient(f, axis=0, edge_order=edge_order)
+        f_t = np.gradient(f, axis=1, edge_order=edge_order)
+        f_pt = np.gradient(f_p, axis=1, edge_order=edge_order)
+        # per cell 4x4 coefficients of the bicubic polynomial
+        k = np.empty((n_p, n_t, 4, 4))
+        for di in (0, 1):
+            for dj in (0, 1):
+                k[:, :, di, dj] = f[di:n_p + di, dj:n_t + dj]
+                k[:, :, 2 + di, dj] = f_p[di:n_p + di, dj:n_t + dj]
+                k[:, :, di, 2 + dj] = f_t[di:n_p + di, dj:n_t + dj]
+                k[:, :, 2 + di, 2 + dj] = f_pt[di:n_p + di, dj:n_t + dj]
+        self.coefs = _M @ k @ _M.T
+        # nested lists are faster than numpy for scalar lookups
+        self._coefs = self.coefs.tolist()
+        # sample the error on a sub-grid of each cell (nodes are exact)
+        div = self.check_div
+        p_chk = np.linspace(self.p_min, self.p_max, div * n_p + 1).tolist()
+        t_chk = np.linspace(self.t_min, self.t_max, div * n_t + 1).tolist()
+        p_grid, t_grid = np.meshgrid(p_chk, t_chk, indexing='ij')
+        i_grid, j_grid = np.meshgrid(range(len(p_chk)), range(len(t_chk)), indexing='ij')
+        off_node = (i_grid % div != 0) | (j_grid % div != 0)
+        p_off, t_off = p_grid[off_node], t_grid[off_node]
+        z_exact = np.array([self.z_func(p, t) for p, t in zip(p_off.tolist(), t_off.tolist())], dtype=float)
+        self.rel_error = float(np.max(np.abs(self._interp_array(p_off, t_off) - z_exact) / np.abs(z_exact)))
+
+    def _interp(self, p_bar: float, t_celsius: float) -> float:
+        """Bicubic interpolation (p_bar and t_celsius must be in the grid)."""
+        u = (p_bar - self.p_min) / self.p_step
+        v = (t_celsius - self.t_min) / self.t_step
+        i = min(int(u), self.n_p - 1)
+        j = min(int(v), self.n_t - 1)
+        u -= i
+        v -= j
+        c = self._coefs[i][j]
+        # Horner scheme on u then on v
+        c0, c1, c2, c3 = c
+        return (((c3[3] * v + c3[2]) * v + c3[1]) * v + c3[0]) * u ** 3 + \
+               (((c2[3] * v + c2[2]) * v + c2[1]) * v + c2[0]) * u ** 2 + \
+               (((c1[3] * v + c1[2]) * v + c1[1]) * v + c1[0]) * u + \
+               (((c0[3] * v + c0[2]) * v + c0[1]) * v + c0[0])
+
+    def _interp_array(self, p_bar: np.ndarray, t_celsius: np.ndarray) -> np.ndarray:
+        """Bicubic interpolation of arrays of points (as _interp())."""
+        u = (p_bar - self.p_min) / self.p_step
+        v = (t_celsius - self.t_min) / self.t_step
+        i = np.clip(u.astype(int), 0, self.n_p - 1)
+        j = np.clip(v.astype(int), 0, self.n_t - 1)
+        u_pow = (u - i)[:, None] ** np.arange(4)
+        v_pow = (v - j)[:, None] ** np.arange(4)
+        return np.einsum('nk,nkl,nl->n', u_pow, self.coefs[i, j], v_pow)
+
+    def in_grid(self, p_bar: float, t_celsius: float) -> bool:
+        """Check if the point (p_bar, t_celsius) is covered by the table."""
+        return self.p_min <= p_bar <= self.p_max and self.t_min <= t_celsius <= self.t_max
+
+    def z(self, p_bar: float, t_celsius: float) -> float:
+        """Compression factor at p_bar (absolute bar) and t_celsius (°C), interpolated or exact outside the grid."""
+        if self.in_grid(p_bar, t_celsius):
+            return self._interp(p_bar, t_celsius)
+        self.n_exact += 1
+        return self.z_func(p_bar, t_celsius)
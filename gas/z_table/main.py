@@ -0,0 +1,34 @@
+""" Compute compression factor Z with an interpolation table built from SGERG and AGA8 DETAIL methods. """
+
+import sys
+import timeit
+
+# SGERG_88 and AGA8 packages are in sibling directories
+sys.path.extend(['../sgerg', '../aga8'])
+
+from AGA8 import AGA8Detail  # noqa: E402
+from SGERG_88 import SGERG  # noqa: E402
+from Z_TABLE import ZTable  # noqa: E402
+
+# SGERG table over the full validated envelope (P 0 to 120 bara, T -23 to 65 °C)
+sgerg = SGERG(hs=40.66, d=0.581, x_co2=0.006, x_h2=0.0)
+sgerg_table = ZTable(z_func=lambda p, t: sgerg.run(p_bar=p, t_celsius=t)[0], max_rel_error=5e-5)
+print(f'SGERG table: {sgerg_table.n_p}x{sgerg_table.n_t} cells, '
+      f'sampled max relative error = {sgerg_table.rel_error:.2e}')
+print(f'at 60 bara and -3.15 °C: z={sgerg_table.z(p_bar=60.0, t_celsius=-3.15):.5f} '
+      f'(exact z={sgerg.run(p_bar=60.0, t_celsius=-3.15)[0]:.5f})')
+
+# AGA8 table (DETAIL method can't evaluate p = 0.0, so start at 1 bara: lower pressures use the exact equation)
+x = [0.0, 0.9278, 0.0116, 0.0118, 0.0401, 0.0064] + [0.0] * 16
+aga8_table = ZTable(z_func=lambda p, t: AGA8Detail(p_bara=p, t_celsius=t, x=x).run().z, p_min=1.0)
+print(f'AGA8 table: {aga8_table.n_p}x{aga8_table.n_t} cells, sampled max relative error = {aga8_table.rel_error:.2e}')
+print(f'at 60 bara and -3.15 °C: z={aga8_table.z(p_bar=60.0, t_celsius=-3.15):.6f} '
+      f'(exact z={AGA8Detail(p_bara=60.0, t_celsius=-3.15, x=x).run().z:.6f})')
+
+# lookup speed
+for name, func in [('SGERG table', lambda: sgerg_table.z(p_bar=60.0, t_celsius=-3.15)),
+                   ('SGERG exact', lambda: sgerg.run(p_bar=60.0, t_celsius=-3.15)),
+                   ('AGA8 table', lambda: aga8_table.z(p_bar=60.0, t_celsius=-3.15)),
+                   ('AGA8 exact', lambda: AGA8Detail(p_bara=60.0, t_celsius=-3.15, x=x).run())]:
+    t_run = min(timeit.repeat(func, number=200, repeat=3)) / 200
+    print(f'{name:<12}: {t_run * 1e6:8.1f} µs')
@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from Z_TABLE import ZTable
+
+# SGERG_88 package is in a sibling directory
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'sgerg'))
+from SGERG_88 import SGERG  # noqa: E402
+
+
+def virial_z(p_bar: float, t_celsius: float) -> float:
+    # a smooth virial like function close to natural gas behaviour
+    t_kelvin = t_celsius + 273.15
+    b = -0.07 + 12.0 / t_kelvin - 4500.0 / t_kelvin ** 2
+    return 1.0 + b * p_bar / 10.0 + 1e-5 * p_bar ** 2
+
+
+def test_error_bound():
+    z_table = ZTable(z_func=virial_z, max_rel_error=1e-6)
+    assert z_table.rel_error <= 1e-6
+    for p_bar in (0.0, 0.7, 33.3, 60.0, 119.9, 120.0):
+        for t_celsius in (-23.0, -3.15, 16.85, 64.2, 65.0):
+            z_ref = virial_z(p_bar, t_celsius)
+            assert abs(z_table.z(p_bar, t_celsius) - z_ref) <= 1e-6 * z_ref
+    assert z_table.n_exact == 0
+
+
+def test_exact_fallback():
+    z_table = ZTable(z_func=virial_z, max_rel_error=1e-4)
+    assert z_table.z(p_bar=150.0, t_celsius=10.0) == virial_z(150.0, 10.0)
+    assert z_table.z(p_bar=60.0, t_celsius=-40.0) == virial_z(60.0, -40.0)
+    assert z_table.n_exact == 2
+
+
+def test_unreachable_bound():
+    with pytest.raises(ValueError):
+        ZTable(z_func=lambda p, t: round(virial_z(p, t), 3), max_rel_error=1e-6, max_refine=2)
+
+
+def test_sgerg_table():
+    sgerg = SGERG(hs=40.66, d=0.581, x_co2=0.006, x_h2=0.0)
+
+    def sgerg_z(p_bar: float, t_celsius: float) -> float:
+        return sgerg.run(p_bar=p_bar, t_celsius=t_celsius)[0]
+
+    z_table = ZTable(z_func=sgerg_z, max_rel_error=5e-5)
+    assert z_table.rel_error <= 5e-5
+    # random points over the whole envelope and close to p = 0
+    rng = np.random.default_rng(seed=42)
+    points = np.vstack([rng.uniform((0.0, -23.0), (120.0, 65.0), size=(1000, 2)),
+                        np.column_stack([rng.uniform(0.0, 0.5, 200), rng.uniform(-23.0, 65.0, 200)])])
+    for p_bar, t_celsius in points.tolist():
+        z_ref = sgerg_z(p_bar, t_celsius)
+        assert abs(z_table.z(p_bar, t_celsius) - z_ref) <= 5e-5 * z_ref
+    assert z_table.n_exact == 0
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+""" Measure scrape latency (Metric.as_text) with many label sets. """
+
+import random
+import time
+from pyPromLib.metrics import Metric, MetricType
+
+
+# some const
+NB_SERIES = 50_000
+NB_HISTO = 2_000
+NB_OBSERVE = 500_000
+
+
+# some functions
+def scrape_ms(*metrics: Metric) -> float:
+    """Return the best of 5 scrapes duration (in ms)."""
+    best_s = float('inf')
+    for _ in range(5):
+        t_start = time.perf_counter()
+        for metric in metrics:
+            metric.as_text()
+        best_s = min(best_s, time.perf_counter() - t_start)
+    return best_s * 1000
+
+
+if __name__ == '__main__':
+    gauge = Metric('bench_gauge', MetricType.GAUGE, comment='a gauge metric')
+    histo = Metric('bench_histo', MetricType.HISTOGRAM, comment='an histo metric')
+    for i in range(NB_SERIES):
+        gauge.set(i * 0.5, labels_d={'host': f'h{i % 100}', 'id': str(i)}, ttl=3600)
+    for i in range(NB_HISTO):
+        histo.set({'0.05': 1, '0.1': 2, '0.5': 3, '1': 4, 'sum': 2.0, 'count': 5}, labels_d={'id': str(i)})
+    # first scrape: every series is formatted
+    t_start = time.perf_counter()
+    gauge.as_text()
+    histo.as_text()
+    print(f'first scrape ({NB_SERIES} + {NB_HISTO} series): {(time.perf_counter() - t_start) * 1000:8.1f} ms')
+    # no change since last scrape
+    print(f'unchanged scrape: {scrape_ms(gauge, histo):8.1f} ms')
+    # 1% of series updated before each scrape
+    best_ms = float('inf')
+    for _ in range(5):
+        for i in range(0, NB_SERIES, 100):
+            gauge.set(1.0, labels_d={'host': f'h{i % 100}', 'id': str(i)}, ttl=3600)
+        t_start = time.perf_counter()
+        gauge.as_text()
+        histo.as_text()
+        best_ms = min(best_ms, (time.perf_counter() - t_start) * 1000)
+    print(f'1% updated scrape: {best_ms:8.1f} ms')
+    # native accumulators: observe() cost and scrape (merge of per-thread shards)
+    for _type in (MetricType.HISTOGRAM, MetricType.SUMMARY):
+        metric = Metric(f'bench_native_{_type.value}', _type)
+        children = [metric.labels(id=str(i)) for i in range(100)]
+        t_start = time.perf_counter()
+        for i in range(NB_OBSERVE):
+            children[i % 100].observe(random.random())
+        observe_us = (time.perf_counter() - t_start) / NB_OBSERVE * 1e6
+        print(f'{_type.value} observe(): {observe_us:8.2f} us, scrape of 100 series: {scrape_ms(metric):8.1f} ms')
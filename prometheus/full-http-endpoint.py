@@ -15,12 +15,19 @@ my_metric_ratio = Metric('my_metric_ratio', MetricType.GAUGE, comment='a gauge m
 my_metric_total = Metric('my_metric_total', MetricType.COUNTER, comment='a counter metric')
 my_metric_histo = Metric('my_metric_histo', MetricType.HISTOGRAM, comment='an histo metric')
 my_metric_sumy = Metric('my_metric_sumy', MetricType.SUMMARY, comment='a summary metric')
+# histogram and summary accumulated by the library (see observe())
+my_metric_latency = Metric('my_metric_latency_seconds', MetricType.HISTOGRAM, comment='a native histo metric',
+                           buckets=(0.1, 0.25, 0.5, 0.75, 1.0))
+my_metric_duration = Metric('my_metric_duration_seconds', MetricType.SUMMARY, comment='a native summary metric',
+                            quantiles={0.5: 0.05, 0.9: 0.01, 0.99: 0.001})
 
 # share this metrics with http server
 metrics_srv.add(my_metric_ratio)
 metrics_srv.add(my_metric_total)
 metrics_srv.add(my_metric_histo)
 metrics_srv.add(my_metric_sumy)
+metrics_srv.add(my_metric_latency)
+metrics_srv.add(my_metric_duration)
 
 # main loop
 loop_count = 0
@@ -33,4 +40,7 @@ while True:
                          'sum': 53423, 'count': 144320})
     my_metric_sumy.set({'0.01': 3102, '0.05': 3272, '0.5': 4773, '0.9': 9001, '0.99': 76656,
                         'sum': 1.7560473e+07, 'count': 2693})
+    for _ in range(100):
+        my_metric_latency.observe(random(), labels_d={'foo': 'rand'})
+        my_metric_duration.observe(random(), labels_d={'foo': 'rand'})
     time.sleep(1.0)
@@ -0,0 +1,241 @@
+"""This module implement pyPromLib native accumulators for histogram and summary metrics.
+
+Observations are recorded in per-thread shards (each thread only writes its own shard, so observe() does not
+take a lock) that are merged at scrape time.
+"""
+
+from array import array
+from bisect import bisect_left
+import math
+from threading import Lock, get_ident
+from typing import Dict, Optional
+
+# default targeted quantiles of summaries {quantile: allowed rank error}
+DEFAULT_QUANTILES = {0.5: 0.05, 0.9: 0.01, 0.99: 0.001}
+
+
+class _HistogramShard:
+    """Buckets counts of a thread."""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, size: int):
+        self.counts = array('Q', bytes(8 * size))
+        self.sum = 0.0
+        self.count = 0
+
+
+class HistogramValue:
+    """Buckets counts, sum and count of an histogram series fed by observe()."""
+
+    def __init__(self, bounds: tuple):
+        self.bounds = tuple(bounds)
+        # private
+        self._shards: Dict[int, _HistogramShard] = dict()
+        self._th_lock = Lock()
+
+    def _new_shard(self) -> _HistogramShard:
+        # last bucket is for values above the last bound (+Inf bucket only)
+        shard = _HistogramShard(len(self.bounds) + 1)
+        with self._th_lock:
+            self._shards[get_ident()] = shard
+        return shard
+
+    def observe(self, value: float):
+        """Add an observation (to the shard of the current thread)."""
+        shard = self._shards.get(get_ident())
+        if shard is None:
+            shard = self._new_shard()
+        shard.counts[bisect_left(self.bounds, value)] += 1
+        shard.sum += value
+        shard.count += 1
+
+    def as_dict(self) -> dict:
+        """Merge shards as a Metric.set() value dict (cumulative buckets, sum and count)."""
+        counts = [0] * (len(self.bounds) + 1)
+        total_sum = 0.0
+        total_count = 0
+        with self._th_lock:
+            shards = list(self._shards.values())
+        for shard in shards:
+            for idx, count in enumerate(shard.counts):
+                counts[idx] += count
+            total_sum += shard.sum
+            total_count += shard.count
+        histo_d = dict()
+        cumul = 0
+        for bound, count in zip(self.bounds, counts):
+            cumul += count
+            histo_d[str(bound)] = cumul
+        histo_d['sum'] = total_sum
+        histo_d['count'] = total_count
+        return histo_d
+
+
+class CKMSStream:
+    """Targeted quantiles stream (Cormode, Korn, Muthukrishnan, Srivastava 2005).
+
+    Memory is bounded by the error targets (not by the number of observations). Unlike the perks Go package, the
+    min and max samples are never merged and a gap between samples must be allowed on all the ranks it covers,
+    so the rank error of query(q) stays within the target of q on sorted or trending streams too.
+    """
+
+    def __init__(self, quantiles: Optional[dict] = None):
+        self.quantiles = dict(quantiles or DEFAULT_QUANTILES)
+        self.n = 0
+        # samples as [value, width, delta] lists, sorted by value
+        self.samples = list()
+
+    def copy(self) -> 'CKMSStream':
+        """Return an independent copy of the stream."""
+        stream = CKMSStream(self.quantiles)
+        stream.n = self.n
+        stream.samples = [list(sample) for sample in self.samples]
+        return stream
+
+    def _allowed_error(self, rank: float) -> float:
+        """Invariant function: max error allowed at this rank."""
+        err_min = math.inf
+        n = self.n
+        for q, eps in self.quantiles.items():
+            if q * n <= rank:
+                err = 2 * eps * rank / q
+            else:
+                err = 2 * eps * (n - rank) / (1 - q)
+            if err < err_min:
+                err_min = err
+        return err_min
+
+    def _allowed_gap(self, rank_lo: float, rank_hi: float) -> float:
+        """Max error allowed on all the ranks [rank_lo, rank_hi] (minimum of the invariant function on them)."""
+        err_min = math.inf
+        n = self.n
+        for q, eps in self.quantiles.items():
+            # the error allowed by a target decrease down to its rank q * n, then increase
+            if rank_hi <= q * n:
+                err = 2 * eps * (n - rank_hi) / (1 - q)
+            elif rank_lo >= q * n:
+                err = 2 * eps * rank_lo / q
+            else:
+                err = 2 * eps * n
+            if err < err_min:
+                err_min = err
+        return err_min
+
+    def insert(self, values: list):
+        """Merge a batch of values."""
+        merged = list()
+        samples = self.samples
+        idx = 0
+        rank = 0.0
+        for value in sorted(values):
+            while idx < len(samples) and samples[idx][0] <= value:
+                rank += samples[idx][1]
+                merged.append(samples[idx])
+                idx += 1
+            # rank of a new min or max is exact, others get the error allowed on the ranks they may cover
+            if idx == 0 or idx == len(samples):
+                delta = 0
+            else:
+                delta = max(0, math.floor(self._allowed_gap(rank, rank + self._allowed_error(rank))) - 1)
+            merged.append([value, 1, delta])
+            self.n += 1
+            rank += 1
+        merged.extend(samples[idx:])
+        self.samples = merged
+        self._compress()
+
+    def _compress(self):
+        samples = self.samples
+        if len(samples) < 3:
+            return
+        # min and max samples are never merged (they keep the exact rank of new min and max values)
+        x = samples[-1]
+        # rank: number of observations below c (c and x are merged if the gap is allowed on all its ranks)
+        rank = self.n - x[1]
+        kept = [x]
+        for c in reversed(samples[1:-1]):
+            rank -= c[1]
+            if c[1] + x[1] + x[2] <= self._allowed_gap(rank, rank + c[1] + x[1] + x[2]):
+                x[1] += c[1]
+            else:
+                x = c
+                kept.append(x)
+        kept.append(samples[0])
+        kept.reverse()
+        self.samples = kept
+
+    def query(self, q: float) -> float:
+        """Return the estimated value at quantile q (NaN if empty).
+
+        The returned sample is the one whose rank bounds [rmin, rmin + delta] are the closest to q * n.
+        """
+        samples = self.samples
+        if not samples:
+            return math.nan
+        target = q * self.n
+        best = samples[0][0]
+        best_err = math.inf
+        rank = 0
+        for value, width, delta in samples:
+            rank += width
+            # rank bounds of later samples are all beyond this one
+            if rank - target >= best_err:
+                break
+            err = max(target - rank, rank + delta - target)
+            if err < best_err:
+                best, best_err = value, err
+        return best
+
+
+class SummaryValue:
+    """Quantiles (CKMS stream), sum and count of a summary series fed by observe().
+
+    A shard buffer is only swapped by its owner thread (observe() appends to it without lock), a scrape queries a
+    copy of the stream merged with a snapshot of the pending buffers.
+    """
+
+    def __init__(self, quantiles: Optional[dict] = None, buffer_size: int = 500):
+        self.buffer_size = buffer_size
+        # private
+        self._stream = CKMSStream(quantiles)
+        self._shards: Dict[int, list] = dict()
+        self._th_lock = Lock()
+
+    def _new_shard(self) -> list:
+        # shard: [values buffer, sum, count]
+        shard = [list(), 0.0, 0]
+        with self._th_lock:
+            self._shards[get_ident()] = shard
+        return shard
+
+    def _flush(self, shard: list):
+        """Move the shard buffer of the current thread to the CKMS stream."""
+        with self._th_lock:
+            buffer, shard[0] = shard[0], list()
+            self._stream.insert(buffer)
+
+    def observe(self, value: float):
+        """Add an observation (buffered in the shard of the current thread)."""
+        shard = self._shards.get(get_ident())
+        if shard is None:
+            shard = self._new_shard()
+        shard[0].append(value)
+        shard[1] += value
+        shard[2] += 1
+        if len(shard[0]) >= self.buffer_size:
+            self._flush(shard)
+
+    def as_dict(self) -> dict:
+        """Merge shards as a Metric.set() value dict (quantiles, sum and count)."""
+        # under the lock, a value is either in the stream or in a buffer (a flush swaps and inserts at once)
+        with self._th_lock:
+            shards = list(self._shards.values())
+            pending = [value for shard in shards for value in list(shard[0])]
+            stream = self._stream.copy()
+        if pending:
+            stream.insert(pending)
+        sum_d = {str(q): stream.query(q) for q in sorted(stream.quantiles)}
+        sum_d['sum'] = sum(shard[1] for shard in shards)
+        sum_d['count'] = sum(shard[2] for shard in shards)
+        return sum_d
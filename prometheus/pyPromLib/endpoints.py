@@ -1,12 +1,46 @@
 """This module implement pyPromLib endpoints class."""
 
+import gzip
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from ipaddress import ip_address
 import socket
 from threading import Thread, Lock
-from typing import Any
+import time
+from typing import Any, Dict, Optional
 from .metrics import Metric
 
+# content types of scrape responses
+CT_TEXT = 'text/plain; version=0.0.4; charset=utf-8'
+CT_OPENMETRICS = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+def accepts(header: str, token: str) -> bool:
+    """Check if an Accept or Accept-Encoding header value allows token (a q=0 parameter refuses it)."""
+    for item in header.split(','):
+        fields = [field.strip() for field in item.split(';')]
+        if fields[0].lower() != token:
+            continue
+        for param in fields[1:]:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+class _Body:
+    """A rendered scrape body, its gzip version is build on first request."""
+
+    __slots__ = ('t_render', 'raw', 'gz')
+
+    def __init__(self, raw: bytes):
+        self.t_render = time.monotonic()
+        self.raw = raw
+        self.gz: Optional[bytes] = None
+
 
 class MetricsHttpSrv:
     """A multi-threaded HTTP server for shares metrics with Prometheus."""
@@ -28,12 +62,20 @@ class MetricsHttpSrv:
             try:
                 # for prometheus scrap endpoint
                 if self.path == '/metrics':
+                    # content negotiation
+                    openmetrics = accepts(self.headers.get('Accept', ''), 'application/openmetrics-text')
+                    use_gzip = accepts(self.headers.get('Accept-Encoding', ''), 'gzip')
+                    body = self.server.metrics_srv.body(openmetrics=openmetrics, use_gzip=use_gzip)
                     # headers
                     self.send_response(200)
-                    self.send_header('Content-type', 'text/plain; charset=utf-8')
+                    self.send_header('Content-type', CT_OPENMETRICS if openmetrics else CT_TEXT)
+                    if use_gzip:
+                        self.send_header('Content-Encoding', 'gzip')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.send_header('Vary', 'Accept, Accept-Encoding')
                     self.end_headers()
                     # body
-                    self.wfile.write(self.server.metrics_srv.as_text().encode('utf-8'))
+                    self.wfile.write(body)
                 # on other path, nothing for you here
                 else:
                     # return HTTP 404 page not found
@@ -47,13 +89,25 @@ class MetricsHttpSrv:
         """Check if server currently processing requests."""
         return self._http_srv_run
 
-    def __init__(self, port: int = 8080, bind: str = 'localhost'):
+    def __init__(self, port: int = 8080, bind: str = 'localhost', cache_s: float = 1.0, gzip_level: int = 6):
+        """Constructor.
+
+        :param port: HTTP port
+        :param bind: bind address
+        :param cache_s: max age of a rendered body shared between scrapers (0 to render at every request)
+        :param gzip_level: compression level of gzip responses
+        """
         # public
         self.port = port
         self.bind = bind
+        self.cache_s = cache_s
+        self.gzip_level = gzip_level
         # private
         self._th_lock = Lock()
         self._metrics_l = list()
+        # rendered bodies by format (openmetrics flag), the render lock let concurrent scrapers share a render
+        self._render_lock = Lock()
+        self._bodies_d: Dict[bool, _Body] = dict()
         self._http_srv = None
         self._http_srv_th = None
         self._http_srv_run = False
@@ -68,13 +122,32 @@ class MetricsHttpSrv:
         with self._th_lock:
             self._metrics_l.remove(metric)
 
+    def _snapshot(self) -> list:
+        """Return a copy of the share list (metrics are formatted without holding the registry lock)."""
+        with self._th_lock:
+            return list(self._metrics_l)
+
     def as_text(self) -> str:
         """Export metrics as Prometheus scrap file."""
-        txt = ''
-        with self._th_lock:
-            for metric in self._metrics_l:
-                txt += metric.as_text()
-        return txt
+        return ''.join([metric.as_text() for metric in self._snapshot()])
+
+    def as_openmetrics(self) -> str:
+        """Export metrics as OpenMetrics text."""
+        return ''.join([metric.as_openmetrics() for metric in self._snapshot()]) + '# EOF\n'
+
+    def body(self, openmetrics: bool = False, use_gzip: bool = False) -> bytes:
+        """Return the scrape response body (a body rendered less than cache_s ago is reused)."""
+        with self._render_lock:
+            body = self._bodies_d.get(openmetrics)
+            if body is None or time.monotonic() - body.t_render >= self.cache_s:
+                txt = self.as_openmetrics() if openmetrics else self.as_text()
+                body = _Body(txt.encode('utf-8'))
+                self._bodies_d[openmetrics] = body
+            if not use_gzip:
+                return body.raw
+            if body.gz is None:
+                body.gz = gzip.compress(body.raw, compresslevel=self.gzip_level, mtime=0)
+            return body.gz
 
     def start(self):
         """Start HTTP server as a thread."""
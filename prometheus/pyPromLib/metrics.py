@@ -1,14 +1,19 @@
 """This module implement pyPromLib metrics class."""
 
+import heapq
 import logging
 import re
 import time
 from enum import Enum
 from threading import Lock
 from typing import Any, Optional
+from .accumulators import DEFAULT_QUANTILES, HistogramValue, SummaryValue
 
 logger = logging.getLogger(__name__)
 
+# default histogram buckets (upper bounds) of Metric.observe()
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
 
 class MetricType(Enum):
     """Definition of metric types."""
@@ -19,10 +24,40 @@ class MetricType(Enum):
     UNTYPED = 'untyped'
 
 
+class MetricChild:
+    """A series of a metric with labels validated once (see Metric.labels())."""
+
+    __slots__ = ('_metric', '_labels_str')
+
+    def __init__(self, metric: 'Metric', labels_str: str):
+        self._metric = metric
+        self._labels_str = labels_str
+
+    def set(self, value: Any, ts: Optional[float] = None, ttl: Optional[float] = None):
+        """Set the value of this series (remove it if value is None)."""
+        self._metric._check_value(value)
+        self._metric._set_series(self._labels_str, value, ts, ttl)
+
+    def inc(self, amount: float = 1):
+        """Increase the value of this series (counter and gauge)."""
+        self._metric._inc_series(self._labels_str, amount)
+
+    def dec(self, amount: float = 1):
+        """Decrease the value of this series (gauge only)."""
+        if self._metric.type is not MetricType.GAUGE:
+            raise ValueError('dec() is only available for gauge metric.')
+        self._metric._inc_series(self._labels_str, -amount)
+
+    def observe(self, value: float):
+        """Add an observation to this series (histogram and summary)."""
+        self._metric._observe_series(self._labels_str, value)
+
+
 class Metric:
     """A Prometheus Metric."""
 
-    def __init__(self, name: str, _type: MetricType = MetricType.UNTYPED, comment: str = ''):
+    def __init__(self, name: str, _type: MetricType = MetricType.UNTYPED, comment: str = '',
+                 buckets: tuple = DEFAULT_BUCKETS, quantiles: Optional[dict] = None):
         # arg metric name: name
         if re.fullmatch(r'[a-zA-Z_:][a-zA-Z\d_:]*', name):
             self._name = name
@@ -38,6 +73,26 @@ class Metric:
         # private vars
         self._th_lock = Lock()
         self._values_d = dict()
+        # render cache: formatted lines of each series, header lines and full text (None when outdated)
+        self._lines_d = dict()
+        self._header = ('', '', '')
+        self._txt = None
+        # expiry heap of (expire_at, labels_str) items, outdated items are skipped at pop (the deadline of a series
+        # is the one of its value) and dropped when the heap is rebuilt (see _set_series())
+        self._expire_heap = list()
+        # histogram buckets and summary targeted quantiles {quantile: allowed error} of observe()
+        self._buckets = tuple(sorted(float(bound) for bound in buckets))
+        self._quantiles = dict(quantiles or DEFAULT_QUANTILES)
+        for q, eps in self._quantiles.items():
+            if not (0 < q < 1 and 0 < eps < 1):
+                raise ValueError(f'bad summary quantile {q} (error {eps})')
+        # series fed by observe() (native accumulators are merged and formatted at every scrape)
+        self._native_cls = {MetricType.HISTOGRAM: HistogramValue, MetricType.SUMMARY: SummaryValue}.get(_type)
+        # labels() children by labels items
+        self._children_d = dict()
+        # types flags (avoid Enum lookups on hot paths)
+        self._is_counter = _type is MetricType.COUNTER
+        self._is_incrementable = _type is MetricType.COUNTER or _type is MetricType.GAUGE
 
     @property
     def name(self) -> str:
@@ -49,15 +104,8 @@ class Metric:
         """Type of metric (read-only property)."""
         return self._type
 
-    def set(self, value: Any, labels_d: Optional[dict] = None, ts: Optional[float] = None, ttl: Optional[float] = None):
-        """Set a value for the metric with labels set in a dict.
-        timestamp
-        We can remove it if value it set to None.
-        """
-        # labels arg
-        if labels_d is None:
-            labels_d = dict()
-        # if value is set, check its type
+    def _check_value(self, value: Any):
+        """Check value type for this type of metric (None is always allowed)."""
         if value is not None:
             if self._type is MetricType.GAUGE:
                 if type(value) not in [bool, int, float]:
@@ -68,53 +116,228 @@ class Metric:
             elif self._type is MetricType.HISTOGRAM or self._type is MetricType.SUMMARY:
                 if type(value) is not dict:
                     raise ValueError('value arg must be a dict for this type of metric.')
+
+    def set(self, value: Any, labels_d: Optional[dict] = None, ts: Optional[float] = None, ttl: Optional[float] = None):
+        """Set a value for the metric with labels set in a dict.
+        timestamp
+        We can remove it if value it set to None.
+        """
+        # labels arg
+        if labels_d is None:
+            labels_d = dict()
+        # if value is set, check its type
+        self._check_value(value)
         # build dict key labels_str
         # "label_name1=label_value1,label_name2=label_value2,[...]"
         labels_str = self._labels_d2str(labels_d)
         # add/update or remove the value in the values dict
+        self._set_series(labels_str, value, ts, ttl)
+
+    def labels(self, **labels) -> MetricChild:
+        """Return the series of these labels as a child handle (labels are validated and escaped only once).
+
+        For hot paths, keep the child and call its set(), inc(), dec() or observe() methods.
+        """
+        key = tuple(labels.items())
+        try:
+            return self._children_d[key]
+        except KeyError:
+            child = MetricChild(self, self._labels_d2str(labels))
+            with self._th_lock:
+                return self._children_d.setdefault(key, child)
+
+    def inc(self, amount: float = 1, labels_d: Optional[dict] = None):
+        """Increase value of a counter or gauge series."""
+        self._inc_series(self._labels_d2str(labels_d or {}), amount)
+
+    def observe(self, value: float, labels_d: Optional[dict] = None):
+        """Add an observation to an histogram or summary series."""
+        self._observe_series(self._labels_d2str(labels_d or {}), value)
+
+    def _set_series(self, labels_str: str, value: Any, ts: Optional[float], ttl: Optional[float]):
         with self._th_lock:
+            # invalidate cached text of this series
+            self._lines_d.pop(labels_str, None)
+            self._txt = None
             if value is None:
                 self._values_d.pop(labels_str, None)
             else:
                 expire_at = (time.monotonic() + ttl) if ttl else None
                 self._values_d[labels_str] = (value, ts, expire_at)
+                if expire_at:
+                    heapq.heappush(self._expire_heap, (expire_at, labels_str))
+                    # series updated before their ttl leave outdated items: rebuild from live deadlines
+                    if len(self._expire_heap) > 2 * len(self._values_d):
+                        self._rebuild_expire_heap()
+
+    def _inc_series(self, labels_str: str, amount: float):
+        if not self._is_incrementable:
+            raise ValueError('inc() is only available for counter and gauge metrics.')
+        if amount < 0 and self._is_counter:
+            raise ValueError('counter can only be increased.')
+        with self._th_lock:
+            item = self._values_d.get(labels_str)
+            # keep ttl and timestamp as is
+            if item:
+                self._values_d[labels_str] = (item[0] + amount, item[1], item[2])
+            else:
+                self._values_d[labels_str] = (amount, None, None)
+            self._lines_d.pop(labels_str, None)
+            self._txt = None
+
+    def _new_native_series(self, labels_str: str) -> Any:
+        """Return the accumulator of a series, create it if needed (or if series was set with a dict)."""
+        if self._native_cls is None:
+            raise ValueError('observe() is only available for histogram and summary metrics.')
+        with self._th_lock:
+            item = self._values_d.get(labels_str)
+            if item is None or type(item[0]) is not self._native_cls:
+                if self._native_cls is HistogramValue:
+                    acc = HistogramValue(self._buckets)
+                else:
+                    acc = SummaryValue(self._quantiles)
+                item = (acc, None, None)
+                self._values_d[labels_str] = item
+                self._lines_d.pop(labels_str, None)
+                self._txt = None
+            return item[0]
+
+    def _observe_series(self, labels_str: str, value: float):
+        # lock-free path: the accumulator records value in a shard of the current thread
+        item = self._values_d.get(labels_str)
+        if item is not None and type(item[0]) is self._native_cls:
+            item[0].observe(value)
+        else:
+            self._new_native_series(labels_str).observe(value)
+
+    def _rebuild_expire_heap(self):
+        """Rebuild the expiry heap with the current deadline of each series (call with lock held)."""
+        self._expire_heap = [(expire_at, labels_str) for labels_str, (_value, _ts, expire_at) in self._values_d.items()
+                             if expire_at]
+        heapq.heapify(self._expire_heap)
+
+    def _purge_expired(self):
+        """Remove values that reach their ttl (call with lock held)."""
+        now = time.monotonic()
+        heap = self._expire_heap
+        while heap and heap[0][0] < now:
+            expire_at, labels_str = heapq.heappop(heap)
+            # skip item if the value was updated since (new expire_at or no more ttl)
+            item = self._values_d.get(labels_str)
+            if item and item[2] == expire_at:
+                del self._values_d[labels_str]
+                self._lines_d.pop(labels_str, None)
+                self._txt = None
+
+    def _header_txt(self, openmetrics: bool = False) -> str:
+        """Return the HELP and TYPE lines (escaped comment is cached until comment change)."""
+        comment, header, om_header = self._header
+        if comment != self.comment or not header:
+            header = ''
+            om_header = ''
+            # OpenMetrics: counter family name is without the _total suffix, untyped is unknown
+            om_name = self.name
+            if self._is_counter and om_name.endswith('_total'):
+                om_name = om_name[:-len('_total')]
+            # add a comment line if defined
+            if self.comment:
+                # apply escapes to comment
+                esc_comment = str(self.comment)
+                for rep_args in [('\\', '\\\\'), ('\n', '\\n')]:
+                    esc_comment = esc_comment.replace(*rep_args)
+                header += f'# HELP {self.name} {esc_comment}\n'
+                # OpenMetrics also escapes double quotes
+                om_comment = esc_comment.replace('"', '\\"')
+                om_header += f'# HELP {om_name} {om_comment}\n'
+            # add a type line if defined
+            if self.type is not MetricType.UNTYPED:
+                header += f'# TYPE {self.name} {self.type.value}\n'
+                om_header += f'# TYPE {om_name} {self.type.value}\n'
+            else:
+                om_header += f'# TYPE {om_name} unknown\n'
+            self._header = (self.comment, header, om_header)
+        return om_header if openmetrics else header
+
+    def _series_txt(self, lbl_id_str: str, value: Any, ts: Optional[float], ts_in_s: bool = False) -> str:
+        """Format all lines of a series (timestamp in ms or in s for OpenMetrics)."""
+        if self._type is MetricType.HISTOGRAM:
+            if type(value) is HistogramValue:
+                value = value.as_dict()
+            return self._data2txt_histogram(lbl_id_str, value)
+        elif self._type is MetricType.SUMMARY:
+            if type(value) is SummaryValue:
+                value = value.as_dict()
+            return self._data2txt_summary(lbl_id_str, value)
+        else:
+            return self._data2txt_default(lbl_id_str, value, ts, ts_in_s)
 
     def as_text(self) -> str:
-        """Format the metric as Prometheus exposition format text."""
-        txt = ''
+        """Format the metric as Prometheus exposition format text.
+
+        Lines of each series are cached until their next set(), so a scrape only formats the updated series.
+        Series fed by observe() are merged and formatted at every scrape.
+        """
         with self._th_lock:
             # purge expired value (reach ttl_s) from values dict
-            purge_l = []
-            for key, (_value, _timestamp_ms, expire_at) in self._values_d.items():
-                if expire_at and time.monotonic() > expire_at:
-                    purge_l.append(key)
-            for rm_key in purge_l:
-                self._values_d.pop(rm_key)
+            self._purge_expired()
+            # comment change also outdate full text
+            if self._txt is not None and self._header[0] == self.comment:
+                return self._txt
             # if any value exists, format an exposition message
-            if self._values_d:
-                # add a comment line if defined
-                if self.comment:
-                    # apply escapes to comment
-                    esc_comment = str(self.comment)
-                    for rep_args in [('\\', '\\\\'), ('\n', '\\n')]:
-                        esc_comment = esc_comment.replace(*rep_args)
-                    txt += f'# HELP {self.name} {esc_comment}\n'
-                # add a type line if defined
-                if self.type is not MetricType.UNTYPED:
-                    txt += f'# TYPE {self.name} {self.type.value}\n'
-                # add every "name{labels} value [timestamp]" for the metric
-                for lbl_id_str, (value, ts, _expire_at) in self._values_d.items():
-                    if self._type is MetricType.HISTOGRAM:
-                        txt += self._data2txt_histogram(lbl_id_str, value)
-                    elif self._type is MetricType.SUMMARY:
-                        txt += self._data2txt_summary(lbl_id_str, value)
-                    else:
-                        txt += self._data2txt_default(lbl_id_str, value, ts)
+            if not self._values_d:
+                self._txt = ''
+                return self._txt
+            lines_d = self._lines_d
+            native_cls = self._native_cls
+            has_native = False
+            txt_l = [self._header_txt()]
+            # add every "name{labels} value [timestamp]" for the metric
+            for lbl_id_str, (value, ts, _expire_at) in self._values_d.items():
+                if type(value) is native_cls:
+                    has_native = True
+                    txt_l.append(self._series_txt(lbl_id_str, value, ts))
+                    continue
+                try:
+                    series_txt = lines_d[lbl_id_str]
+                except KeyError:
+                    series_txt = self._series_txt(lbl_id_str, value, ts)
+                    lines_d[lbl_id_str] = series_txt
+                txt_l.append(series_txt)
+            txt = ''.join(txt_l)
+            # full text of native series is outdated by any observe()
+            self._txt = None if has_native else txt
+            return txt
+
+    def as_openmetrics(self) -> str:
+        """Format the metric as OpenMetrics text (without the final "# EOF" line).
+
+        Share the lines cache of as_text(), only series with timestamp are formatted again.
+        """
+        with self._th_lock:
+            self._purge_expired()
+            if not self._values_d:
+                return ''
+            lines_d = self._lines_d
+            native_cls = self._native_cls
+            txt_l = [self._header_txt(openmetrics=True)]
+            for lbl_id_str, (value, ts, _expire_at) in self._values_d.items():
+                if ts or type(value) is native_cls:
+                    txt_l.append(self._series_txt(lbl_id_str, value, ts, ts_in_s=True))
+                    continue
+                try:
+                    series_txt = lines_d[lbl_id_str]
+                except KeyError:
+                    series_txt = self._series_txt(lbl_id_str, value, ts)
+                    lines_d[lbl_id_str] = series_txt
+                txt_l.append(series_txt)
+        txt = ''.join(txt_l)
+        # OpenMetrics: counter samples must have the _total suffix
+        if self._is_counter and not self.name.endswith('_total'):
+            txt = re.sub(rf'^{self.name}(?=[{{ ])', f'{self.name}_total', txt, flags=re.MULTILINE)
         return txt
 
     def _data2txt_histogram(self, lbl_id_str: str, histo_d: dict) -> str:
         try:
-            txt = ''
             # search for required keys in dict value
             b_count = histo_d['count']
             b_sum = histo_d['sum']
@@ -128,18 +351,19 @@ class Metric:
                     buckets_l.append((k, v))
                 except ValueError:
                     pass
-            # set alpha order, with le="+Inf" at end
-            buckets_l = sorted(buckets_l)
+            # set numeric order, with le="+Inf" at end
+            buckets_l = sorted(buckets_l, key=lambda item: float(item[0]))
             buckets_l.append(('+Inf', b_count))
             # add buckets lines
+            txt_l = []
             for b_item, b_value in buckets_l:
                 lbl_id_str_bck = self._labels_d2str({'le': b_item}, _from=lbl_id_str)
-                txt += f'{self.name}_bucket{self._lbl_f(lbl_id_str_bck)} {b_value}\n'
+                txt_l.append(f'{self.name}_bucket{self._lbl_f(lbl_id_str_bck)} {b_value}\n')
             # add sum line
-            txt += f'{self.name}_sum{self._lbl_f(lbl_id_str)} {b_sum}\n'
+            txt_l.append(f'{self.name}_sum{self._lbl_f(lbl_id_str)} {b_sum}\n')
             # add count line
-            txt += f'{self.name}_count{self._lbl_f(lbl_id_str)} {b_count}\n'
-            return txt
+            txt_l.append(f'{self.name}_count{self._lbl_f(lbl_id_str)} {b_count}\n')
+            return ''.join(txt_l)
         except (IndexError, KeyError) as e:
             if e.__traceback__:
                 logger.warning(f'except occur: {e!r} at line {e.__traceback__.tb_lineno}')
@@ -147,7 +371,6 @@ class Metric:
 
     def _data2txt_summary(self, lbl_id_str: str, sum_d: dict) -> str:
         try:
-            txt = ''
             # search for required keys in dict value
             b_count = sum_d['count']
             b_sum = sum_d['sum']
@@ -161,30 +384,34 @@ class Metric:
                     buckets_l.append((k, v))
                 except ValueError:
                     pass
-            # set alpha order
-            buckets_l = sorted(buckets_l)
+            # set numeric order
+            buckets_l = sorted(buckets_l, key=lambda item: float(item[0]))
             # add buckets lines
+            txt_l = []
             for b_item, b_value in buckets_l:
                 lbl_str_bck = self._labels_d2str({'quantile': b_item}, _from=lbl_id_str)
-                txt += f'{self.name}{self._lbl_f(lbl_str_bck)} {b_value}\n'
+                txt_l.append(f'{self.name}{self._lbl_f(lbl_str_bck)} {b_value}\n')
             # add sum line
-            txt += f'{self.name}_sum{self._lbl_f(lbl_id_str)} {b_sum}\n'
+            txt_l.append(f'{self.name}_sum{self._lbl_f(lbl_id_str)} {b_sum}\n')
             # add count line
-            txt += f'{self.name}_count{self._lbl_f(lbl_id_str)} {b_count}\n'
-            return txt
+            txt_l.append(f'{self.name}_count{self._lbl_f(lbl_id_str)} {b_count}\n')
+            return ''.join(txt_l)
         except (IndexError, KeyError) as e:
             if e.__traceback__:
                 logger.warning(f'except occur: {e!r} at line {e.__traceback__.tb_lineno}')
             return ''
 
-    def _data2txt_default(self, lbl_id_str: str, value: Any, ts: int) -> str:
+    def _data2txt_default(self, lbl_id_str: str, value: Any, ts: Optional[float], ts_in_s: bool = False) -> str:
         # prometheus metrics file accept 0/1 not False/True
         if type(value) is bool:
             value = int(value)
         # init value line
         txt = f'{self.name}{self._lbl_f(lbl_id_str)} {value}'
         # optional timestamp at end of line
-        txt += f' {round(ts * 1000)}\n' if ts else '\n'
+        if ts:
+            txt += f' {ts}\n' if ts_in_s else f' {round(ts * 1000)}\n'
+        else:
+            txt += '\n'
         return txt
 
     @staticmethod
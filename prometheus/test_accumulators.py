@@ -0,0 +1,62 @@
+import random
+import threading
+
+import pytest
+
+from pyPromLib.accumulators import DEFAULT_QUANTILES, CKMSStream, SummaryValue
+
+N_VALUES = 50_000
+
+
+def rank_error(values: list, estimate: float, q: float) -> float:
+    """Distance between q and the range of quantiles of estimate in values."""
+    n_below = sum(v < estimate for v in values)
+    n_equal = sum(v == estimate for v in values)
+    return max(n_below / len(values) - q, q - (n_below + n_equal) / len(values), 0.0)
+
+
+@pytest.mark.parametrize('name', ['sorted', 'reversed', 'random', 'up trend', 'down trend'])
+def test_ckms_rank_error(name: str):
+    rng = random.Random(42)
+    values = {'sorted': lambda i: float(i),
+              'reversed': lambda i: float(N_VALUES - i),
+              'random': lambda i: rng.gauss(0.0, 1.0),
+              'up trend': lambda i: i * 0.01 + rng.gauss(0.0, 1.0),
+              'down trend': lambda i: -i * 0.01 + rng.gauss(0.0, 1.0)}[name]
+    values = [values(i) for i in range(N_VALUES)]
+    stream = CKMSStream()
+    # insert by batches as SummaryValue does
+    for start in range(0, N_VALUES, 500):
+        stream.insert(values[start:start + 500])
+    assert stream.n == N_VALUES
+    assert len(stream.samples) < 1_000
+    for q, eps in DEFAULT_QUANTILES.items():
+        assert rank_error(values, stream.query(q), q) <= eps
+
+
+def test_ckms_min_max():
+    # decreasing values: every batch brings a new min, min and max samples must keep an exact rank (delta = 0)
+    stream = CKMSStream()
+    for start in range(10_000, 0, -100):
+        stream.insert([float(v) for v in range(start, start - 100, -1)])
+    (v_min, _, delta_min), (v_max, _, delta_max) = stream.samples[0], stream.samples[-1]
+    assert (v_min, delta_min) == (1.0, 0)
+    assert (v_max, delta_max) == (10_000.0, 0)
+
+
+def test_summary_scrape_during_observe():
+    summary = SummaryValue()
+    for value in range(100):
+        summary.observe(float(value))
+    # observe() of this thread was preempted between its buffer lookup and its append, while another thread scrapes
+    buffer = summary._shards[threading.get_ident()][0]
+    scraper = threading.Thread(target=summary.as_dict)
+    scraper.start()
+    scraper.join()
+    buffer.append(100.0)
+    summary._shards[threading.get_ident()][1] += 100.0
+    summary._shards[threading.get_ident()][2] += 1
+    # the late append must still reach the quantiles (not a buffer detached by the scrape)
+    summary.buffer_size = 101
+    summary.observe(101.0)
+    assert summary._stream.n == summary.as_dict()['count'] == 102
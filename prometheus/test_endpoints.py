@@ -0,0 +1,84 @@
+import gzip
+import socket
+import urllib.request
+
+import pytest
+
+from pyPromLib.endpoints import CT_OPENMETRICS, CT_TEXT, MetricsHttpSrv, accepts
+from pyPromLib.metrics import Metric, MetricType
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def srv():
+    srv = MetricsHttpSrv(port=free_port(), cache_s=0.0)
+    counter = Metric('test_requests_total', MetricType.COUNTER, comment='number of "requests"')
+    counter.set(5, labels_d={'code': '200'})
+    srv.add(counter)
+    srv.start()
+    yield srv
+    srv.stop()
+
+
+def get(srv: MetricsHttpSrv, headers: dict):
+    request = urllib.request.Request(f'http://localhost:{srv.port}/metrics', headers=headers)
+    with urllib.request.urlopen(request, timeout=5.0) as resp:
+        return resp.headers, resp.read()
+
+
+def test_accepts():
+    assert accepts('gzip, deflate', 'gzip')
+    assert accepts('deflate;q=0.5, GZIP;q=0.8', 'gzip')
+    assert not accepts('gzip;q=0', 'gzip')
+    assert not accepts('deflate', 'gzip')
+    assert not accepts('', 'gzip')
+
+
+def test_text(srv):
+    headers, body = get(srv, {})
+    assert headers['Content-Type'] == CT_TEXT
+    assert headers.get('Content-Encoding') is None
+    assert body.decode() == srv.as_text()
+    assert 'test_requests_total{code="200"} 5\n' in body.decode()
+
+
+def test_gzip(srv):
+    headers, body = get(srv, {'Accept-Encoding': 'gzip'})
+    assert headers['Content-Encoding'] == 'gzip'
+    assert int(headers['Content-Length']) == len(body)
+    assert gzip.decompress(body).decode() == srv.as_text()
+
+
+def test_openmetrics(srv):
+    headers, body = get(srv, {'Accept': 'application/openmetrics-text; version=1.0.0', 'Accept-Encoding': 'gzip'})
+    assert headers['Content-Type'] == CT_OPENMETRICS
+    txt = gzip.decompress(body).decode()
+    # counter family name without _total, samples with it (added if missing), comment quotes are escaped
+    assert txt == ('# HELP test_requests number of \\"requests\\"\n# TYPE test_requests counter\n'
+                   'test_requests_total{code="200"} 5\n# EOF\n')
+    errors = Metric('test_errors', MetricType.COUNTER)
+    errors.set(1)
+    assert errors.as_openmetrics() == '# TYPE test_errors counter\ntest_errors_total 1\n'
+
+
+def test_body_cache():
+    srv = MetricsHttpSrv(cache_s=60.0)
+    gauge = Metric('test_gauge', MetricType.GAUGE)
+    gauge.set(1)
+    srv.add(gauge)
+    body = srv.body()
+    gz = srv.body(use_gzip=True)
+    # a body rendered less than cache_s ago is shared, its gzip version too
+    gauge.set(2)
+    assert srv.body() is body
+    assert srv.body(use_gzip=True) is gz
+    assert gzip.decompress(gz) == body
+    # text and OpenMetrics bodies are cached apart
+    assert srv.body(openmetrics=True).endswith(b'test_gauge 2\n# EOF\n')
+    srv.cache_s = 0.0
+    assert srv.body() == b'# TYPE test_gauge gauge\ntest_gauge 2\n'
@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from pyPromLib.metrics import Metric, MetricType
+
+
+def test_render_cache():
+    gauge = Metric('test_gauge', MetricType.GAUGE, comment='a gauge')
+    gauge.set(1, labels_d={'id': 'a'})
+    gauge.set(2, labels_d={'id': 'b'})
+    txt = gauge.as_text()
+    assert txt == '# HELP test_gauge a gauge\n# TYPE test_gauge gauge\ntest_gauge{id="a"} 1\ntest_gauge{id="b"} 2\n'
+    # unchanged: the cached text is returned
+    assert gauge.as_text() is txt
+    # set() outdates only its series
+    gauge.set(3, labels_d={'id': 'a'})
+    assert gauge.as_text().endswith('test_gauge{id="a"} 3\ntest_gauge{id="b"} 2\n')
+    # comment change outdates the header
+    gauge.comment = 'new comment'
+    assert gauge.as_text().startswith('# HELP test_gauge new comment\n')
+    # set(None) removes a series
+    gauge.set(None, labels_d={'id': 'a'})
+    assert 'id="a"' not in gauge.as_text()
+
+
+def test_ttl():
+    gauge = Metric('test_gauge', MetricType.GAUGE)
+    gauge.set(1, labels_d={'id': 'short'}, ttl=0.01)
+    gauge.set(2, labels_d={'id': 'long'}, ttl=60.0)
+    assert 'short' in gauge.as_text()
+    time.sleep(0.02)
+    assert gauge.as_text() == '# TYPE test_gauge gauge\ntest_gauge{id="long"} 2\n'
+
+
+def test_ttl_refresh():
+    gauge = Metric('test_gauge', MetricType.GAUGE)
+    # a series refreshed before its ttl is kept, and outdated deadlines don't pile up
+    for i in range(10_000):
+        gauge.set(i, labels_d={'id': str(i % 10)}, ttl=60.0)
+    assert len(gauge._expire_heap) <= 2 * 10
+    gauge.set(0, labels_d={'id': '0'}, ttl=0.01)
+    time.sleep(0.02)
+    assert gauge.as_text().count('test_gauge{') == 9
+
+
+def test_labels_child():
+    counter = Metric('test_total', MetricType.COUNTER)
+    child = counter.labels(host='h1', path='/a"b')
+    # same labels: same handle, labels are escaped once
+    assert counter.labels(host='h1', path='/a"b') is child
+    child.inc()
+    txt = counter.as_text()
+    assert txt.endswith('test_total{host="h1",path="/a\\"b"} 1\n')
+    # inc() and set() on a child outdate the cached text
+    child.inc(2)
+    assert counter.as_text().endswith(' 3\n')
+    child.set(10)
+    assert counter.as_text().endswith(' 10\n')
+    # a child is the same series as set() with a labels dict
+    counter.set(11, labels_d={'host': 'h1', 'path': '/a"b'})
+    assert counter.as_text().count('test_total{') == 1
+
+
+def test_labels_child_checks():
+    counter = Metric('test_total', MetricType.COUNTER)
+    gauge = Metric('test_gauge', MetricType.GAUGE)
+    with pytest.raises(ValueError):
+        counter.labels(id='a').inc(-1)
+    with pytest.raises(ValueError):
+        counter.labels(id='a').dec()
+    with pytest.raises(ValueError):
+        gauge.labels(id='a').observe(1.0)
+    gauge.labels(id='a').dec(0.5)
+    assert gauge.as_text() == '# TYPE test_gauge gauge\ntest_gauge{id="a"} -0.5\n'
+
+
+def test_labels_child_observe():
+    histo = Metric('test_seconds', MetricType.HISTOGRAM, buckets=(0.1, 1.0))
+    child = histo.labels(id='a')
+    for value in (0.05, 0.5, 5.0):
+        child.observe(value)
+    assert histo.as_text().endswith('test_seconds_bucket{id="a",le="0.1"} 1\ntest_seconds_bucket{id="a",le="1.0"} 2\n'
+                                    'test_seconds_bucket{id="a",le="+Inf"} 3\ntest_seconds_sum{id="a"} 5.55\n'
+                                    'test_seconds_count{id="a"} 3\n')
+    # observations after a scrape are in the next one (native series are not cached)
+    child.observe(0.01)
+    assert 'test_seconds_count{id="a"} 4\n' in histo.as_text()
@@ -0,0 +1,10 @@
+""" Shared helpers for the Modbus RTU monitor tools. """
+
+from .capfile import CaptureReader, CaptureWriter
+from .capture import CapturedFrame, FrameCapture
+from .crc import Crc16, add_crc, crc16
+from .decode import DecodedFrame, decode_frame
+from .publish import MODE_PUBSUB, MODE_STREAM, RedisPublisher, pack_pubsub, unpack_pubsub
+
+__all__ = ['CaptureReader', 'CaptureWriter', 'CapturedFrame', 'Crc16', 'DecodedFrame', 'FrameCapture', 'MODE_PUBSUB',
+           'MODE_STREAM', 'RedisPublisher', 'add_crc', 'crc16', 'decode_frame', 'pack_pubsub', 'unpack_pubsub']
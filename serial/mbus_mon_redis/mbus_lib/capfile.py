@@ -0,0 +1,317 @@
+""" Modbus capture file: an append-only file of timestamped frames, stored by blocks with a time/slave index.
+
+File layout (little endian):
+
+- file header: magic "MBCAP", version
+- blocks: block header (frames number, time range, slaves bitmap, codec, sizes) followed by its payload,
+  the payload is a sequence of frame records (t_start, t_end, flags, size, raw bytes), optionally compressed
+- index (written on close): a copy of every block header with its file offset, then the trailer (index offset,
+  blocks number, magic)
+
+Blocks are self-describing, so a file without index (writer crash) is still readable: the reader rebuilds the
+index by walking the block headers, and a writer reopening the file truncates a damaged last block.
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass
+import mmap
+import os
+import struct
+from typing import Iterator, List, Optional
+import zlib
+
+from .capture import CapturedFrame
+from .crc import crc16
+
+
+# some consts
+FILE_MAGIC = b'MBCAP\x00'
+FILE_VERSION = 1
+INDEX_MAGIC = b'MBCAPIDX'
+# codecs
+CODEC_NONE = 0
+CODEC_DEFLATE = 1
+CODEC_ZSTD = 2
+CODECS = {None: CODEC_NONE, 'none': CODEC_NONE, 'deflate': CODEC_DEFLATE, 'zstd': CODEC_ZSTD}
+# record flags
+FLAG_CRC_OK = 0x01
+FLAG_TRUNCATED = 0x02
+# binary formats
+_FILE_HEADER = struct.Struct('<6sH')
+# block header: magic, codec, frames number, stored size, raw size, first t_start, last t_end, slaves bitmap
+_BLOCK_HEADER = struct.Struct('<4sBxxxIIIdd32s')
+_BLOCK_MAGIC = b'MBLK'
+_INDEX_ENTRY = struct.Struct('<Q')
+_TRAILER = struct.Struct('<QI8s')
+_RECORD = struct.Struct('<ddBxH')
+
+
+# some class
+@dataclass
+class BlockInfo:
+    """ Index entry of a block. """
+    offset: int
+    codec: int
+    nb_frames: int
+    stored_size: int
+    raw_size: int
+    t_first: float
+    t_last: float
+    slaves: bytes
+
+    @property
+    def payload_offset(self) -> int:
+        return self.offset + _BLOCK_HEADER.size
+
+    def has_slave(self, slv_addr: int) -> bool:
+        """True if the block contains a frame of this slave address."""
+        return bool(self.slaves[slv_addr >> 3] & (1 << (slv_addr & 7)))
+
+    def header(self) -> bytes:
+        return _BLOCK_HEADER.pack(_BLOCK_MAGIC, self.codec, self.nb_frames, self.stored_size, self.raw_size,
+                                  self.t_first, self.t_last, self.slaves)
+
+    @classmethod
+    def from_header(cls, offset: int, header: bytes) -> 'BlockInfo':
+        magic, codec, nb_frames, stored_size, raw_size, t_first, t_last, slaves = _BLOCK_HEADER.unpack(header)
+        if magic != _BLOCK_MAGIC:
+            raise ValueError(f'bad block header at offset {offset}')
+        return cls(offset, codec, nb_frames, stored_size, raw_size, t_first, t_last, slaves)
+
+
+# some functions
+def _compress(codec: int, data: bytes, level: int) -> bytes:
+    if codec == CODEC_DEFLATE:
+        return zlib.compress(data, level)
+    if codec == CODEC_ZSTD:
+        # sudo pip install zstandard
+        import zstandard
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    return data
+
+
+def _decompress(codec: int, data, raw_size: int):
+    if codec == CODEC_DEFLATE:
+        return zlib.decompress(data, bufsize=raw_size)
+    if codec == CODEC_ZSTD:
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=raw_size)
+    return data
+
+
+def _scan_blocks(buf, size: int) -> List[BlockInfo]:
+    """Walk block headers from the file header, stop at the index or at the first damaged block."""
+    blocks = []
+    offset = _FILE_HEADER.size
+    while offset + _BLOCK_HEADER.size <= size:
+        try:
+            block = BlockInfo.from_header(offset, buf[offset:offset + _BLOCK_HEADER.size])
+        except ValueError:
+            break
+        if block.payload_offset + block.stored_size > size:
+            break
+        blocks.append(block)
+        offset = block.payload_offset + block.stored_size
+    return blocks
+
+
+def _read_index(buf, size: int) -> Optional[List[BlockInfo]]:
+    """Load the index from the end of file (None if file was not closed properly)."""
+    if size < _FILE_HEADER.size + _TRAILER.size:
+        return None
+    index_offset, nb_blocks, magic = _TRAILER.unpack(buf[size - _TRAILER.size:size])
+    entry_size = _INDEX_ENTRY.size + _BLOCK_HEADER.size
+    if magic != INDEX_MAGIC or index_offset + nb_blocks * entry_size + _TRAILER.size != size:
+        return None
+    blocks = []
+    for i in range(nb_blocks):
+        pos = index_offset + i * entry_size
+        offset, = _INDEX_ENTRY.unpack(buf[pos:pos + _INDEX_ENTRY.size])
+        blocks.append(BlockInfo.from_header(offset, buf[pos + _INDEX_ENTRY.size:pos + entry_size]))
+    return blocks
+
+
+class CaptureWriter:
+    """ Append frames to a capture file. """
+
+    def __init__(self, path: str, codec: Optional[str] = 'deflate', level: int = 1, block_frames: int = 1024,
+                 block_s: float = 5.0):
+        """Constructor (an existing file is reopened for append).
+
+        :param path: capture file path
+        :param codec: block compression: None, 'deflate' or 'zstd' (requires the zstandard package)
+        :param level: compression level
+        :param block_frames: max number of frames by block
+        :param block_s: max time span of a block in seconds
+        """
+        try:
+            self.codec = CODECS[codec]
+        except KeyError:
+            raise ValueError(f'unknown codec "{codec}"')
+        # public
+        self.path = path
+        self.level = level
+        self.block_frames = block_frames
+        self.block_s = block_s
+        self.blocks: List[BlockInfo] = []
+        # private
+        self._records = bytearray()
+        self._nb_frames = 0
+        self._t_first = 0.0
+        self._t_last = 0.0
+        self._slaves = bytearray(32)
+        self._fd = self._open()
+
+    def _open(self):
+        """Open file for append: remove its index (rewritten on close) and any damaged data at end."""
+        path = self.path
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            fd = open(path, 'wb')
+            fd.write(_FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION))
+            return fd
+        fd = open(path, 'r+b')
+        with mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            magic, version = _FILE_HEADER.unpack(buf[:_FILE_HEADER.size])
+            if magic != FILE_MAGIC or version != FILE_VERSION:
+                fd.close()
+                raise ValueError(f'{path} is not a capture file (or not version {FILE_VERSION})')
+            self.blocks = _scan_blocks(buf, len(buf))
+        end = self.blocks[-1].payload_offset + self.blocks[-1].stored_size if self.blocks else _FILE_HEADER.size
+        fd.truncate(end)
+        fd.seek(end)
+        return fd
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def write(self, frame: CapturedFrame, crc_ok: Optional[bool] = None):
+        """Add a frame to the current block (CRC status is computed if not known)."""
+        if crc_ok is None:
+            crc_ok = frame.crc_ok
+        if crc_ok is None:
+            crc_ok = len(frame.raw) > 4 and crc16(frame.raw) == 0
+        # start a new block on frames number or time span limit
+        if self._nb_frames and (self._nb_frames >= self.block_frames or frame.t_end - self._t_first > self.block_s):
+            self.flush()
+        if not self._nb_frames:
+            self._t_first = frame.t_start
+        self._t_last = frame.t_end
+        self._nb_frames += 1
+        flags = (FLAG_CRC_OK if crc_ok else 0) | (FLAG_TRUNCATED if frame.truncated else 0)
+        self._records += _RECORD.pack(frame.t_start, frame.t_end, flags, len(frame.raw))
+        self._records += frame.raw
+        if frame.raw:
+            self._slaves[frame.raw[0] >> 3] |= 1 << (frame.raw[0] & 7)
+
+    def flush(self):
+        """Write the current block to file."""
+        if not self._nb_frames:
+            return
+        payload = _compress(self.codec, bytes(self._records), self.level)
+        block = BlockInfo(offset=self._fd.tell(), codec=self.codec, nb_frames=self._nb_frames,
+                          stored_size=len(payload), raw_size=len(self._records), t_first=self._t_first,
+                          t_last=self._t_last, slaves=bytes(self._slaves))
+        self._fd.write(block.header())
+        self._fd.write(payload)
+        self._fd.flush()
+        self.blocks.append(block)
+        # reset current block
+        self._records.clear()
+        self._nb_frames = 0
+        self._slaves = bytearray(32)
+
+    def close(self):
+        """Write the last block and the index, then close file."""
+        if self._fd.closed:
+            return
+        self.flush()
+        index_offset = self._fd.tell()
+        for block in self.blocks:
+            self._fd.write(_INDEX_ENTRY.pack(block.offset))
+            self._fd.write(block.header())
+        self._fd.write(_TRAILER.pack(index_offset, len(self.blocks), INDEX_MAGIC))
+        self._fd.close()
+
+
+class CaptureReader:
+    """ Read a capture file through mmap, with seek by time and filter by slave address. """
+
+    def __init__(self, path: str):
+        # public
+        self.path = path
+        # private
+        self._fd = open(path, 'rb')
+        self._buf = mmap.mmap(self._fd.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version = _FILE_HEADER.unpack(self._buf[:_FILE_HEADER.size])
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            self.close()
+            raise ValueError(f'{path} is not a capture file (or not version {FILE_VERSION})')
+        # index (rebuild it if file was not closed properly)
+        blocks = _read_index(self._buf, len(self._buf))
+        self.is_indexed = blocks is not None
+        self.blocks: List[BlockInfo] = blocks if blocks is not None else _scan_blocks(self._buf, len(self._buf))
+        self._t_lasts = [block.t_last for block in self.blocks]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of frames in file."""
+        return sum(block.nb_frames for block in self.blocks)
+
+    @property
+    def t_first(self) -> Optional[float]:
+        return self.blocks[0].t_first if self.blocks else None
+
+    @property
+    def t_last(self) -> Optional[float]:
+        return self.blocks[-1].t_last if self.blocks else None
+
+    def close(self):
+        self._buf.close()
+        self._fd.close()
+
+    def _block_frames(self, block: BlockInfo) -> Iterator[CapturedFrame]:
+        stored = memoryview(self._buf)[block.payload_offset:block.payload_offset + block.stored_size]
+        payload = memoryview(_decompress(block.codec, stored, block.raw_size))
+        try:
+            pos = 0
+            for _ in range(block.nb_frames):
+                t_start, t_end, flags, size = _RECORD.unpack_from(payload, pos)
+                pos += _RECORD.size
+                yield CapturedFrame(raw=bytes(payload[pos:pos + size]), t_start=t_start, t_end=t_end,
+                                    truncated=bool(flags & FLAG_TRUNCATED), crc_ok=bool(flags & FLAG_CRC_OK))
+                pos += size
+        finally:
+            # release mmap exports (the mmap can't be closed while a memoryview exists)
+            payload.release()
+            stored.release()
+
+    def frames(self, t_from: Optional[float] = None, t_to: Optional[float] = None,
+               slaves: Optional[set] = None) -> Iterator[CapturedFrame]:
+        """Iterate over frames in time order.
+
+        :param t_from: skip frames that start before this time
+        :param t_to: stop at frames that start after this time
+        :param slaves: only frames of these slave addresses
+        """
+        first_idx = bisect_left(self._t_lasts, t_from) if t_from is not None else 0
+        for block in self.blocks[first_idx:]:
+            if t_to is not None and block.t_first > t_to:
+                return
+            if slaves is not None and not any(block.has_slave(slv_addr) for slv_addr in slaves):
+                continue
+            for frame in self._block_frames(block):
+                if t_from is not None and frame.t_start < t_from:
+                    continue
+                if t_to is not None and frame.t_start > t_to:
+                    return
+                if slaves is not None and (not frame.raw or frame.raw[0] not in slaves):
+                    continue
+                yield frame
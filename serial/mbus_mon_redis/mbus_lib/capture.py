@@ -0,0 +1,177 @@
+""" Modbus RTU frames capture from a serial port (bulk reads, end of frame by inter-frame silence). """
+
+from dataclasses import dataclass
+import time
+from typing import Callable, List, Optional
+
+from .crc import CRC16_INIT, CRC16_TABLE, crc16
+
+# some consts
+# smallest Modbus RTU frame: slave address + function code + CRC
+MIN_FRAME_SIZE = 4
+
+
+# some functions
+def char_time_s(port) -> float:
+    """Return the transmission time of one character on the serial line in seconds.
+
+    :param port: serial port (a pyserial Serial object)
+    :returns: time of one character (start bit + data bits + parity + stop bits) in seconds
+    :rtype: float
+    """
+    parity_len = 0 if port.parity == 'N' else 1
+    return (1 + port.bytesize + parity_len + port.stopbits) / port.baudrate
+
+
+def silence_s(port) -> float:
+    """Return the Modbus RTU inter-frame silence (3.5 characters, 1.75 ms above 19200 bauds) in seconds."""
+    if port.baudrate > 19_200:
+        return 1.75e-3
+    return 3.5 * char_time_s(port)
+
+
+def split_on_crc(raw: bytes) -> Optional[List[bytes]]:
+    """Split raw bytes into consecutive frames that all have a valid CRC.
+
+    :param raw: bytes of several frames received without silence between them
+    :returns: list of frames or None if there is no such split (a single frame with a bad CRC)
+    """
+    # CRC of each candidate frame starting at start is computed incrementally, ends are where it reaches 0
+    def _split(start: int) -> Optional[List[bytes]]:
+        if start == len(raw):
+            return []
+        crc = CRC16_INIT
+        for end in range(start + 1, len(raw) + 1):
+            crc = (crc >> 8) ^ CRC16_TABLE[(crc ^ raw[end - 1]) & 0xFF]
+            if crc == 0 and end - start >= MIN_FRAME_SIZE:
+                tail = _split(end)
+                if tail is not None:
+                    return [raw[start:end]] + tail
+        return None
+
+    parts = _split(0)
+    return parts if parts and len(parts) > 1 else None
+
+
+# some class
+@dataclass
+class CapturedFrame:
+    """ A frame received on the serial line. """
+    raw: bytes
+    # receive timestamps (unix time in seconds) of first and last byte
+    t_start: float
+    t_end: float
+    # frame longer than max_frame_size (only last bytes are kept)
+    truncated: bool = False
+    # CRC status if already known (as in capture files)
+    crc_ok: Optional[bool] = None
+
+
+class FrameCapture:
+    """ Capture engine: read all available bytes at once into a preallocated buffer and split frames on silence.
+
+    The port timeout is set once (pyserial reconfigures the port on each timeout change), each read returns
+    every byte already received, so there is no per byte call nor bytes concatenation.
+
+    Bytes wait in the OS buffer while the process is not scheduled: the silence test uses the estimated arrival
+    time of the first byte of each chunk (read time - chunk size * char time), not the read time, and frames
+    merged in a single read (bad CRC) are split where every part has a valid CRC.
+    """
+
+    def __init__(self, port, on_frame: Callable[[CapturedFrame], None], eof_s: Optional[float] = None,
+                 max_frame_size: int = 256, poll_s: float = 0.010):
+        """Constructor.
+
+        :param port: serial port (a pyserial Serial object)
+        :param on_frame: callback called with each CapturedFrame
+        :param eof_s: end of frame silence in seconds (default is the Modbus RTU 3.5 characters)
+        :param max_frame_size: max frame size (longer frames are truncated to their last bytes)
+        :param poll_s: max wait of a read call, also the max delay to emit a frame after its end
+        """
+        # public
+        self.port = port
+        self.on_frame = on_frame
+        self.eof_s = eof_s if eof_s is not None else silence_s(port)
+        self.max_frame_size = max_frame_size
+        self.char_s = char_time_s(port)
+        # stats
+        self.frames_nb = 0
+        self.bytes_nb = 0
+        self.truncated_nb = 0
+        self.split_nb = 0
+        # private
+        self._buf = bytearray(max_frame_size)
+        self._buf_view = memoryview(self._buf)
+        self._len = 0
+        self._truncated = False
+        self._t_first = 0.0
+        self._t_last = 0.0
+        self._t_last_mono = 0.0
+        # single timeout setup
+        self.port.timeout = poll_s
+
+    def _emit(self):
+        """Send the current frame to the callback and reset the buffer."""
+        raw = bytes(self._buf_view[:self._len])
+        truncated = self._truncated
+        self._len = 0
+        self._truncated = False
+        self.truncated_nb += truncated
+        parts = None
+        if not truncated and len(raw) >= 2 * MIN_FRAME_SIZE and crc16(raw) != 0:
+            parts = split_on_crc(raw)
+        if not parts:
+            self.frames_nb += 1
+            self.on_frame(CapturedFrame(raw=raw, t_start=self._t_first, t_end=self._t_last, truncated=truncated))
+            return
+        # frames merged in a single read: timestamps are estimated from the byte offsets
+        self.split_nb += 1
+        offset = 0
+        for part in parts:
+            self.frames_nb += 1
+            self.on_frame(CapturedFrame(raw=part, t_start=self._t_first + offset * self.char_s,
+                                        t_end=self._t_first + (offset + len(part)) * self.char_s, crc_ok=True))
+            offset += len(part)
+
+    def feed(self, chunk: bytes, t_rx: float, t_rx_mono: float):
+        """Process a chunk of bytes received at t_rx (unix time) and t_rx_mono (monotonic clock)."""
+        # a silence occurs before the (estimated) arrival of the first byte of this chunk: it starts a new frame
+        if self._len and t_rx_mono - len(chunk) * self.char_s - self._t_last_mono > self.eof_s:
+            self._emit()
+        if not self._len:
+            # first byte timestamp is estimated from the chunk size
+            self._t_first = t_rx - len(chunk) * self.char_s
+        self.bytes_nb += len(chunk)
+        # copy chunk in buffer, keep the last max_frame_size bytes on overflow
+        size = self.max_frame_size
+        if len(chunk) >= size:
+            self._buf_view[:] = chunk[-size:]
+            self._truncated = self._truncated or bool(self._len) or len(chunk) > size
+            self._len = size
+        elif self._len + len(chunk) > size:
+            keep = size - len(chunk)
+            self._buf_view[:keep] = self._buf_view[self._len - keep:self._len]
+            self._buf_view[keep:] = chunk
+            self._len = size
+            self._truncated = True
+        else:
+            self._buf_view[self._len:self._len + len(chunk)] = chunk
+            self._len += len(chunk)
+        self._t_last = t_rx
+        self._t_last_mono = t_rx_mono
+
+    def poll(self):
+        """Wait (at most poll_s) for available bytes, process them and emit the current frame on silence."""
+        chunk = self.port.read(self.port.in_waiting or 1)
+        t_rx_mono = time.monotonic()
+        if chunk:
+            self.feed(chunk, t_rx=time.time(), t_rx_mono=t_rx_mono)
+        elif self._len and t_rx_mono - self._t_last_mono > self.eof_s:
+            self._emit()
+
+    def loop(self):
+        """Capture main loop."""
+        # flush rx buffer
+        self.port.reset_input_buffer()
+        while True:
+            self.poll()
@@ -0,0 +1,70 @@
+""" Modbus CRC16 (poly 0xA001 reflected, init 0xFFFF) with a 256 entries lookup table. """
+
+import struct
+
+
+# some functions
+def _build_table() -> tuple:
+    """Compute the CRC16 of every byte value (bit by bit algorithm)."""
+    table = []
+    for byte_val in range(256):
+        crc = byte_val
+        for _ in range(8):
+            lsb = crc & 1
+            crc >>= 1
+            if lsb:
+                crc ^= 0xA001
+        table.append(crc)
+    return tuple(table)
+
+
+# some consts
+CRC16_TABLE = _build_table()
+CRC16_INIT = 0xFFFF
+
+
+def crc16(frame, crc: int = CRC16_INIT) -> int:
+    """Compute CRC16.
+
+    A frame with a valid CRC (CRC bytes included) returns 0.
+
+    :param frame: frame (bytes, bytearray or memoryview)
+    :type frame: bytes
+    :param crc: initial CRC value (to continue a previous computation)
+    :type crc: int
+    :returns: CRC16
+    :rtype: int
+    """
+    table = CRC16_TABLE
+    for next_byte in frame:
+        crc = (crc >> 8) ^ table[(crc ^ next_byte) & 0xFF]
+    return crc
+
+
+def add_crc(frame: bytes) -> bytes:
+    """Return frame with its CRC16 appended (little endian)."""
+    return frame + struct.pack('<H', crc16(frame))
+
+
+# some class
+class Crc16:
+    """ Incremental CRC16 computation (for frames received in chunks). """
+
+    def __init__(self, data=b''):
+        # public
+        self.value = CRC16_INIT
+        self.update(data)
+
+    def update(self, data) -> 'Crc16':
+        """Add data (bytes, bytearray or memoryview) to the CRC computation."""
+        self.value = crc16(data, self.value)
+        return self
+
+    def reset(self):
+        """Restart a new CRC computation."""
+        self.value = CRC16_INIT
+
+    @property
+    def is_valid(self) -> bool:
+        """True if data added so far is a frame with a valid CRC."""
+        return self.value == 0
@@ -0,0 +1,280 @@
+""" Modbus RTU frames decoder (memoryview slices over the raw frame, pre-compiled struct formats). """
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import chain
+import struct
+from typing import Optional
+
+from .crc import crc16
+
+
+# some consts
+# function codes
+READ_COILS = 0x01
+READ_DISCRETE_INPUTS = 0x02
+READ_HOLDING_REGISTERS = 0x03
+READ_INPUT_REGISTERS = 0x04
+WRITE_SINGLE_COIL = 0x05
+WRITE_SINGLE_REGISTER = 0x06
+WRITE_MULTIPLE_COILS = 0x0F
+WRITE_MULTIPLE_REGISTERS = 0x10
+WRITE_READ_MULTIPLE_REGISTERS = 0x17
+ENCAPSULATED_INTERFACE_TRANSPORT = 0x2B
+# custom function codes
+GET_ALL_HOURLY_STATION_DATA = 0x64
+GET_ALL_DAILY_STATION_DATA = 0x65
+GET_ALL_HOURLY_LINE_DATA = 0x66
+GET_ALL_DAILY_LINE_DATA = 0x67
+GET_ALL_GAS_AUX_HOURLY_STATION_DATA = 0x68
+GET_DETAILED_HOURLY_STATION_DATA = 0x69
+# misc
+FLX_ORIGIN_DT = datetime(year=1976, month=1, day=1)
+# pre-compiled formats
+_ADDR_NB = struct.Struct('>HH')
+_ADDR_NB_BYTES = struct.Struct('>HHB')
+_COIL = struct.Struct('>HBB')
+_FLX_REQ = struct.Struct('>IB')
+_FLX_LINE_REQ = struct.Struct('>IBB')
+_FLX_TAG = struct.Struct('<6sf')
+# flx tags blocks formats by number of tags (in a 256 bytes frame)
+_FLX_TAGS = tuple(struct.Struct('<' + '6sf' * n) for n in range(26))
+# registers array formats by number of registers (a byte count is at most 255)
+_REGS = tuple(struct.Struct(f'>{n}H') for n in range(128))
+# bits of each byte value (LSB first)
+_BITS = tuple(tuple((byte_val >> n) & 1 for n in range(8)) for byte_val in range(256))
+# PDU error messages
+_BAD_PDU = 'bad PDU format'
+_BAD_PDU_IDX = 'bad PDU format (error: "index out of range")'
+
+
+# some class
+@dataclass
+class DecodedFrame:
+    """ A decoded Modbus RTU frame. """
+    raw: bytes
+    # receive timestamps (unix time in seconds, 0.0 if unknown)
+    t_start: float = 0.0
+    t_end: float = 0.0
+    # header
+    is_valid: bool = False
+    slv_addr: Optional[int] = None
+    func_code: Optional[int] = None
+    is_request: bool = True
+    except_code: Optional[int] = None
+    # standard functions: data address, number of items, byte count and values (registers or bits)
+    address: Optional[int] = None
+    quantity: Optional[int] = None
+    bytes_nb: Optional[int] = None
+    values: tuple = ()
+    # custom (flx) functions: requested hour/day, line id, bytes quantity and returned tags
+    dt: Optional[datetime] = None
+    time_id: Optional[int] = None
+    line_id: Optional[int] = None
+    b_qty: Optional[int] = None
+    tags: Optional[dict] = None
+    # PDU decode error message (None if PDU is ok or not decoded)
+    error: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    @property
+    def is_request_as_str(self) -> str:
+        """Return request/response type as string."""
+        return 'request' if self.is_request else 'response'
+
+    @property
+    def is_except(self) -> bool:
+        """True for an exception response."""
+        return self.except_code is not None
+
+
+# some functions
+def _bits(data) -> tuple:
+    """Return bits of data bytes (LSB first) as a tuple of 0/1."""
+    return tuple(chain.from_iterable(map(_BITS.__getitem__, data)))
+
+
+def _ext_tags(tags_block) -> dict:
+    """Extract flx tags (6 chars name and float value) from a block of 10 bytes records."""
+    tags_d = {}
+    nb_tags, remain = divmod(len(tags_block), 10)
+    if remain or nb_tags >= len(_FLX_TAGS):
+        # unusual size: record by record (as many tags as possible before the error)
+        for i in range(0, len(tags_block), 10):
+            tag_name, tag_value = _FLX_TAG.unpack(tags_block[i:i + 10])
+            tag_name = tag_name.rstrip(b'\x00').decode().rstrip()
+            if tag_name.isascii() and tag_name.isalpha():
+                tags_d[tag_name] = tag_value
+        return tags_d
+    # skip the null records of the padding at end of block
+    nb_tags = -(-len(bytes(tags_block).rstrip(b'\x00')) // 10)
+    fields = _FLX_TAGS[nb_tags].unpack_from(tags_block)
+    for tag_name, tag_value in zip(fields[::2], fields[1::2]):
+        tag_name = tag_name.rstrip(b'\x00')
+        # fast path: ascii letters only (bytes.isalpha() is ascii only)
+        if tag_name.isalpha():
+            tags_d[tag_name.decode()] = tag_value
+        elif tag_name:
+            tag_name = tag_name.decode().rstrip()
+            if tag_name.isascii() and tag_name.isalpha():
+                tags_d[tag_name] = tag_value
+    return tags_d
+
+
+def _dec_read_bits(frm: DecodedFrame, pdu: memoryview):
+    # 8 bytes long frame -> request or response, other length -> always a response
+    if len(frm.raw) != 8:
+        frm.is_request = False
+    if frm.is_request:
+        if len(pdu) != 5:
+            frm.error = _BAD_PDU
+            return
+        frm.address, frm.quantity = _ADDR_NB.unpack(pdu[1:])
+    else:
+        if len(pdu) < 2 or len(pdu) - 2 != pdu[1]:
+            frm.error = _BAD_PDU
+            return
+        frm.bytes_nb = pdu[1]
+        frm.values = _bits(pdu[2:])
+
+
+def _dec_read_words(frm: DecodedFrame, pdu: memoryview):
+    # 8 bytes long frame -> request, other length -> response
+    frm.is_request = len(frm.raw) == 8
+    if frm.is_request:
+        frm.address, frm.quantity = _ADDR_NB.unpack(pdu[1:])
+    else:
+        if len(pdu) < 2 or len(pdu) - 2 != pdu[1] & 0xFE:
+            frm.error = _BAD_PDU
+            return
+        frm.bytes_nb = pdu[1]
+        frm.values = _REGS[pdu[1] // 2].unpack(pdu[2:])
+
+
+def _dec_write_single_coil(frm: DecodedFrame, pdu: memoryview):
+    # request and response
+    if len(pdu) != 5:
+        frm.error = _BAD_PDU
+        return
+    frm.address, bit_value, _ = _COIL.unpack(pdu[1:])
+    frm.values = (1 if bit_value == 0xFF else 0,)
+
+
+def _dec_write_single_reg(frm: DecodedFrame, pdu: memoryview):
+    # request and response
+    if len(pdu) != 5:
+        frm.error = _BAD_PDU
+        return
+    frm.address, reg_value = _ADDR_NB.unpack(pdu[1:])
+    frm.values = (reg_value,)
+
+
+def _dec_write_multiple(frm: DecodedFrame, pdu: memoryview):
+    # 8 bytes long frame -> response, other length -> request
+    frm.is_request = len(frm.raw) != 8
+    if frm.is_request:
+        frm.address, frm.quantity, frm.bytes_nb = _ADDR_NB_BYTES.unpack(pdu[1:6])
+        if frm.func_code == WRITE_MULTIPLE_COILS:
+            if len(pdu) - 6 != frm.bytes_nb:
+                frm.error = _BAD_PDU
+                return
+            frm.values = _bits(pdu[6:])
+        else:
+            frm.values = _REGS[frm.bytes_nb // 2].unpack(pdu[6:])
+    else:
+        frm.address, frm.quantity = _ADDR_NB.unpack(pdu[1:5])
+
+
+def _dec_flx(frm: DecodedFrame, pdu: memoryview):
+    # request frame size: 10 bytes for line data, 9 bytes for station data
+    with_line = frm.func_code in (GET_ALL_HOURLY_LINE_DATA, GET_ALL_DAILY_LINE_DATA)
+    frm.is_request = len(frm.raw) == (10 if with_line else 9)
+    if frm.is_request:
+        try:
+            if with_line:
+                frm.time_id, frm.line_id, frm.b_qty = _FLX_LINE_REQ.unpack(pdu[1:7])
+            else:
+                frm.time_id, frm.b_qty = _FLX_REQ.unpack(pdu[1:6])
+            if frm.func_code in (GET_ALL_DAILY_STATION_DATA, GET_ALL_DAILY_LINE_DATA):
+                frm.dt = FLX_ORIGIN_DT + timedelta(days=frm.time_id)
+            else:
+                frm.dt = FLX_ORIGIN_DT + timedelta(hours=frm.time_id)
+        except (struct.error, OverflowError) as e:
+            frm.error = f'bad PDU format (error: "{e}")'
+    else:
+        if len(pdu) < 2:
+            frm.error = _BAD_PDU_IDX
+            return
+        frm.b_qty = pdu[1]
+        try:
+            frm.tags = _ext_tags(pdu[2:])
+        except (struct.error, UnicodeDecodeError) as e:
+            frm.error = f'bad PDU format (error: "{e}")'
+
+
+# PDU decoders by function code
+_DECODERS = {READ_COILS: _dec_read_bits,
+             READ_DISCRETE_INPUTS: _dec_read_bits,
+             READ_HOLDING_REGISTERS: _dec_read_words,
+             READ_INPUT_REGISTERS: _dec_read_words,
+             WRITE_SINGLE_COIL: _dec_write_single_coil,
+             WRITE_SINGLE_REGISTER: _dec_write_single_reg,
+             WRITE_MULTIPLE_COILS: _dec_write_multiple,
+             WRITE_MULTIPLE_REGISTERS: _dec_write_multiple,
+             GET_ALL_HOURLY_STATION_DATA: _dec_flx,
+             GET_ALL_DAILY_STATION_DATA: _dec_flx,
+             GET_ALL_HOURLY_LINE_DATA: _dec_flx,
+             GET_ALL_DAILY_LINE_DATA: _dec_flx,
+             GET_ALL_GAS_AUX_HOURLY_STATION_DATA: _dec_flx,
+             GET_DETAILED_HOURLY_STATION_DATA: _dec_flx}
+
+
+def is_supported(func_code: int) -> bool:
+    """True if the PDU of this function code is decoded by decode_frame()."""
+    return func_code in _DECODERS
+
+
+def decode_frame(raw: bytes, prev: Optional[DecodedFrame] = None, t_start: float = 0.0,
+                 t_end: float = 0.0, crc_ok: Optional[bool] = None) -> DecodedFrame:
+    """Decode a Modbus RTU frame.
+
+    Request or response type is first guessed from the previous valid frame (a change of slave address or
+    function code starts a new request, otherwise types alternate), then fixed by frame size when the
+    function allows it.
+
+    :param raw: raw frame (CRC included)
+    :param prev: previous valid decoded frame on the same line (None if unknown)
+    :param t_start: receive timestamp of the first byte
+    :param t_end: receive timestamp of the last byte
+    :param crc_ok: CRC status if already known (skip the CRC computation)
+    :returns: the decoded frame (with is_valid set to False for bad CRC or too short frame)
+    :rtype: DecodedFrame
+    """
+    frm = DecodedFrame(raw=raw, t_start=t_start, t_end=t_end)
+    # check frame validity
+    if crc_ok is None:
+        crc_ok = crc16(raw) == 0
+    if len(raw) <= 4 or not crc_ok:
+        return frm
+    frm.is_valid = True
+    frm.slv_addr = raw[0]
+    frm.func_code = raw[1]
+    # default request/response flag (can be override by PDU decoders)
+    if prev is not None and prev.slv_addr == frm.slv_addr and prev.func_code == frm.func_code:
+        frm.is_request = not prev.is_request
+    # exception frame is always a response
+    if frm.func_code >= 0x80:
+        frm.is_request = False
+        frm.except_code = raw[2]
+        return frm
+    try:
+        decoder = _DECODERS[frm.func_code]
+    except KeyError:
+        return frm
+    try:
+        decoder(frm, memoryview(raw)[1:-2])
+    except struct.error:
+        frm.error = _BAD_PDU
+    return frm
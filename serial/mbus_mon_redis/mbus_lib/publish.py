@@ -0,0 +1,170 @@
+""" Publish captured Modbus frames to redis from a background thread (bounded queue, pipelined batches). """
+
+import logging
+import queue
+import struct
+import threading
+import time
+from typing import Optional, Tuple
+
+from .capture import CapturedFrame
+
+
+# some const
+MODE_PUBSUB = 'pubsub'
+MODE_STREAM = 'stream'
+# pub/sub message: capture timestamps (t_start, t_end) followed by the raw frame
+_PUBSUB_HEADER = struct.Struct('<dd')
+
+
+# some functions
+def pack_pubsub(frame: CapturedFrame) -> bytes:
+    """Build the pub/sub message of a frame: capture timestamps (t_start, t_end) followed by the raw bytes."""
+    return _PUBSUB_HEADER.pack(frame.t_start, frame.t_end) + frame.raw
+
+
+def unpack_pubsub(message: bytes) -> Tuple[bytes, float, float]:
+    """Return (raw, t_start, t_end) of a pub/sub message built by pack_pubsub()."""
+    if len(message) < _PUBSUB_HEADER.size:
+        raise ValueError(f'pub/sub message too short ({len(message)} bytes)')
+    t_start, t_end = _PUBSUB_HEADER.unpack_from(message)
+    return message[_PUBSUB_HEADER.size:], t_start, t_end
+
+
+# some class
+class RedisPublisher:
+    """ Decouple serial capture from redis: frames are queued by publish() and sent in batches by a worker thread.
+
+    With pubsub mode each frame is published on the pub_key channel (see pack_pubsub()), with stream mode each
+    frame is added to the pub_key redis stream (XADD with approximate MAXLEN). Both carry the capture timestamps:
+    frames are sent by batches, so the receive time of a message doesn't tell when the frame was on the line.
+    publish() never blocks: when the queue is full (redis is too slow or down) the frame is dropped and counted.
+    Each counter is only updated by one thread (capture or publisher), so no lock is needed to read them.
+    """
+
+    def __init__(self, rdb, pub_key: str, mode: str = MODE_PUBSUB, max_queue: int = 10_000, batch_size: int = 256,
+                 stream_maxlen: Optional[int] = 100_000, retry_s: float = 1.0,
+                 stats_period_s: Optional[float] = None):
+        """Constructor.
+
+        :param rdb: redis client (a redis.Redis object)
+        :param pub_key: redis channel (pubsub mode) or stream key (stream mode)
+        :param mode: MODE_PUBSUB or MODE_STREAM
+        :param max_queue: max number of frames waiting for redis
+        :param batch_size: max number of frames sent by a single pipeline
+        :param stream_maxlen: approximate max length of the redis stream (None for unlimited)
+        :param retry_s: delay before next try after a redis error
+        :param stats_period_s: log stats every stats_period_s seconds from the publisher thread (None to disable)
+        """
+        if mode not in (MODE_PUBSUB, MODE_STREAM):
+            raise ValueError(f'unknown publish mode "{mode}"')
+        # public
+        self.rdb = rdb
+        self.pub_key = pub_key
+        self.mode = mode
+        self.batch_size = batch_size
+        self.stream_maxlen = stream_maxlen
+        self.retry_s = retry_s
+        self.stats_period_s = stats_period_s
+        # stats updated by the capture thread
+        self.queued = 0
+        self.dropped_full = 0
+        self.queue_high = 0
+        # stats updated by the publisher thread
+        self.published = 0
+        self.dropped_errors = 0
+        self.batches = 0
+        self.redis_errors = 0
+        # private
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop_evt = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='redis-publisher', daemon=True)
+
+    @property
+    def queue_size(self) -> int:
+        """Current number of frames waiting for redis."""
+        return self._queue.qsize()
+
+    @property
+    def dropped(self) -> int:
+        """Number of frames lost (queue full or failed redis batch)."""
+        return self.dropped_full + self.dropped_errors
+
+    @property
+    def stats(self) -> dict:
+        """Return publisher counters as a dict."""
+        return dict(queued=self.queued, published=self.published, dropped=self.dropped, batches=self.batches,
+                    redis_errors=self.redis_errors, queue_size=self.queue_size, queue_high=self.queue_high)
+
+    def start(self):
+        """Start the publisher thread."""
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Stop the publisher thread after a last flush of queued frames."""
+        self._stop_evt.set()
+        self._thread.join(timeout)
+
+    def publish(self, frame: CapturedFrame):
+        """Queue a frame for redis (never blocks, frame is dropped if the queue is full)."""
+        try:
+            self._queue.put_nowait(frame)
+        except queue.Full:
+            self.dropped_full += 1
+            return
+        self.queued += 1
+        # backpressure watermark
+        q_size = self._queue.qsize()
+        if q_size > self.queue_high:
+            self.queue_high = q_size
+
+    def _next_batch(self) -> list:
+        """Wait for a frame and return it with all the frames already queued (up to batch_size)."""
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        try:
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _send(self, batch: list):
+        """Send a batch of frames to redis in a single round trip."""
+        pipe = self.rdb.pipeline(transaction=False)
+        if self.mode == MODE_STREAM:
+            for frame in batch:
+                pipe.xadd(self.pub_key, {'raw': frame.raw, 't_start': frame.t_start, 't_end': frame.t_end},
+                          maxlen=self.stream_maxlen, approximate=True)
+        else:
+            for frame in batch:
+                pipe.publish(self.pub_key, pack_pubsub(frame))
+        pipe.execute()
+
+    def _run(self):
+        """Publisher thread main loop."""
+        import redis
+
+        logger = logging.getLogger(__name__)
+        t_stats = time.monotonic()
+        while not (self._stop_evt.is_set() and self._queue.empty()):
+            # periodic stats (also when the line is idle)
+            if self.stats_period_s is not None and time.monotonic() - t_stats > self.stats_period_s:
+                t_stats = time.monotonic()
+                logger.info(f'publisher stats ({self.pub_key}): {self.stats}')
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self._send(batch)
+                self.published += len(batch)
+                self.batches += 1
+            except redis.RedisError as e:
+                # frames of a failed batch are lost, capture side continue to queue (or drop) frames
+                self.redis_errors += 1
+                self.dropped_errors += len(batch)
+                logger.error(f'redis error occur: {e!r}')
+                self._stop_evt.wait(self.retry_s)
@@ -0,0 +1,153 @@
+""" Pair Modbus RTU requests with their responses and keep latency statistics by slave and function. """
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from .decode import DecodedFrame
+
+
+# some consts
+# histograms upper bounds in seconds (in ascending order)
+LATENCY_BUCKETS = (0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+TURNAROUND_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+
+
+# some class
+class Histogram:
+    """ A cumulative histogram (as Prometheus ones: counts never decrease, rates are done at query time). """
+
+    def __init__(self, buckets: tuple):
+        # public
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """Add a value to the histogram."""
+        idx = bisect_left(self.buckets, value)
+        if idx < len(self.counts):
+            self.counts[idx] += 1
+        self.sum += value
+        self.count += 1
+
+    def as_metric_value(self) -> dict:
+        """Return the histogram as a pyPromLib histogram value (cumulative buckets, sum and count)."""
+        value_d = {}
+        cumul = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumul += count
+            value_d[str(bound)] = cumul
+        value_d['sum'] = self.sum
+        value_d['count'] = self.count
+        return value_d
+
+
+@dataclass
+class Transaction:
+    """ A request and its response. """
+    request: DecodedFrame
+    response: DecodedFrame
+
+    @property
+    def slv_addr(self) -> int:
+        return self.request.slv_addr
+
+    @property
+    def func_code(self) -> int:
+        return self.request.func_code
+
+    @property
+    def latency_s(self) -> float:
+        """Response latency: delay between end of request and start of response."""
+        return self.response.t_start - self.request.t_end
+
+    @property
+    def is_except(self) -> bool:
+        return self.response.is_except
+
+
+@dataclass
+class TransactionStats:
+    """ Statistics of a slave address and function code pair. """
+    transactions: int = 0
+    exceptions: int = 0
+    timeouts: int = 0
+    latency: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+
+    @property
+    def except_ratio(self) -> float:
+        """Ratio of exception responses."""
+        return self.exceptions / self.transactions if self.transactions else 0.0
+
+
+class TransactionTracker:
+    """ Pair requests with responses on a Modbus RTU line (single master: one pending request at a time).
+
+    Frames must be fed in receive order with their timestamps (t_start/t_end of DecodedFrame).
+    """
+
+    def __init__(self, timeout_s: float = 1.0):
+        """Constructor.
+
+        :param timeout_s: max delay between a request and its response
+        """
+        # public
+        self.timeout_s = timeout_s
+        # stats by (slave address, function code)
+        self.stats: Dict[Tuple[int, int], TransactionStats] = {}
+        # line stats
+        self.frames = 0
+        self.bad_frames = 0
+        self.orphan_responses = 0
+        self.bus_busy_s = 0.0
+        self.turnaround = Histogram(TURNAROUND_BUCKETS)
+        # private
+        self._pending: Optional[DecodedFrame] = None
+        self._t_last_end: Optional[float] = None
+
+    def _stats_of(self, frame: DecodedFrame) -> TransactionStats:
+        key = (frame.slv_addr, frame.func_code & 0x7F)
+        try:
+            return self.stats[key]
+        except KeyError:
+            self.stats[key] = TransactionStats()
+            return self.stats[key]
+
+    def _check_timeout(self, t_now: float):
+        """Count a pending request without response after timeout_s as a timeout."""
+        if self._pending and t_now - self._pending.t_end > self.timeout_s:
+            self._stats_of(self._pending).timeouts += 1
+            self._pending = None
+
+    def feed(self, frame: DecodedFrame) -> Optional[Transaction]:
+        """Process the next frame of the line, return the transaction it completes (if any)."""
+        # line stats: bus occupation and turnaround (silence between 2 frames)
+        self.frames += 1
+        self.bus_busy_s += max(frame.t_end - frame.t_start, 0.0)
+        if self._t_last_end is not None:
+            self.turnaround.observe(max(frame.t_start - self._t_last_end, 0.0))
+        self._t_last_end = frame.t_end
+        if not frame.is_valid:
+            self.bad_frames += 1
+            return
+        self._check_timeout(frame.t_start)
+        if frame.is_request:
+            # a new request replace an unanswered one (it will never get a response)
+            if self._pending:
+                self._stats_of(self._pending).timeouts += 1
+            self._pending = frame
+            return
+        # response: must match the pending request
+        req = self._pending
+        if req is None or req.slv_addr != frame.slv_addr or req.func_code != frame.func_code & 0x7F:
+            self.orphan_responses += 1
+            return
+        self._pending = None
+        transaction = Transaction(request=req, response=frame)
+        stats = self._stats_of(req)
+        stats.transactions += 1
+        stats.exceptions += transaction.is_except
+        stats.latency.observe(max(transaction.latency_s, 0.0))
+        return transaction
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+
+""" Modbus serial monitor for several lines, relay frames of each port to its redis channel or stream. """
+
+import argparse
+from dataclasses import dataclass
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from typing import List, Optional
+# sudo pip install pyserial==3.4
+from serial import Serial, serialutil
+# sudo apt install python3-redis
+import redis
+from mbus_lib import MODE_PUBSUB, MODE_STREAM, CapturedFrame, FrameCapture, RedisPublisher, crc16
+# pyPromLib is in the prometheus directory of this repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'prometheus'))
+from pyPromLib.endpoints import MetricsHttpSrv  # noqa: E402
+from pyPromLib.metrics import Metric, MetricType  # noqa: E402
+
+
+# some const
+STATS_PERIOD_S = 10.0
+RETRY_S = 5.0
+# port counters (index in shared array)
+C_FRAMES = 0
+C_CRC_ERR = 1
+C_BYTES = 2
+C_DROPPED = 3
+C_SIZE = 4
+
+
+# some class
+@dataclass
+class PortConfig:
+    """ Serial port and redis key of a line. """
+    device: str
+    pub_key: str
+    baudrate: int = 9600
+    parity: str = 'N'
+    stopbits: float = 1
+
+    @classmethod
+    def from_arg(cls, arg: str) -> 'PortConfig':
+        """Parse a "device,pub_key[,baudrate[,parity[,stop]]]" string (like /dev/ttyUSB0,ch1:frames,19200)."""
+        fields = arg.split(',')
+        if not 2 <= len(fields) <= 5:
+            raise argparse.ArgumentTypeError(f'bad port definition "{arg}"')
+        try:
+            cfg = cls(device=fields[0], pub_key=fields[1])
+            if len(fields) > 2:
+                cfg.baudrate = int(fields[2])
+            if len(fields) > 3:
+                cfg.parity = fields[3]
+            if len(fields) > 4:
+                cfg.stopbits = float(fields[4])
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'bad port definition "{arg}"')
+        return cfg
+
+
+@dataclass
+class WorkerOptions:
+    """ Options shared by all ports. """
+    mode: str = MODE_PUBSUB
+    eof_ms: Optional[float] = None
+    max_queue: int = 10_000
+    stream_maxlen: int = 100_000
+
+
+class PortWorker:
+    """ Capture frames of a port and publish them, update the port counters (a shared array). """
+
+    def __init__(self, cfg: PortConfig, counters, rdb: redis.Redis, opts: WorkerOptions):
+        # public
+        self.cfg = cfg
+        self.counters = counters
+        self.rdb = rdb
+        self.opts = opts
+        # private
+        self._publisher: Optional[RedisPublisher] = None
+        # publisher drops already added to the shared counter (it survives a worker restart, the publisher don't)
+        self._dropped_last = 0
+
+    def on_frame(self, frame: CapturedFrame):
+        self._publisher.publish(frame)
+        counters = self.counters
+        counters[C_FRAMES] += 1
+        counters[C_BYTES] += len(frame.raw)
+        if len(frame.raw) <= 4 or crc16(frame.raw) != 0:
+            counters[C_CRC_ERR] += 1
+        dropped = self._publisher.dropped
+        counters[C_DROPPED] += dropped - self._dropped_last
+        self._dropped_last = dropped
+
+    def run(self):
+        """Capture loop (restart after a serial error)."""
+        self._publisher = RedisPublisher(self.rdb, self.cfg.pub_key, mode=self.opts.mode, max_queue=self.opts.max_queue,
+                                         stream_maxlen=self.opts.stream_maxlen).start()
+        self._dropped_last = 0
+        while True:
+            try:
+                port = Serial(port=self.cfg.device, baudrate=self.cfg.baudrate, parity=self.cfg.parity,
+                              stopbits=self.cfg.stopbits)
+                eof_s = self.opts.eof_ms / 1000 if self.opts.eof_ms is not None else None
+                FrameCapture(port, on_frame=self.on_frame, eof_s=eof_s).loop()
+            except serialutil.SerialException as e:
+                logging.error(f'serial device {self.cfg.device} error: {e!r} (retry in {RETRY_S:.0f}s)')
+                time.sleep(RETRY_S)
+
+
+# some functions
+def run_worker(cfgs: List[PortConfig], counters_l: list, opts: WorkerOptions, cpu: Optional[int] = None):
+    """Run the capture of some ports, one thread by port and a single redis connections pool."""
+    if cpu is not None:
+        os.sched_setaffinity(0, {cpu})
+    rdb = redis.StrictRedis(connection_pool=redis.ConnectionPool(max_connections=len(cfgs) + 1))
+    threads = []
+    for cfg, counters in zip(cfgs, counters_l):
+        worker = PortWorker(cfg, counters, rdb, opts)
+        threads.append(threading.Thread(target=worker.run, name=cfg.device, daemon=True))
+        threads[-1].start()
+    for thread in threads:
+        thread.join()
+
+
+class Supervisor:
+    """ Spread ports over worker processes (or threads), restart dead workers and report aggregate counters. """
+
+    def __init__(self, cfgs: List[PortConfig], opts: WorkerOptions, workers: int = 0, affinity: bool = False,
+                 metrics_port: Optional[int] = None):
+        # public
+        self.cfgs = cfgs
+        self.opts = opts
+        self.workers = workers
+        self.affinity = affinity
+        # counters of each port (shared with worker processes)
+        self.counters_l = [multiprocessing.Array('d', C_SIZE, lock=False) for _ in cfgs]
+        # private
+        self._procs = {}
+        self._last_counters = [list(counters) for counters in self.counters_l]
+        self._metrics_srv = None
+        if metrics_port:
+            self._metrics_srv = MetricsHttpSrv(port=metrics_port)
+            self._m_frames = Metric('modbus_frames_total', MetricType.COUNTER, comment='number of captured frames')
+            self._m_crc_err = Metric('modbus_crc_errors_total', MetricType.COUNTER, comment='number of bad CRC frames')
+            self._m_bytes = Metric('modbus_bytes_total', MetricType.COUNTER, comment='number of captured bytes')
+            self._m_dropped = Metric('modbus_dropped_frames_total', MetricType.COUNTER,
+                                     comment='number of frames not relayed to redis')
+            for metric in (self._m_frames, self._m_crc_err, self._m_bytes, self._m_dropped):
+                self._metrics_srv.add(metric)
+            self._metrics_srv.start()
+
+    def _start_worker(self, w_idx: int):
+        """Start worker process w_idx (ports are spread round-robin over processes)."""
+        idx_l = list(range(w_idx, len(self.cfgs), self.workers))
+        cpu = None
+        if self.affinity:
+            cpus = sorted(os.sched_getaffinity(0))
+            cpu = cpus[w_idx % len(cpus)]
+        proc = multiprocessing.Process(target=run_worker, name=f'worker-{w_idx}', daemon=True,
+                                       args=([self.cfgs[i] for i in idx_l], [self.counters_l[i] for i in idx_l],
+                                             self.opts, cpu))
+        proc.start()
+        self._procs[w_idx] = proc
+        logging.info(f'start worker #{w_idx} (pid {proc.pid}, cpu {cpu}) for ' +
+                     ', '.join(self.cfgs[i].device for i in idx_l))
+
+    def report(self, elapsed_s: float):
+        """Log frames rate and error counters of all ports, update prometheus metrics."""
+        totals = [0.0] * C_SIZE
+        for cfg, counters, last in zip(self.cfgs, self.counters_l, self._last_counters):
+            now = list(counters)
+            rate = (now[C_FRAMES] - last[C_FRAMES]) / elapsed_s
+            logging.debug(f'{cfg.device}: {rate:.1f} frames/s, {now[C_FRAMES]:.0f} frames, '
+                          f'{now[C_CRC_ERR]:.0f} CRC errors, {now[C_DROPPED]:.0f} dropped')
+            if self._metrics_srv:
+                labels_d = {'device': cfg.device}
+                self._m_frames.set(int(now[C_FRAMES]), labels_d=labels_d)
+                self._m_crc_err.set(int(now[C_CRC_ERR]), labels_d=labels_d)
+                self._m_bytes.set(int(now[C_BYTES]), labels_d=labels_d)
+                self._m_dropped.set(int(now[C_DROPPED]), labels_d=labels_d)
+            totals = [total + cur - prev for total, cur, prev in zip(totals, now, last)]
+            last[:] = now
+        logging.info(f'{len(self.cfgs)} ports: {totals[C_FRAMES] / elapsed_s:.1f} frames/s, '
+                     f'{totals[C_BYTES] / elapsed_s:.0f} bytes/s, {totals[C_CRC_ERR]:.0f} CRC errors, '
+                     f'{totals[C_DROPPED]:.0f} dropped (last {elapsed_s:.0f}s)')
+
+    def run(self):
+        """Supervisor main loop."""
+        if self.workers:
+            for w_idx in range(self.workers):
+                self._start_worker(w_idx)
+        else:
+            # threads only, in this process
+            threading.Thread(target=run_worker, args=(self.cfgs, self.counters_l, self.opts), daemon=True).start()
+        t_last = time.monotonic()
+        while True:
+            time.sleep(STATS_PERIOD_S)
+            # restart dead workers
+            for w_idx, proc in list(self._procs.items()):
+                if not proc.is_alive():
+                    logging.warning(f'worker #{w_idx} exit (code {proc.exitcode}), restart it')
+                    self._start_worker(w_idx)
+            t_now = time.monotonic()
+            self.report(t_now - t_last)
+            t_last = t_now
+
+
+if __name__ == '__main__':
+    # parse args
+    parser = argparse.ArgumentParser()
+    parser.add_argument('ports', type=PortConfig.from_arg, nargs='+',
+                        help='port as "device,pub_key[,baudrate[,parity[,stop]]]" (like /dev/ttyUSB0,ch1:frames)')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='number of worker processes (default is one per port up to one per CPU, '
+                             '0 for threads only)')
+    parser.add_argument('-a', '--affinity', action='store_true', help='pin each worker process to a CPU core')
+    parser.add_argument('-e', '--eof_ms', type=float, default=None,
+                        help='end of frame delay (default is 3.5 chars)')
+    parser.add_argument('-x', '--stream', action='store_true', help='add frames to redis streams (default is pub/sub)')
+    parser.add_argument('-l', '--maxlen', type=int, default=100_000,
+                        help='redis streams max length (default is 100000)')
+    parser.add_argument('-q', '--queue', type=int, default=10_000,
+                        help='max frames waiting for redis (default is 10000)')
+    parser.add_argument('-m', '--metrics_port', type=int, default=None,
+                        help='share counters with prometheus on this HTTP port')
+    parser.add_argument('-d', '--debug', action='store_true', help='set debug mode')
+    args = parser.parse_args()
+    # init logging
+    logging.basicConfig(stream=sys.stdout,
+                        format='%(asctime)s %(levelname)-8s %(processName)s %(message)s',
+                        level=logging.DEBUG if args.debug else logging.INFO)
+    # workers number
+    if args.workers is None:
+        args.workers = min(len(args.ports), len(os.sched_getaffinity(0)))
+    args.workers = min(args.workers, len(args.ports))
+    # run supervisor
+    options = WorkerOptions(mode=MODE_STREAM if args.stream else MODE_PUBSUB, eof_ms=args.eof_ms,
+                            max_queue=args.queue, stream_maxlen=args.maxlen)
+    try:
+        Supervisor(args.ports, options, workers=args.workers, affinity=args.affinity,
+                   metrics_port=args.metrics_port).run()
+    except KeyboardInterrupt:
+        exit(0)
@@ -3,130 +3,110 @@
 """ Modbus frame analyzer. """
 
 import argparse
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 import os
-import string
-import struct
 import sys
 import time
+from typing import Optional
 # sudo apt install python3-redis
 import redis
-
-# some consts
-# function codes
-READ_COILS = 0x01
-READ_DISCRETE_INPUTS = 0x02
-READ_HOLDING_REGISTERS = 0x03
-READ_INPUT_REGISTERS = 0x04
-WRITE_SINGLE_COIL = 0x05
-WRITE_SINGLE_REGISTER = 0x06
-WRITE_MULTIPLE_COILS = 0x0F
-WRITE_MULTIPLE_REGISTERS = 0x10
-WRITE_READ_MULTIPLE_REGISTERS = 0x17
-ENCAPSULATED_INTERFACE_TRANSPORT = 0x2B
-# custom function codes
-GET_ALL_HOURLY_STATION_DATA = 0x64
-GET_ALL_DAILY_STATION_DATA = 0x65
-GET_ALL_HOURLY_LINE_DATA = 0x66
-GET_ALL_DAILY_LINE_DATA = 0x67
-GET_ALL_GAS_AUX_HOURLY_STATION_DATA = 0x68
-GET_DETAILED_HOURLY_STATION_DATA = 0x69
-# misc
-FLX_ORIGIN_DT = datetime(year=1976, month=1, day=1)
-
-
-# some functions
-def crc16(frame: bytes) -> int:
-    """Compute CRC16.
-
-    :param frame: frame
-    :type frame: bytes
-    :returns: CRC16
-    :rtype: int
-    """
-    crc = 0xFFFF
-    for next_byte in frame:
-        crc ^= next_byte
-        for _ in range(8):
-            lsb = crc & 1
-            crc >>= 1
-            if lsb:
-                crc ^= 0xA001
-    return crc
+from mbus_lib.decode import (
+    ENCAPSULATED_INTERFACE_TRANSPORT,
+    GET_ALL_DAILY_LINE_DATA,
+    GET_ALL_DAILY_STATION_DATA,
+    GET_ALL_GAS_AUX_HOURLY_STATION_DATA,
+    GET_ALL_HOURLY_LINE_DATA,
+    GET_ALL_HOURLY_STATION_DATA,
+    GET_DETAILED_HOURLY_STATION_DATA,
+    READ_COILS,
+    READ_DISCRETE_INPUTS,
+    READ_HOLDING_REGISTERS,
+    READ_INPUT_REGISTERS,
+    WRITE_MULTIPLE_COILS,
+    WRITE_MULTIPLE_REGISTERS,
+    WRITE_READ_MULTIPLE_REGISTERS,
+    WRITE_SINGLE_COIL,
+    WRITE_SINGLE_REGISTER,
+    DecodedFrame,
+    decode_frame,
+)
+from mbus_lib.capfile import CaptureReader
+from mbus_lib.publish import unpack_pubsub
+from mbus_lib.transactions import TransactionTracker
+# pyPromLib is in the prometheus directory of this repository
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'prometheus'))
+from pyPromLib.endpoints import MetricsHttpSrv  # noqa: E402
+from pyPromLib.metrics import Metric, MetricType  # noqa: E402
 
 
 # some class
-class ModbusRTUFrame:
-    """ Modbus RTU frame container class. """
+class TransactionsExporter:
+    """ Share transactions statistics of a TransactionTracker with Prometheus. """
 
-    def __init__(self, raw=b'', is_request: bool = False):
+    def __init__(self, tracker: TransactionTracker, port: int, bind: str = 'localhost', update_s: float = 1.0):
         # public
-        self.raw = raw
-        # flags
-        self.is_request = is_request
-
-    def __bool__(self) -> bool:
-        return bool(self.raw)
-
-    def __len__(self) -> int:
-        return len(self.raw)
-
-    @property
-    def is_request_as_str(self) -> str:
-        """Return request/response type as string."""
-        return 'request' if self.is_request else 'response'
-
-    @property
-    def pdu(self) -> bytes:
-        """Return PDU part of frame."""
-        return self.raw[1:-2]
-
-    @property
-    def slv_addr(self) -> int or None:
-        """Return slave address part of frame."""
-        try:
-            return self.raw[0]
-        except IndexError:
-            return
+        self.tracker = tracker
+        self.update_s = update_s
+        self.metrics_srv = MetricsHttpSrv(port=port, bind=bind)
+        # metrics by slave and function
+        self.m_latency = Metric('modbus_response_latency_seconds', MetricType.HISTOGRAM,
+                                comment='delay between end of request and start of response')
+        self.m_transactions = Metric('modbus_transactions_total', MetricType.COUNTER,
+                                     comment='number of request/response transactions')
+        self.m_exceptions = Metric('modbus_exceptions_total', MetricType.COUNTER,
+                                   comment='number of exception responses')
+        self.m_timeouts = Metric('modbus_timeouts_total', MetricType.COUNTER,
+                                 comment='number of requests without response')
+        # line metrics
+        self.m_turnaround = Metric('modbus_turnaround_seconds', MetricType.HISTOGRAM,
+                                   comment='silence between two frames on the line')
+        self.m_frames = Metric('modbus_frames_total', MetricType.COUNTER, comment='number of frames')
+        self.m_orphans = Metric('modbus_orphan_responses_total', MetricType.COUNTER,
+                                comment='number of responses without matching request')
+        self.m_busy = Metric('modbus_bus_busy_seconds_total', MetricType.COUNTER,
+                             comment='time the line carries frames (its rate is the bus load)')
+        for metric in (self.m_latency, self.m_transactions, self.m_exceptions, self.m_timeouts, self.m_turnaround,
+                       self.m_frames, self.m_orphans, self.m_busy):
+            self.metrics_srv.add(metric)
+        # private
+        self._t_next_update = 0.0
 
-    @property
-    def func_code(self) -> int or None:
-        """Return function code part of frame."""
-        try:
-            return self.raw[1]
-        except IndexError:
-            return
+    def start(self):
+        """Start the HTTP server."""
+        self.metrics_srv.start()
+        return self
 
-    @property
-    def except_code(self) -> int or None:
-        """Return except code part of frame."""
-        try:
-            return self.raw[2]
-        except IndexError:
+    def update(self, force: bool = False):
+        """Update metrics with the tracker statistics (at most every update_s)."""
+        if not force and time.monotonic() < self._t_next_update:
             return
-
-    @property
-    def is_valid(self) -> bool:
-        """Check if frame is valid.
-
-        :return: True if frame is valid
-        """
-        return len(self.raw) > 4 and crc16(self.raw) == 0
+        self._t_next_update = time.monotonic() + self.update_s
+        tracker = self.tracker
+        for (slv_addr, func_code), stats in list(tracker.stats.items()):
+            labels_d = {'slave': slv_addr, 'function': f'0x{func_code:02x}'}
+            self.m_latency.set(stats.latency.as_metric_value(), labels_d=labels_d)
+            self.m_transactions.set(stats.transactions, labels_d=labels_d)
+            self.m_exceptions.set(stats.exceptions, labels_d=labels_d)
+            self.m_timeouts.set(stats.timeouts, labels_d=labels_d)
+        self.m_turnaround.set(tracker.turnaround.as_metric_value())
+        self.m_frames.set(tracker.frames - tracker.bad_frames, labels_d={'status': 'ok'})
+        self.m_frames.set(tracker.bad_frames, labels_d={'status': 'error'})
+        self.m_orphans.set(tracker.orphan_responses)
+        self.m_busy.set(tracker.bus_busy_s)
 
 
 class FrameAnalyzer:
     """ Modbus frame processing. """
 
-    class _InternalError(Exception):
-        pass
-
     def __init__(self):
         # public
         self.nb_frame = 0
-        # current and last frame
-        self.frm_now = ModbusRTUFrame()
-        self.frm_last = ModbusRTUFrame()
+        # current and last (valid) frame
+        self.frm_now = DecodedFrame(raw=b'')
+        self.frm_last = DecodedFrame(raw=b'')
+        # request/response pairing
+        self.tracker = TransactionTracker()
         # private
         # modbus functions maps
         self._func_methods = {READ_COILS: self._msg_read_bits,
@@ -161,280 +141,106 @@ class FrameAnalyzer:
                             GET_DETAILED_HOURLY_STATION_DATA: 'detailed hourly station data'}
 
     @classmethod
-    def _is_valid_tag(cls, tag_name: str) -> bool:
-        if tag_name:
-            return all((c in string.ascii_letters for c in tag_name))
-        else:
-            return False
+    def _fmt_tags_as_str(cls, tags: dict) -> str:
+        tags_str = ', '.join([f'{tag_name}={tag_value:.03f}' for tag_name, tag_value in tags.items()])
+        return tags_str if tags_str else 'n/a'
 
     @classmethod
-    def _ext_tags(cls, tags_block: bytes) -> dict:
-        try:
-            tags_d = {}
-            for i in range(0, len(tags_block), 10):
-                tag_name, tag_value = struct.unpack('<6sf', tags_block[i:i+10])
-                tag_name = tag_name.rstrip(b'\x00').decode().rstrip()
-                if cls._is_valid_tag(tag_name):
-                    tags_d[tag_name] = tag_value
-            return tags_d
-        except (struct.error, UnicodeDecodeError) as e:
-            raise FrameAnalyzer._InternalError(e)
+    def _fmt_bits_as_str(cls, bits: tuple) -> str:
+        # format bits as list str: "1, 0, 1, 0 ..."
+        return ', '.join(['1' if bit else '0' for bit in bits])
 
     @classmethod
-    def _fmt_tags_as_str(cls, tags: dict) -> str:
-        tags_str = ''
-        for tag_name, tag_value in tags.items():
-            tags_str += ', ' if tags_str else ''
-            tags_str += f'{tag_name}={tag_value:.03f}'
-        if not tags_str:
-            tags_str = 'n/a'
-        return tags_str
+    def _fmt_regs_as_str(cls, regs: tuple) -> str:
+        return ', '.join(map(str, regs))
 
     def _msg_err(self) -> str:
         return f"bad CRC or too short frame (raw: {self.frm_now.raw.hex(':')})"
 
     def _msg_except(self) -> str:
-        # override request or response flag
-        # except frame is always a response
-        self.frm_now.is_request = False
-        # format analyze message
         return f'response: exception (code 0x{self.frm_now.except_code:02x})'
 
     def _msg_func_unknown(self) -> str:
-        # format message
         return f'{self.frm_now.is_request_as_str}: function not supported'
 
     def _msg_read_bits(self) -> str:
-        # override request or response flag
-        # 8 bytes long frame -> request or response, other length -> always a response
-        if len(self.frm_now) != 8:
-            self.frm_now.is_request = False
-        # decode frame PDU
-        if self.frm_now.is_request:
-            # request
-            try:
-                bit_addr, bit_nb = struct.unpack('>HH', self.frm_now.pdu[1:])
-                msg_pdu = f'read {bit_nb} bit(s) at @ 0x{bit_addr:04x} ({bit_addr})'
-            except struct.error:
-                msg_pdu = 'bad PDU format'
+        frm = self.frm_now
+        if frm.is_request:
+            msg_pdu = f'read {frm.quantity} bit(s) at @ 0x{frm.address:04x} ({frm.address})'
         else:
-            # response
-            try:
-                read_bytes, = struct.unpack('>B', self.frm_now.pdu[1:2])
-                bytes_l = struct.unpack(f'>{read_bytes}B', self.frm_now.pdu[2:])
-                # format bytes_l as bits list str: "1, 0, 1, 0 ..."
-                bits_l = []
-                for byte_val in bytes_l:
-                    for n in range(8):
-                        bits_l.append('1' if (byte_val & (1 << n)) else '0')
-                bits_str = ', '.join(bits_l)
-                msg_pdu = f'return {len(bits_l)} bit(s) (read bytes={read_bytes}) data: [{bits_str}]'
-            except struct.error:
-                msg_pdu = 'bad PDU format'
-        # format message
-        return f'{self.frm_now.is_request_as_str}: {msg_pdu}'
+            msg_pdu = f'return {len(frm.values)} bit(s) (read bytes={frm.bytes_nb}) ' \
+                      f'data: [{self._fmt_bits_as_str(frm.values)}]'
+        return f'{frm.is_request_as_str}: {msg_pdu}'
 
     def _msg_read_words(self) -> str:
-        # override request or response flag
-        # 8 bytes long frame -> request, other length -> response
-        self.frm_now.is_request = len(self.frm_now) == 8
-        # decode frame PDU
-        if self.frm_now.is_request:
-            # request
-            try:
-                reg_addr, regs_nb = struct.unpack('>HH', self.frm_now.pdu[1:])
-                msg_pdu = f'read {regs_nb} register(s) at @ 0x{reg_addr:04x} ({reg_addr})'
-            except struct.error:
-                msg_pdu = 'bad PDU format'
+        frm = self.frm_now
+        if frm.is_request:
+            msg_pdu = f'read {frm.quantity} register(s) at @ 0x{frm.address:04x} ({frm.address})'
         else:
-            # response
-            try:
-                read_bytes, = struct.unpack('>B', self.frm_now.pdu[1:2])
-                regs_l = struct.unpack(f'>{read_bytes // 2}H', self.frm_now.pdu[2:])
-                regs_str = ', '.join([f'{r:d}' for r in regs_l])
-                msg_pdu = f'return {len(regs_l)} register(s) (read bytes={read_bytes}) data: [{regs_str}]'
-            except struct.error:
-                msg_pdu = 'bad PDU format'
-        # format message
-        return f'{self.frm_now.is_request_as_str}: {msg_pdu}'
+            msg_pdu = f'return {len(frm.values)} register(s) (read bytes={frm.bytes_nb}) ' \
+                      f'data: [{self._fmt_regs_as_str(frm.values)}]'
+        return f'{frm.is_request_as_str}: {msg_pdu}'
 
     def _msg_write_single_coil(self) -> str:
-        # request and response
-        try:
-            bit_addr, bit_value, _ = struct.unpack('>HBB', self.frm_now.pdu[1:])
-            bit_value_str = '1' if bit_value == 0xFF else '0'
-            msg_pdu = f'write {bit_value_str} to coil at @ 0x{bit_addr:04x} ({bit_addr})'
-            if not self.frm_now.is_request:
-                msg_pdu += ' OK'
-        except struct.error:
-            msg_pdu = 'bad PDU format'
-        # format message
-        return f'{self.frm_now.is_request_as_str}: {msg_pdu}'
+        frm = self.frm_now
+        ok_str = '' if frm.is_request else ' OK'
+        return f'{frm.is_request_as_str}: write {frm.values[0]} to coil at @ 0x{frm.address:04x} ({frm.address}){ok_str}'
 
     def _msg_write_single_reg(self) -> str:
-        # request and response
-        try:
-            reg_addr, reg_value = struct.unpack('>HH', self.frm_now.pdu[1:])
-            msg_pdu = f'write {reg_value} to register at @ 0x{reg_addr:04x} ({reg_addr})'
-            if not self.frm_now.is_request:
-                msg_pdu += ' OK'
-        except struct.error:
-            msg_pdu = 'bad PDU format'
-        # format message
-        return f'{self.frm_now.is_request_as_str}: {msg_pdu}'
+        frm = self.frm_now
+        ok_str = '' if frm.is_request else ' OK'
+        return f'{frm.is_request_as_str}: ' \
+               f'write {frm.values[0]} to register at @ 0x{frm.address:04x} ({frm.address}){ok_str}'
 
     def _msg_write_multiple_coils(self) -> str:
-        # override request or response flag
-        # 8 bytes long frame -> response, other length -> request
-        self.frm_now.is_request = len(self.frm_now) != 8
-        # decode frame PDU
-        if self.frm_now.is_request:
-            # request
-            try:
-                bit_addr, bits_nb, bytes_nb = struct.unpack('>HHb', self.frm_now.pdu[1:6])
-                bytes_l = struct.unpack(f'>{bytes_nb}B', self.frm_now.pdu[6:])
-                # format bytes_l as bits list str: "1, 0, 1, 0 ..."
-                bits_l = []
-                for byte_val in bytes_l:
-                    for n in range(8):
-                        bits_l.append('1' if (byte_val & (1 << n)) else '0')
-                bits_str = ', '.join(bits_l)
-                msg_pdu = f'write {bits_nb} bit(s) at @ 0x{bit_addr:04x} ({bit_addr}) data: [{bits_str}]'
-            except struct.error:
-                msg_pdu = 'bad PDU format'
+        frm = self.frm_now
+        msg_pdu = f'write {frm.quantity} bit(s) at @ 0x{frm.address:04x} ({frm.address})'
+        if frm.is_request:
+            msg_pdu = f'{msg_pdu} data: [{self._fmt_bits_as_str(frm.values)}]'
         else:
-            # response
-            try:
-                bit_addr, bits_nb = struct.unpack('>HH', self.frm_now.pdu[1:5])
-                msg_pdu = f'write {bits_nb} bit(s) at @ 0x{bit_addr:04x} ({bit_addr}) OK'
-            except struct.error:
-                msg_pdu = 'bad PDU format'
-        # format message
-        return f'{self.frm_now.is_request_as_str}: {msg_pdu}'
+            msg_pdu = f'{msg_pdu} OK'
+        return f'{frm.is_request_as_str}: {msg_pdu}'
 
     def _msg_write_multiple_registers(self) -> str:
-        # override request or response flag
-        # 8 bytes long frame -> response, other length -> request
-        self.frm_now.is_request = len(self.frm_now) != 8
-        # decode frame PDU
-        if self.frm_now.is_request:
-            # request
-            try:
-                reg_addr, regs_nb, bytes_nb = struct.unpack('>HHb', self.frm_now.pdu[1:6])
-                regs_l = struct.unpack(f'>{bytes_nb//2}H', self.frm_now.pdu[6:])
-                regs_str = ', '.join([str(b) for b in regs_l])
-                msg_pdu = f'write {regs_nb} register(s) at @ 0x{reg_addr:04x} ({reg_addr}) data: [{regs_str}]'
-            except struct.error:
-                msg_pdu = 'bad PDU format'
+        frm = self.frm_now
+        msg_pdu = f'write {frm.quantity} register(s) at @ 0x{frm.address:04x} ({frm.address})'
+        if frm.is_request:
+            msg_pdu = f'{msg_pdu} data: [{self._fmt_regs_as_str(frm.values)}]'
         else:
-            # response
-            try:
-                reg_addr, regs_nb = struct.unpack('>HH', self.frm_now.pdu[1:5])
-                msg_pdu = f'write {regs_nb} register(s) at @ 0x{reg_addr:04x} ({reg_addr}) OK'
-            except struct.error:
-                msg_pdu = 'bad PDU format'
-        # format message
-        return f'{self.frm_now.is_request_as_str}: {msg_pdu}'
+            msg_pdu = f'{msg_pdu} OK'
+        return f'{frm.is_request_as_str}: {msg_pdu}'
+
+    def _msg_flx_response(self, period: str) -> str:
+        frm = self.frm_now
+        return f'{frm.is_request_as_str}: {period} data is {self._fmt_tags_as_str(frm.tags)} (b_qty={frm.b_qty})'
 
     def _msg_hourly_station_data(self) -> str:
-        # override request or response flag
-        # 9 bytes long frame -> request, other length -> response
-        self.frm_now.is_request = len(self.frm_now) == 9
-        # decode frame PDU
-        if self.frm_now.is_request:
-            # request
-            try:
-                hour_id, b_qty = struct.unpack('>IB', self.frm_now.pdu[1:6])
-                hour_dt = FLX_ORIGIN_DT + timedelta(hours=hour_id)
-                msg_pdu = f"hourly data from {hour_dt.strftime('%Hh %d/%m/%Y')} (h_id={hour_id}, b_qty={b_qty})"
-            except (struct.error, OverflowError) as e:
-                msg_pdu = f'bad PDU format (error: "{e}")'
-        else:
-            # response
-            try:
-                b_qty = self.frm_now.pdu[1]
-                tags_d = self._ext_tags(self.frm_now.pdu[2:])
-                tags_str = self._fmt_tags_as_str(tags_d)
-                msg_pdu = f'hourly data is {tags_str} (b_qty={b_qty})'
-            except (FrameAnalyzer._InternalError, IndexError) as e:
-                msg_pdu = f'bad PDU format (error: "{e}")'
-        # format message
-        return f'{self.frm_now.is_request_as_str}: {msg_pdu}'
+        frm = self.frm_now
+        if not frm.is_request:
+            return self._msg_flx_response('hourly')
+        return f"{frm.is_request_as_str}: hourly data from {frm.dt.strftime('%Hh %d/%m/%Y')} " \
+               f"(h_id={frm.time_id}, b_qty={frm.b_qty})"
 
     def _msg_daily_station_data(self) -> str:
-        # override request or response flag
-        # 9 bytes long frame -> request, other length -> response
-        self.frm_now.is_request = len(self.frm_now) == 9
-        # decode frame PDU
-        if self.frm_now.is_request:
-            # request
-            try:
-                day_id, b_qty = struct.unpack('>IB', self.frm_now.pdu[1:6])
-                day_dt = FLX_ORIGIN_DT + timedelta(days=day_id)
-                msg_pdu = f"daily data from {day_dt.strftime('%d/%m/%Y')} (d_id={day_id}, b_qty={b_qty})"
-            except (struct.error, OverflowError) as e:
-                msg_pdu = f'bad PDU format (error: "{e}")'
-        else:
-            # response
-            try:
-                b_qty = self.frm_now.pdu[1]
-                tags_d = self._ext_tags(self.frm_now.pdu[2:])
-                tags_str = self._fmt_tags_as_str(tags_d)
-                msg_pdu = f'daily data is {tags_str} (b_qty={b_qty})'
-            except (FrameAnalyzer._InternalError, IndexError) as e:
-                msg_pdu = f'bad PDU format (error: "{e}")'
-        # format message
-        return f'{self.frm_now.is_request_as_str}: {msg_pdu}'
+        frm = self.frm_now
+        if not frm.is_request:
+            return self._msg_flx_response('daily')
+        return f"{frm.is_request_as_str}: daily data from {frm.dt.strftime('%d/%m/%Y')} " \
+               f"(d_id={frm.time_id}, b_qty={frm.b_qty})"
 
     def _msg_hourly_line_data(self) -> str:
-        # override request or response flag
-        # 10 bytes long frame -> request, other length -> response
-        self.frm_now.is_request = len(self.frm_now) == 10
-        # decode frame PDU
-        if self.frm_now.is_request:
-            # request
-            try:
-                hour_id, line_id, b_qty = struct.unpack('>IBB', self.frm_now.pdu[1:7])
-                hour_dt = FLX_ORIGIN_DT + timedelta(hours=hour_id)
-                msg_pdu = f"hourly data for line {line_id} from {hour_dt.strftime('%Hh %d/%m/%Y')} (h_id={hour_id}, b_qty={b_qty})"
-            except (struct.error, OverflowError) as e:
-                msg_pdu = f'bad PDU format (error: "{e}")'
-        else:
-            # response
-            try:
-                b_qty = self.frm_now.pdu[1]
-                tags_d = self._ext_tags(self.frm_now.pdu[2:])
-                tags_str = self._fmt_tags_as_str(tags_d)
-                msg_pdu = f'hourly data is {tags_str} (b_qty={b_qty})'
-            except (FrameAnalyzer._InternalError, IndexError) as e:
-                msg_pdu = f'bad PDU format (error: "{e}")'
-        # format message
-        return f'{self.frm_now.is_request_as_str}: {msg_pdu}'
+        frm = self.frm_now
+        if not frm.is_request:
+            return self._msg_flx_response('hourly')
+        return f"{frm.is_request_as_str}: hourly data for line {frm.line_id} from {frm.dt.strftime('%Hh %d/%m/%Y')} " \
+               f"(h_id={frm.time_id}, b_qty={frm.b_qty})"
 
     def _msg_daily_line_data(self) -> str:
-        # override request or response flag
-        # 10 bytes long frame -> request, other length -> response
-        self.frm_now.is_request = len(self.frm_now) == 10
-        # decode frame PDU
-        if self.frm_now.is_request:
-            # request
-            try:
-                day_id, line_id, b_qty = struct.unpack('>IBB', self.frm_now.pdu[1:7])
-                day_dt = FLX_ORIGIN_DT + timedelta(days=day_id)
-                msg_pdu = f"daily data for line {line_id} from {day_dt.strftime('%d/%m/%Y')} (d_id={day_id}, b_qty={b_qty})"
-            except (struct.error, OverflowError) as e:
-                msg_pdu = f'bad PDU format (error: "{e}")'
-        else:
-            # response
-            try:
-                b_qty = self.frm_now.pdu[1]
-                tags_d = self._ext_tags(self.frm_now.pdu[2:])
-                tags_str = self._fmt_tags_as_str(tags_d)
-                msg_pdu = f'daily data is {tags_str} (b_qty={b_qty})'
-            except (FrameAnalyzer._InternalError, IndexError) as e:
-                msg_pdu = f'bad PDU format (error: "{e}")'
-        # format message
-        return f'{self.frm_now.is_request_as_str}: {msg_pdu}'
+        frm = self.frm_now
+        if not frm.is_request:
+            return self._msg_flx_response('daily')
+        return f"{frm.is_request_as_str}: daily data for line {frm.line_id} from {frm.dt.strftime('%d/%m/%Y')} " \
+               f"(d_id={frm.time_id}, b_qty={frm.b_qty})"
 
     def func_name_by_id(self, func_id: int) -> str:
         """ Translate function code to name or hex representation. """
@@ -445,50 +251,99 @@ class FrameAnalyzer:
         except KeyError:
             return f'0x{func_id:02x}'
 
-    def analyze(self, frame: bytes):
+    def format(self) -> str:
+        """ Return the analyze message of the current frame. """
+        frm = self.frm_now
+        # check frame validity
+        if not frm.is_valid:
+            # don't analyze invalid frame
+            return f'[{self.nb_frame:>6}] {self._msg_err()}'
+        # message header
+        header = f'[{self.nb_frame:>6}] slave {frm.slv_addr} "{self.func_name_by_id(frm.func_code)}" '
+        if frm.is_except:
+            msg_pdu = self._msg_except()
+        elif frm.error:
+            msg_pdu = f'{frm.is_request_as_str}: {frm.error}'
+        else:
+            # if no except, call the ad-hoc function, if none exists, send an "illegal function" message
+            try:
+                msg_pdu = self._func_methods[frm.func_code]()
+            except KeyError:
+                msg_pdu = self._msg_func_unknown()
+        return header + msg_pdu
+
+    def analyze(self, frame: bytes, t_start: float = 0.0, t_end: float = 0.0,
+                crc_ok: Optional[bool] = None) -> DecodedFrame:
         """ Process current frame and produce a message to stdout. """
         # update frame counter (keep in front since debug raw use it too)
         self.nb_frame += 1
         # debug: log raw frame
-        logger.debug(f'[{self.nb_frame:>6}] frame dump: {frame.hex(":")}')
-        # init ModbusRTUFrame
-        self.frm_now = ModbusRTUFrame(frame)
-        # init msg with first part header
-        msg = f'[{self.nb_frame:>6}] '
-        # check frame validity
-        if not self.frm_now.is_valid:
-            # don't analyze invalid frame
-            msg += self._msg_err()
-        else:
-            # add 2nd part header to msg
-            f_name = self.func_name_by_id(self.frm_now.func_code)
-            msg += f'slave {self.frm_now.slv_addr} "{f_name}" '
-            # fix default request/response flag (can be override in _msg_xxxx func methods)
-            slv_addr_chg = self.frm_now.slv_addr != self.frm_last.slv_addr
-            func_code_chg = self.frm_now.func_code != self.frm_last.func_code
-            self.frm_now.is_request = True if slv_addr_chg or func_code_chg else not self.frm_last.is_request
-            # check exception status
-            if self.frm_now.func_code >= 0x80:
-                # on except
-                msg += self._msg_except()
-            else:
-                # if no except, call the ad-hoc function, if none exists, send an "illegal function" exception
-                try:
-                    msg += self._func_methods[self.frm_now.func_code]()
-                except KeyError:
-                    msg += self._msg_func_unknown()
-            # keep current frame (with good CRC) for next analyze
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f'[{self.nb_frame:>6}] frame dump: {frame.hex(":")}')
+        # decode frame (request/response flag is guessed from the last valid frame)
+        self.frm_now = decode_frame(frame, prev=self.frm_last, t_start=t_start, t_end=t_end, crc_ok=crc_ok)
+        # keep current frame (with good CRC) for next analyze
+        if self.frm_now.is_valid:
             self.frm_last = self.frm_now
+        # pair requests and responses
+        transaction = self.tracker.feed(self.frm_now)
+        if transaction and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f'[{self.nb_frame:>6}] slave {transaction.slv_addr} response latency is '
+                         f'{transaction.latency_s * 1000:.3f} ms')
         # show message
-        logger.info(msg)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(self.format())
+        return self.frm_now
+
+
+# some functions
+def parse_time(value: str) -> float:
+    """Convert a unix timestamp or an ISO 8601 datetime (like 2023-10-25T14:00) string to a timestamp."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def replay(analyzer: FrameAnalyzer, path: str, t_from: Optional[float] = None, speed: float = 0.0,
+           slaves: Optional[set] = None, exporter: Optional[TransactionsExporter] = None):
+    """ Analyze the frames of a capture file, at original speed (x speed) or as fast as possible (speed=0). """
+    with CaptureReader(path) as reader:
+        logger.debug(f'replay {len(reader)} frames of "{path}" (indexed: {reader.is_indexed})')
+        t0_frame = None
+        t0_now = 0.0
+        for frame in reader.frames(t_from=t_from, slaves=slaves):
+            # keep original frames timing
+            if speed:
+                if t0_frame is None:
+                    t0_frame, t0_now = frame.t_start, time.monotonic()
+                delay = (frame.t_start - t0_frame) / speed - (time.monotonic() - t0_now)
+                if delay > 0:
+                    sys.stdout.flush()
+                    time.sleep(delay)
+            analyzer.analyze(frame.raw, t_start=frame.t_start, t_end=frame.t_end, crc_ok=frame.crc_ok)
+            if exporter:
+                exporter.update()
+    sys.stdout.flush()
 
 
 if __name__ == '__main__':
     # parse args
     parser = argparse.ArgumentParser()
-    parser.add_argument('pub_key', type=str, help='redis publish key (like ch1:frames)')
+    parser.add_argument('pub_key', type=str, nargs='?', default=None, help='redis publish key (like ch1:frames)')
+    parser.add_argument('-r', '--replay', type=str, default=None, help='analyze frames of this capture file')
+    parser.add_argument('-f', '--from', dest='t_from', type=parse_time, default=None,
+                        help='replay from this time (timestamp or ISO datetime)')
+    parser.add_argument('-s', '--speed', type=float, default=0.0,
+                        help='replay speed factor (like 1.0 for original timing, default is as fast as possible)')
+    parser.add_argument('-a', '--slaves', type=str, default=None, help='replay only these slaves (like 1,5,7)')
+    parser.add_argument('-x', '--stream', action='store_true', help='read frames from a redis stream (default is pub/sub)')
+    parser.add_argument('-m', '--metrics_port', type=int, default=None,
+                        help='share transactions metrics with prometheus on this HTTP port')
     parser.add_argument('-d', '--debug', action='store_true', help='set debug mode')
     args = parser.parse_args()
+    if not args.pub_key and not args.replay:
+        parser.error('a redis publish key or a capture file to replay is required')
     # init logging
     logging.basicConfig(stream=sys.stdout,
                         format='%(asctime)s %(levelname)-8s %(message)s',
@@ -501,22 +356,63 @@ if __name__ == '__main__':
     # logger.addHandler(logging.StreamHandler(sys.stdout))
     # init frame analyser
     frame_analyzer = FrameAnalyzer()
+    # init prometheus exporter
+    exporter = None
+    if args.metrics_port:
+        exporter = TransactionsExporter(frame_analyzer.tracker, port=args.metrics_port).start()
+    # replay mode
+    if args.replay:
+        try:
+            slaves = {int(slv_addr) for slv_addr in args.slaves.split(',')} if args.slaves else None
+            replay(frame_analyzer, args.replay, t_from=args.t_from, speed=args.speed, slaves=slaves,
+                   exporter=exporter)
+        except BrokenPipeError:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            exit(1)
+        except (OSError, ValueError) as e:
+            logger.error(f'unable to replay "{args.replay}": {e!r}')
+            exit(2)
+        except KeyboardInterrupt:
+            pass
+        exit(0)
     # startup message
-    logger.debug(f'analyze modbus frames from "{args.pub_key}" redis channel')
+    logger.debug(f'analyze modbus frames from "{args.pub_key}" redis {"stream" if args.stream else "channel"}')
     # redis DB loop (ensure retry on except)
     while True:
         try:
             # connect to redis DB
             rdb = redis.StrictRedis()
-            # subscribe to pub_key channel
-            rps = rdb.pubsub()
-            rps.subscribe(args.pub_key)
-            # process messages
-            for item in rps.listen():
-                if item.get('type') == 'message':
-                    frame_analyzer.analyze(item.get('data', b''))
+            if args.stream:
+                # read new entries of pub_key stream
+                last_id = '$'
+                while True:
+                    for _key, entries in rdb.xread({args.pub_key: last_id}, count=1_000, block=0):
+                        for last_id, fields in entries:
+                            frame_analyzer.analyze(fields.get(b'raw', b''), t_start=float(fields.get(b't_start', 0.0)),
+                                                   t_end=float(fields.get(b't_end', 0.0)))
+                    if exporter:
+                        exporter.update()
                     # ensure "BrokenPipeError" is trig in this code block
                     sys.stdout.flush()
+            else:
+                # subscribe to pub_key channel
+                rps = rdb.pubsub()
+                rps.subscribe(args.pub_key)
+                # process messages
+                for item in rps.listen():
+                    if item.get('type') == 'message':
+                        # messages carry capture timestamps (receive time is the one of a publisher batch)
+                        try:
+                            raw, t_start, t_end = unpack_pubsub(item.get('data', b''))
+                        except ValueError as e:
+                            logger.warning(f'skip bad message: {e}')
+                            continue
+                        frame_analyzer.analyze(raw, t_start=t_start, t_end=t_end)
+                        if exporter:
+                            exporter.update()
+                        # ensure "BrokenPipeError" is trig in this code block
+                        sys.stdout.flush()
         except BrokenPipeError:
             # avoid "BrokenPipeError" when connect stdout to a died process
             devnull = os.open(os.devnull, os.O_WRONLY)
@@ -5,87 +5,62 @@
 import argparse
 import logging
 import sys
+from typing import Optional
 # sudo pip install pyserial==3.4
 from serial import Serial, serialutil
 # sudo apt install python3-redis
 import redis
+from mbus_lib import MODE_PUBSUB, MODE_STREAM, CapturedFrame, FrameCapture, RedisPublisher, crc16
+from mbus_lib.capfile import CaptureWriter
 
 
-# some functions
-def crc16(frame: bytes):
-    """Compute CRC16.
-
-    :param frame: frame
-    :type frame: bytes
-    :returns: CRC16
-    :rtype: int
-    """
-    crc = 0xFFFF
-    for item in frame:
-        next_byte = item
-        crc ^= next_byte
-        for _ in range(8):
-            lsb = crc & 1
-            crc >>= 1
-            if lsb:
-                crc ^= 0xA001
-    return crc
+# some const
+STATS_PERIOD_S = 60.0
 
 
 # some class
 class FrameHandler:
     """ Modbus frame processing. """
 
-    def __init__(self):
+    def __init__(self, publisher: Optional[RedisPublisher] = None, writer: Optional[CaptureWriter] = None):
         # public
         self.f_counter = 0
+        self.publisher = publisher
+        self.writer = writer
 
-    def process_frame(self, frame: bytes):
+    def process_frame(self, frame: CapturedFrame):
         # update frame counter
         self.f_counter += 1
+        # keep a copy in capture file
+        if self.writer:
+            self.writer.write(frame)
         # current or debug mode
-        if not args.debug:
-            rdb.publish(args.pub_key, frame)
+        if self.publisher:
+            # queue frame, redis I/O occur in publisher thread
+            self.publisher.publish(frame)
         else:
             # check CRC
-            crc_ok = crc16(frame) == 0
+            crc_ok = crc16(frame.raw) == 0
             crc_status = 'OK' if crc_ok else 'ERROR'
             # log frame data
-            logger.debug(f'dump #{self.f_counter:<6} CRC {crc_status:5} {frame.hex(":")}')
+            logger.debug(f'dump #{self.f_counter:<6} @{frame.t_start:.6f} CRC {crc_status:5} {frame.raw.hex(":")}')
 
 
 class ModbusSerialWorker:
     """ A serial worker to manage I/O with RTU devices. """
 
-    def __init__(self, port: Serial, handler: FrameHandler, eof_ms: float = 50.0):
+    def __init__(self, port: Serial, handler: FrameHandler, eof_ms: Optional[float] = None):
         # public
         self.serial_port = port
         self.handler = handler
         self.eof_ms = eof_ms
+        # bulk reads capture engine (default end of frame is the 3.5 chars modbus silence)
+        self.capture = FrameCapture(port, on_frame=self.handler.process_frame,
+                                    eof_s=eof_ms / 1000 if eof_ms is not None else None)
 
     def loop(self):
         """ Serial worker main loop. """
-        # flush rx buffer
-        self.serial_port.reset_input_buffer()
-        # receive loop
-        while True:
-            # wait for first byte of frame
-            self.serial_port.timeout = None
-            frame = self.serial_port.read(1)
-            # if ok, wait for the remaining
-            if frame:
-                # wait for next bytes of data until end of frame delay
-                self.serial_port.timeout = self.eof_ms / 1000
-                while True:
-                    f_chunk = self.serial_port.read(1)
-                    if f_chunk:
-                        frame += f_chunk
-                        # limit size to 256 bytes
-                        frame = frame[-256:]
-                    else:
-                        break
-                # call frame handler
-                self.handler.process_frame(frame)
+        self.capture.loop()
 
 
 if __name__ == '__main__':
@@ -96,7 +71,14 @@ if __name__ == '__main__':
     parser.add_argument('-b', '--baudrate', type=int, default=9600, help='serial rate (default is 9600)')
     parser.add_argument('-p', '--parity', type=str, default='N', help='serial parity (default is "N")')
     parser.add_argument('-s', '--stop', type=float, default=1, help='serial stop bits (default is 1)')
-    parser.add_argument('-e', '--eof_ms', type=float, default=6.0, help='end of frame delay (default is 6 ms)')
+    parser.add_argument('-e', '--eof_ms', type=float, default=None,
+                        help='end of frame delay (default is 3.5 chars)')
+    parser.add_argument('-x', '--stream', action='store_true', help='add frames to a redis stream (default is pub/sub)')
+    parser.add_argument('-m', '--maxlen', type=int, default=100_000, help='redis stream max length (default is 100000)')
+    parser.add_argument('-q', '--queue', type=int, default=10_000, help='max frames waiting for redis (default is 10000)')
+    parser.add_argument('-w', '--write', type=str, default=None, help='append frames to this capture file')
+    parser.add_argument('-z', '--codec', type=str, default='deflate', choices=['none', 'deflate', 'zstd'],
+                        help='capture file blocks compression (default is "deflate")')
     parser.add_argument('-d', '--debug', action='store_true', help='set debug mode')
     args = parser.parse_args()
     # init logging
@@ -104,15 +86,28 @@ if __name__ == '__main__':
                         format='%(asctime)s %(levelname)-8s %(message)s',
                         level=logging.DEBUG if args.debug else logging.INFO)
     logger = logging.getLogger(__name__)
+    writer = None
     try:
         # init redis DB
         rdb = redis.StrictRedis()
         # init serial port
-        logging.info(f'start serial port monitor {args.device} at {args.baudrate} bauds (eof = {args.eof_ms:.3f} ms)')
-        logging.info(f'relay modbus frames to "{args.pub_key}" redis channel')
+        logging.info(f'start serial port monitor {args.device} at {args.baudrate} bauds')
+        pub_mode = MODE_STREAM if args.stream else MODE_PUBSUB
+        logging.info(f'relay modbus frames to "{args.pub_key}" redis {"stream" if args.stream else "channel"}')
         serial_port = Serial(port=args.device, baudrate=args.baudrate, parity=args.parity, stopbits=args.stop)
+        # init redis publisher (in debug mode frames are dump to stdout, not relayed to redis)
+        publisher = None
+        if not args.debug:
+            publisher = RedisPublisher(rdb, args.pub_key, mode=pub_mode, max_queue=args.queue,
+                                       stream_maxlen=args.maxlen, stats_period_s=STATS_PERIOD_S).start()
+        # init capture file
+        if args.write:
+            logging.info(f'append modbus frames to capture file "{args.write}"')
+            writer = CaptureWriter(args.write, codec=args.codec)
         # init serial worker
-        serial_worker = ModbusSerialWorker(port=serial_port, handler=FrameHandler(), eof_ms=args.eof_ms)
+        serial_worker = ModbusSerialWorker(port=serial_port, handler=FrameHandler(publisher, writer),
+                                           eof_ms=args.eof_ms)
+        logging.info(f'end of frame delay is {serial_worker.capture.eof_s * 1000:.3f} ms')
         serial_worker.loop()
     except serialutil.SerialException as e:
         logger.error(f'serial device error: {e:r}')
@@ -120,3 +115,9 @@ if __name__ == '__main__':
     except redis.RedisError as e:
         logging.error(f'redis error occur: {e!r}')
         exit(2)
+    except KeyboardInterrupt:
+        exit(0)
+    finally:
+        # write last block and index of capture file
+        if writer:
+            writer.close()
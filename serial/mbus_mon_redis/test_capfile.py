@@ -0,0 +1,151 @@
+import struct
+
+import pytest
+
+from mbus_lib.capfile import FILE_MAGIC, FILE_VERSION, INDEX_MAGIC, CaptureReader, CaptureWriter
+from mbus_lib.capture import CapturedFrame
+from mbus_lib.crc import add_crc
+
+T0 = 1_700_000_000.0
+
+
+def make_frames(nb: int, slaves: tuple = (1, 2, 3)) -> list:
+    """Request frames 10 ms apart, slave addresses taken in turn from slaves."""
+    frames = []
+    for i in range(nb):
+        raw = add_crc(bytes([slaves[i % len(slaves)], 0x03, 0x00, i & 0xFF, 0x00, 0x02]))
+        frames.append(CapturedFrame(raw=raw, t_start=T0 + i * 0.01, t_end=T0 + i * 0.01 + 0.004))
+    return frames
+
+
+def read_all(path, **kwargs) -> list:
+    with CaptureReader(str(path)) as reader:
+        return [(f.raw, f.t_start, f.t_end, f.truncated, f.crc_ok) for f in reader.frames(**kwargs)]
+
+
+def as_tuples(frames: list, crc_ok: bool = True) -> list:
+    return [(f.raw, f.t_start, f.t_end, f.truncated, crc_ok) for f in frames]
+
+
+@pytest.mark.parametrize('codec', [None, 'deflate'])
+def test_round_trip(tmp_path, codec):
+    path = tmp_path / 'cap.mbc'
+    frames = make_frames(100)
+    with CaptureWriter(str(path), codec=codec, block_frames=16) as writer:
+        for frame in frames:
+            writer.write(frame)
+    assert read_all(path) == as_tuples(frames)
+    with CaptureReader(str(path)) as reader:
+        assert reader.is_indexed
+        assert len(reader) == 100
+        assert [block.nb_frames for block in reader.blocks] == [16] * 6 + [4]
+        assert (reader.t_first, reader.t_last) == (frames[0].t_start, frames[-1].t_end)
+
+
+def test_flags(tmp_path):
+    path = tmp_path / 'cap.mbc'
+    good = make_frames(1)[0]
+    bad = CapturedFrame(raw=good.raw[:-1] + b'\x00', t_start=T0 + 1, t_end=T0 + 1.004, truncated=True)
+    known = CapturedFrame(raw=b'\x01\x03', t_start=T0 + 2, t_end=T0 + 2.001, crc_ok=True)
+    with CaptureWriter(str(path)) as writer:
+        for frame in (good, bad, known):
+            writer.write(frame)
+    assert [(truncated, crc_ok) for *_, truncated, crc_ok in read_all(path)] == [(False, True), (True, False),
+                                                                                  (False, True)]
+
+
+def test_layout(tmp_path):
+    path = tmp_path / 'cap.mbc'
+    with CaptureWriter(str(path), codec=None, block_frames=4) as writer:
+        for frame in make_frames(10):
+            writer.write(frame)
+    data = path.read_bytes()
+    # file header, first block header just after it
+    assert struct.unpack_from('<6sH', data) == (FILE_MAGIC, FILE_VERSION)
+    magic, codec, nb_frames = struct.unpack_from('<4sBxxxI', data, 8)
+    assert (magic, codec, nb_frames) == (b'MBLK', 0, 4)
+    # trailer: index offset, blocks number, magic (each index entry is a block offset and a copy of its header)
+    index_offset, nb_blocks, index_magic = struct.unpack_from('<QI8s', data, len(data) - 20)
+    assert (nb_blocks, index_magic) == (3, INDEX_MAGIC)
+    assert struct.unpack_from('<Q', data, index_offset) == (8,)
+    assert data[index_offset + 8:index_offset + 12] == b'MBLK'
+
+
+def test_block_time_span(tmp_path):
+    path = tmp_path / 'cap.mbc'
+    with CaptureWriter(str(path), block_s=0.1) as writer:
+        for frame in make_frames(50):
+            writer.write(frame)
+    with CaptureReader(str(path)) as reader:
+        assert len(reader) == 50
+        assert all(block.t_last - block.t_first <= 0.1 for block in reader.blocks)
+
+
+def test_append(tmp_path):
+    path = tmp_path / 'cap.mbc'
+    frames = make_frames(60)
+    with CaptureWriter(str(path), block_frames=16) as writer:
+        for frame in frames[:30]:
+            writer.write(frame)
+    # reopen: the index is removed, then rewritten with the blocks of both sessions
+    with CaptureWriter(str(path), block_frames=16) as writer:
+        assert len(writer.blocks) == 2
+        for frame in frames[30:]:
+            writer.write(frame)
+    with CaptureReader(str(path)) as reader:
+        assert reader.is_indexed
+        assert len(reader.blocks) == 4
+    assert read_all(path) == as_tuples(frames)
+
+
+def test_crash_recovery(tmp_path):
+    path = tmp_path / 'cap.mbc'
+    frames = make_frames(40)
+    with CaptureWriter(str(path), block_frames=16) as writer:
+        for frame in frames:
+            writer.write(frame)
+    with CaptureReader(str(path)) as reader:
+        end_of_blocks = reader.blocks[-1].payload_offset + reader.blocks[-1].stored_size
+        last_block_offset = reader.blocks[-1].offset
+    # writer crash: no index and a partially written block at end of file
+    data = path.read_bytes()
+    path.write_bytes(data[:end_of_blocks] + data[last_block_offset:last_block_offset + 40])
+    with CaptureReader(str(path)) as reader:
+        assert not reader.is_indexed
+        assert len(reader) == 40
+    assert read_all(path) == as_tuples(frames)
+    # a writer reopening the file drops the damaged block before appending
+    more = make_frames(45)[40:]
+    with CaptureWriter(str(path), block_frames=16) as writer:
+        for frame in more:
+            writer.write(frame)
+    with CaptureReader(str(path)) as reader:
+        assert reader.is_indexed
+    assert read_all(path) == as_tuples(frames + more)
+
+
+def test_seek_and_filter(tmp_path):
+    path = tmp_path / 'cap.mbc'
+    frames = make_frames(100, slaves=(1, 2))
+    # slave 7 only in the last block
+    frames += [CapturedFrame(raw=add_crc(b'\x07\x03\x00\x00\x00\x01'), t_start=T0 + 2.0, t_end=T0 + 2.004)]
+    with CaptureWriter(str(path), block_frames=10) as writer:
+        for frame in frames:
+            writer.write(frame)
+    t_from, t_to = T0 + 0.255, T0 + 0.5
+    assert read_all(path, t_from=t_from) == as_tuples([f for f in frames if f.t_start >= t_from])
+    assert read_all(path, t_from=t_from, t_to=t_to) == as_tuples([f for f in frames if t_from <= f.t_start <= t_to])
+    assert read_all(path, slaves={2}) == as_tuples([f for f in frames if f.raw[0] == 2])
+    assert read_all(path, slaves={7}) == as_tuples(frames[-1:])
+    with CaptureReader(str(path)) as reader:
+        assert [block.has_slave(7) for block in reader.blocks] == [False] * 10 + [True]
+    assert read_all(path, t_from=T0 + 10.0) == []
+
+
+def test_not_a_capture_file(tmp_path):
+    path = tmp_path / 'cap.mbc'
+    path.write_bytes(b'not a capture file')
+    with pytest.raises(ValueError):
+        CaptureReader(str(path))
+    with pytest.raises(ValueError):
+        CaptureWriter(str(path))
@@ -0,0 +1,80 @@
+from mbus_lib import capture
+from mbus_lib.capture import FrameCapture, split_on_crc
+from mbus_lib.crc import add_crc
+
+# a read holding registers request and its response (19200 bauds: one char every 0.52 ms)
+REQUEST = add_crc(bytes.fromhex('010300000002'))
+RESPONSE = add_crc(bytes.fromhex('010304000a000b'))
+
+
+class FakeClock:
+    """A clock set by FakePort reads."""
+
+    def __init__(self):
+        self.t = 0.0
+
+    def time(self) -> float:
+        return 1_700_000_000.0 + self.t
+
+    def monotonic(self) -> float:
+        return self.t
+
+
+class FakePort:
+    """A serial port that replays (read time, chunk) items: each read sets the clock to its read time."""
+    parity = 'N'
+    bytesize = 8
+    stopbits = 1
+    baudrate = 19_200
+    in_waiting = 0
+
+    def __init__(self, clock: FakeClock, reads: list):
+        self.clock = clock
+        self.reads = list(reads)
+        self.timeout = None
+
+    def read(self, _size: int = 1) -> bytes:
+        self.clock.t, chunk = self.reads.pop(0)
+        return chunk
+
+
+def run_capture(monkeypatch, reads: list) -> tuple:
+    clock = FakeClock()
+    monkeypatch.setattr(capture, 'time', clock)
+    port = FakePort(clock, reads)
+    frames = []
+    cap = FrameCapture(port, on_frame=frames.append)
+    while port.reads:
+        cap.poll()
+    return cap, frames
+
+
+def test_stall_mid_frame(monkeypatch):
+    char_s = 10 / 19_200
+    reads = [
+        # first 3 bytes of the request are read as they arrive
+        (3 * char_s, REQUEST[:3]),
+        # then the process stalls 3 ms (more than the 3.5 chars silence): the other bytes wait in the OS buffer
+        (3 * char_s + 3e-3, REQUEST[3:]),
+        (20e-3, b''),
+        # response after a real silence
+        (30e-3, RESPONSE),
+        (45e-3, b''),
+    ]
+    cap, frames = run_capture(monkeypatch, reads)
+    assert [frame.raw for frame in frames] == [REQUEST, RESPONSE]
+    assert cap.split_nb == 0
+
+
+def test_frames_merged_in_one_read(monkeypatch):
+    # a stall longer than the request/response turnaround: both frames come in a single read
+    cap, frames = run_capture(monkeypatch, [(50e-3, REQUEST + RESPONSE), (65e-3, b'')])
+    assert [frame.raw for frame in frames] == [REQUEST, RESPONSE]
+    assert frames[0].t_end == frames[1].t_start
+    assert cap.split_nb == 1
+
+
+def test_bad_crc_not_split():
+    assert split_on_crc(REQUEST[:-1] + b'\x00' + RESPONSE) is None
+    assert split_on_crc(REQUEST) is None
+    assert split_on_crc(REQUEST + RESPONSE + REQUEST) == [REQUEST, RESPONSE, REQUEST]
@@ -0,0 +1,41 @@
+import pytest
+
+from mbus_lib import CapturedFrame, RedisPublisher, pack_pubsub, unpack_pubsub
+from mbus_lib.crc import add_crc
+
+FRAME = CapturedFrame(raw=add_crc(bytes.fromhex('010300000002')), t_start=1_700_000_000.125, t_end=1_700_000_000.129)
+
+
+class FakePipeline:
+    """A redis pipeline that keeps published messages."""
+
+    def __init__(self, published: list):
+        self.published = published
+
+    def publish(self, channel: str, message: bytes):
+        self.published.append((channel, message))
+
+    def execute(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.published = []
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self.published)
+
+
+def test_pubsub_message():
+    assert unpack_pubsub(pack_pubsub(FRAME)) == (FRAME.raw, FRAME.t_start, FRAME.t_end)
+    with pytest.raises(ValueError):
+        unpack_pubsub(FRAME.raw)
+
+
+def test_pubsub_batch_keep_capture_time():
+    # frames of a batch are published together, each message keeps its own capture timestamps
+    rdb = FakeRedis()
+    frames = [CapturedFrame(raw=FRAME.raw, t_start=FRAME.t_start + i, t_end=FRAME.t_end + i) for i in range(3)]
+    RedisPublisher(rdb, 'ch1:frames')._send(frames)
+    assert [unpack_pubsub(message)[1:] for _, message in rdb.published] == [(f.t_start, f.t_end) for f in frames]
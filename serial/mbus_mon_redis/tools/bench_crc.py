@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+""" Compare the CRC16 throughput (in frames/s) of the bit by bit and of the lookup table algorithms. """
+
+import os
+import sys
+import time
+
+# mbus_lib is in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from mbus_lib import add_crc, crc16  # noqa: E402
+
+
+# some functions
+def crc16_bitwise(frame: bytes) -> int:
+    """ The former bit by bit CRC16 of the monitors. """
+    crc = 0xFFFF
+    for next_byte in frame:
+        crc ^= next_byte
+        for _ in range(8):
+            lsb = crc & 1
+            crc >>= 1
+            if lsb:
+                crc ^= 0xA001
+    return crc
+
+
+if __name__ == '__main__':
+    for frame_len in (8, 64, 256):
+        frames = [add_crc(os.urandom(frame_len - 2)) for _ in range(2_000)]
+        for name, func in [('bitwise', crc16_bitwise), ('table', crc16), ('table (memoryview)', crc16)]:
+            items = [memoryview(f) for f in frames] if 'memoryview' in name else frames
+            t_start = time.perf_counter()
+            assert all(func(frame) == 0 for frame in items)
+            t_elapsed = time.perf_counter() - t_start
+            print(f'{frame_len:>3} bytes frames, {name:<18}: {len(frames) / t_elapsed:>10,.0f} frames/s')
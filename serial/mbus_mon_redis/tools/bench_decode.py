@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+""" Measure the Modbus frames decoder throughput (in frames/s) on synthetic frames of the flx_debug tool. """
+
+import logging
+import os
+import sys
+import time
+
+# mbus_lib and redis_to_analyser are in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from flx_debug import ModbusSerialWorker  # noqa: E402
+from mbus_lib import add_crc  # noqa: E402
+from mbus_lib.decode import decode_frame  # noqa: E402
+import redis_to_analyser  # noqa: E402
+
+
+# some class
+class FramesRecorder(ModbusSerialWorker):
+    """ Keep the frames of the flx_debug worker instead of sending them. """
+
+    def __init__(self):
+        super().__init__(port=None)
+        self.frames = []
+
+    def send_frame(self, frame: bytes):
+        self.frames.append(bytes(frame))
+
+
+# some functions
+def synthetic_frames() -> list:
+    """Return a set of valid frames: flx requests/responses and standard read/write functions."""
+    recorder = FramesRecorder()
+    recorder.flx_hourly_station_data()
+    recorder.flx_daily_station_data()
+    recorder.flx_hourly_line_data()
+    recorder.flx_daily_line_data()
+    recorder.flx_auxiliary_hourly_station_data()
+    recorder.flx_detailled_hourly_station_data()
+    frames = recorder.frames
+    frames += [add_crc(bytes([1, 3, 0, 0, 0, 60])), add_crc(bytes([1, 3, 120]) + os.urandom(120)),
+               add_crc(bytes([1, 1, 0, 0, 0, 32])), add_crc(bytes([1, 1, 4]) + os.urandom(4)),
+               add_crc(bytes([1, 16, 0, 0, 0, 8, 16]) + os.urandom(16)), add_crc(bytes([1, 16, 0, 0, 0, 8])),
+               add_crc(bytes([1, 0x83, 2]))]
+    return frames
+
+
+def bench(name: str, frames: list, func):
+    """Print the best of 5 runs throughput of func over all frames."""
+    mb_size = sum(len(frame) for frame in frames) / 1e6
+    t_elapsed = float('inf')
+    for _ in range(5):
+        t_start = time.perf_counter()
+        func(frames)
+        t_elapsed = min(t_elapsed, time.perf_counter() - t_start)
+    print(f'{name:<24}: {len(frames) / t_elapsed:>10,.0f} frames/s ({mb_size / t_elapsed:.1f} MB/s)')
+
+
+def decode_all(frames: list, crc_ok=None):
+    prev = None
+    for frame in frames:
+        frm = decode_frame(frame, prev, crc_ok=crc_ok)
+        if frm.is_valid:
+            prev = frm
+
+
+def analyze_all(frames: list):
+    analyzer = redis_to_analyser.FrameAnalyzer()
+    for frame in frames:
+        analyzer.analyze(frame)
+        analyzer.format()
+
+
+if __name__ == '__main__':
+    # analyzer messages are formatted but not logged
+    redis_to_analyser.logger = logging.getLogger('bench')
+    frames = synthetic_frames() * 5_000
+    bench('decode', frames, decode_all)
+    bench('decode (CRC known)', frames, lambda f: decode_all(f, crc_ok=True))
+    bench('decode and format', frames, analyze_all)
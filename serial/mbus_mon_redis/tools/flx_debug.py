@@ -12,36 +12,15 @@ import sys
 import time
 # sudo pip install pyserial==3.4
 from serial import Serial, serialutil, PARITY_NONE
+# mbus_lib is in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from mbus_lib import add_crc, crc16  # noqa: E402
 
 
 # some consts
 FLX_ORIGIN_DT = datetime(year=1976, month=1, day=1)
 
 
-# some functions
-def crc16(frame: bytes):
-    """Compute CRC16.
-
-    :param frame: frame
-    :type frame: bytes
-    :returns: CRC16
-    :rtype: int
-    """
-    crc = 0xFFFF
-    for next_byte in frame:
-        crc ^= next_byte
-        for _ in range(8):
-            lsb = crc & 1
-            crc >>= 1
-            if lsb:
-                crc ^= 0xA001
-    return crc
-
-
-def add_crc(frame: bytes):
-    return frame + struct.pack('<H', crc16(frame))
-
-
 # some class
 class FakeSerial:
     def __init__(self, **_) -> None:
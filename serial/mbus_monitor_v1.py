@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
 
 from datetime import datetime
+import os
+import sys
 import time
 import serial
+# shared modbus helpers
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mbus_mon_redis'))
+from mbus_lib import crc16  # noqa: E402
 
 
 # some const
@@ -11,19 +16,6 @@ BAUDRATE = 115_200
 
 
 # some functions
-def crc16(data: bytearray):
-    crc = 0xFFFF
-    for byte in bytearray(data):
-        next_byte = byte
-        crc ^= next_byte
-        for i in range(8):
-            lsb = crc & 1
-            crc >>= 1
-            if lsb:
-                crc ^= 0xA001
-    return crc
-
-
 def frame2hex(frame: bytearray):
     return '-'.join([f'{b:02X}' for b in frame])
 
@@ -5,9 +5,13 @@
 import argparse
 from dataclasses import dataclass
 import logging
+import os
 import sys
 # sudo pip install pyserial==3.4
 from serial import Serial, serialutil
+# shared modbus helpers
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mbus_mon_redis'))
+from mbus_lib import crc16  # noqa: E402
 
 
 # data
@@ -18,27 +22,7 @@ class FrameInfo:
     crc_err: int = 0
 
 
-# some functions
-def crc16(frame: bytes):
-    """Compute CRC16.
-
-    :param frame: frame
-    :type frame: bytes
-    :returns: CRC16
-    :rtype: int
-    """
-    crc = 0xFFFF
-    for item in frame:
-        next_byte = item
-        crc ^= next_byte
-        for _ in range(8):
-            lsb = crc & 1
-            crc >>= 1
-            if lsb:
-                crc ^= 0xA001
-    return crc
-
-
+# some class
 class ModbusSerialWorker:
     """ A serial worker to manage I/O with RTU devices. """
 
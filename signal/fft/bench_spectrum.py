@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the streaming spectrum tools on fake compressor vibration data (10 kHz), versus the manual DFT of
+manual_dft.py.
+"""
+
+import time
+
+import numpy as np
+from spectrum import SlidingDFT, SpectrumAnalyzer
+
+# 10 s at 10 kHz: 50 Hz rotation, 1.2 kHz blade pass and noise
+fs = 10_000
+rng = np.random.default_rng(seed=42)
+t = np.arange(10 * fs) / fs
+x = 1.0 * np.sin(2 * np.pi * 50 * t) + 0.3 * np.sin(2 * np.pi * 1200 * t) + rng.normal(scale=0.5, size=len(t))
+
+# manual DFT of one 200 samples segment (as manual_dft.py)
+n = 200
+t_start = time.perf_counter()
+X = np.zeros(n, dtype=complex)
+for k in range(n):
+    for i in range(n):
+        X[k] += x[i] * np.exp(-1j * 2 * np.pi * k * i / n)
+print(f'manual DFT of {n} samples: {(time.perf_counter() - t_start) * 1e3:10.1f} ms')
+
+# STFT/Welch by blocks
+for block_size in (1, 100, 1000):
+    analyzer = SpectrumAnalyzer(fs, nperseg=1024, overlap=0.5)
+    nb = min(len(x), 20_000 * block_size)
+    t_start = time.perf_counter()
+    for i in range(0, nb, block_size):
+        analyzer.update(x[i:i + block_size])
+    rate = nb / (time.perf_counter() - t_start)
+    print(f'SpectrumAnalyzer.update() by {block_size:>5} samples: {rate:12,.0f} samples/s, '
+          f'{analyzer.frames_nb} frames')
+print(f'  band RMS 1150-1250 Hz: {analyzer.band_rms(1150, 1250):.3f} (expected {0.3 / np.sqrt(2):.3f})')
+
+# sliding DFT on 3 target frequencies
+for block_size in (1, 100, 1000):
+    sdft = SlidingDFT(fs, freqs=[50, 100, 1200], n=1000)
+    nb = min(len(x), 20_000 * block_size)
+    t_start = time.perf_counter()
+    for i in range(0, nb, block_size):
+        amps = sdft.update(x[i:i + block_size])
+    rate = nb / (time.perf_counter() - t_start)
+    print(f'SlidingDFT.update() by {block_size:>5} samples: {rate:12,.0f} samples/s, amplitudes {np.round(amps, 2)}')
@@ -0,0 +1,235 @@
+"""
+Streaming spectrum analysis of a live signal (e.g. to monitor vibration bands continuously on a gateway).
+
+- SpectrumAnalyzer: STFT frames and Welch PSD average over a ring buffer, with a real FFT and single-sided
+  amplitude correction (as numpy_fft_basic.py), windows and frequency axes are computed once.
+- SlidingDFT: track the amplitude of a few target frequencies on the last N samples, in O(1) per sample and
+  frequency (instead of a full DFT as manual_dft.py).
+"""
+
+from typing import Optional, Union
+
+import numpy as np
+from numpy.fft import rfft, rfftfreq
+from scipy.signal import get_window
+
+# SlidingDFT updates by blocks of at most this number of samples (bound the memory used)
+SDFT_MAX_BLOCK = 4096
+
+
+def amplitude_scale(window: np.ndarray) -> np.ndarray:
+    """
+    Calculates the factors that turn |rfft(x * window)| into single-sided amplitudes.
+
+    The DC and the Nyquist terms don't have a negative-frequency counterpart: they are not multiplied by 2.
+    """
+    n = len(window)
+    scale = np.full(n // 2 + 1, 2.0 / window.sum())
+    scale[0] /= 2
+    if n % 2 == 0:
+        scale[-1] /= 2
+    return scale
+
+
+def amplitude_spectrum(x: np.ndarray, fs: float, window: Union[str, tuple] = 'hann') -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculates the single-sided amplitude spectrum of a signal.
+
+    Args:
+        x (np.ndarray): The signal.
+        fs (float): The sampling frequency in Hz.
+        window (str or tuple): The window (see scipy.signal.get_window()).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (frequencies in Hz, amplitudes).
+    """
+    win = get_window(window, len(x))
+    return rfftfreq(len(x), d=1 / fs), np.abs(rfft(x * win)) * amplitude_scale(win)
+
+
+class SpectrumAnalyzer:
+    """
+    Compute the spectrum of a live signal on overlapping segments (STFT), and their average PSD (Welch method).
+
+    Only the last nperseg samples are kept in memory.
+    """
+
+    def __init__(self, fs: float, nperseg: int = 1024, overlap: float = 0.5, window: Union[str, tuple] = 'hann',
+                 detrend: bool = True) -> None:
+        """
+        Args:
+            fs (float): The sampling frequency in Hz.
+            nperseg (int): The segment size (in samples).
+            overlap (float): The overlap of two segments (ratio in [0, 1[).
+            window (str or tuple): The window (see scipy.signal.get_window()).
+            detrend (bool): Remove the mean of each segment (as scipy.signal.welch()).
+        """
+        if not 0 <= overlap < 1:
+            raise ValueError('overlap must be in [0, 1[')
+        # public
+        self.fs = fs
+        self.nperseg = nperseg
+        self.hop = max(1, nperseg - round(overlap * nperseg))
+        self.detrend = detrend
+        self.window = get_window(window, nperseg)
+        self.freqs = rfftfreq(nperseg, d=1 / fs)
+        self.amp_scale = amplitude_scale(self.window)
+        self.psd_scale = np.full(len(self.freqs), 2.0 / (fs * (self.window ** 2).sum()))
+        self.psd_scale[0] /= 2
+        if nperseg % 2 == 0:
+            self.psd_scale[-1] /= 2
+        self.frames_nb = 0
+        # private: samples are written twice in the ring (at i and i + nperseg), so the last nperseg samples are
+        # always the contiguous view _ring[_pos:_pos + nperseg]
+        self._ring = np.zeros(2 * nperseg)
+        self._pos = 0
+        self._to_next_frame = nperseg
+        self._psd_sum = np.zeros(len(self.freqs))
+
+    def reset(self) -> None:
+        """Clears the ring buffer and the Welch average."""
+        self._ring[:] = 0.0
+        self._pos = 0
+        self._to_next_frame = self.nperseg
+        self.reset_average()
+
+    def reset_average(self) -> None:
+        """Clears the Welch average only."""
+        self.frames_nb = 0
+        self._psd_sum[:] = 0.0
+
+    def update(self, samples: np.ndarray) -> list[np.ndarray]:
+        """
+        Adds new samples.
+
+        Args:
+            samples (np.ndarray): The new samples (one or more).
+
+        Returns:
+            list[np.ndarray]: The amplitude spectrum of each segment completed by these samples (see freqs).
+        """
+        samples = np.atleast_1d(np.asarray(samples, dtype=float))
+        spectra_l = []
+        done = 0
+        while done < len(samples):
+            take = min(len(samples) - done, self._to_next_frame)
+            self._write(samples[done:done + take])
+            done += take
+            self._to_next_frame -= take
+            if self._to_next_frame == 0:
+                spectra_l.append(self._frame())
+                self._to_next_frame = self.hop
+        return spectra_l
+
+    def welch(self) -> np.ndarray:
+        """
+        Returns the PSD (in unit²/Hz) averaged over all segments since the last reset (NaN if none).
+        """
+        if self.frames_nb == 0:
+            return np.full(len(self.freqs), np.nan)
+        return self._psd_sum / self.frames_nb
+
+    def band_rms(self, f_low: float, f_high: float) -> float:
+        """
+        Returns the RMS value of the signal in the band [f_low, f_high] Hz, from the Welch PSD.
+        """
+        in_band = (self.freqs >= f_low) & (self.freqs <= f_high)
+        return float(np.sqrt(self.welch()[in_band].sum() * self.fs / self.nperseg))
+
+    def _write(self, samples: np.ndarray) -> None:
+        # len(samples) <= nperseg (a segment is always computed before)
+        n, size = self.nperseg, len(samples)
+        first = min(size, n - self._pos)
+        for offset in (0, n):
+            self._ring[offset + self._pos:offset + self._pos + first] = samples[:first]
+            self._ring[offset:offset + size - first] = samples[first:]
+        self._pos = (self._pos + size) % n
+
+    def _frame(self) -> np.ndarray:
+        segment = self._ring[self._pos:self._pos + self.nperseg]
+        if self.detrend:
+            segment = segment - segment.mean()
+        spectrum = np.abs(rfft(segment * self.window))
+        self._psd_sum += spectrum ** 2 * self.psd_scale
+        self.frames_nb += 1
+        return spectrum * self.amp_scale
+
+
+class SlidingDFT:
+    """
+    Track the DFT of the last N samples at some target frequencies, updated in O(1) per sample and frequency.
+
+    The recurrence S(t+1) = e^jw * (S(t) - x(t-N+1)) + x(t+1) * e^-jw(N-1) is exact for any frequency (not only
+    DFT bins), states are recomputed from the window every resync samples to clear rounding errors. The window is
+    a ring buffer: a single sample update doesn't move the N samples (they are only unrolled for block updates).
+    """
+
+    def __init__(self, fs: float, freqs: Union[list, np.ndarray], n: int, resync: Optional[int] = None) -> None:
+        """
+        Args:
+            fs (float): The sampling frequency in Hz.
+            freqs (list): The target frequencies in Hz.
+            n (int): The window size (in samples), the frequency resolution is fs / n.
+            resync (int): Recompute states from the window every resync samples (default to 100 * n).
+        """
+        # public
+        self.fs = fs
+        self.freqs = np.asarray(freqs, dtype=float)
+        self.n = n
+        self.resync = 100 * n if resync is None else resync
+        self.samples_nb = 0
+        # private
+        self._omega = 2 * np.pi * self.freqs / fs
+        self._rot = np.exp(1j * self._omega)
+        self._head = np.exp(-1j * self._omega * n)
+        self._kernel = np.exp(-1j * np.outer(np.arange(n), self._omega))
+        # last n samples as a ring, _pos is the index of the oldest one (and of the next write)
+        self._hist = np.zeros(n)
+        self._pos = 0
+        self._states = np.zeros(len(self.freqs), dtype=complex)
+        self._since_resync = 0
+        # single-sided amplitude factors (the DC and the Nyquist terms are not multiplied by 2, as amplitude_scale())
+        self._amp_scale = np.where((self.freqs == 0) | (self.freqs == fs / 2), 1.0 / n, 2.0 / n)
+
+    def update(self, samples: Union[float, np.ndarray]) -> np.ndarray:
+        """
+        Adds new samples (one or more).
+
+        Returns:
+            np.ndarray: The single-sided amplitude of each target frequency on the last N samples.
+        """
+        samples = np.atleast_1d(np.asarray(samples, dtype=float))
+        size = len(samples)
+        if size == 0:
+            return self.amplitudes()
+        if size > SDFT_MAX_BLOCK:
+            for start in range(0, size, SDFT_MAX_BLOCK):
+                self.update(samples[start:start + SDFT_MAX_BLOCK])
+            return self.amplitudes()
+        if size == 1:
+            # c(t+1) = e^jw * (x(t+1) * e^-jwN - x(t+1-N))
+            self._states = self._rot * (self._states + samples[0] * self._head - self._hist[self._pos])
+            self._hist[self._pos] = samples[0]
+            self._pos = (self._pos + 1) % self.n
+        else:
+            # S(t+L) = e^jwL * S(t) + sum(e^jw(L-i) * c(t+i)) for i in 1..L
+            x = np.concatenate([self._window(), samples])
+            contrib = samples[:, np.newaxis] * self._head - x[:size, np.newaxis]
+            phasors = np.exp(1j * np.outer(np.arange(size, 0, -1), self._omega))
+            self._states = phasors[0] * self._states + (phasors * contrib).sum(axis=0)
+            self._hist = x[-self.n:].copy()
+            self._pos = 0
+        self.samples_nb += size
+        self._since_resync += size
+        if self._since_resync >= self.resync:
+            self._states = self._window() @ self._kernel
+            self._since_resync = 0
+        return self.amplitudes()
+
+    def _window(self) -> np.ndarray:
+        """Returns the last N samples, oldest first (the ring unrolled)."""
+        return np.concatenate([self._hist[self._pos:], self._hist[:self._pos]])
+
+    def amplitudes(self) -> np.ndarray:
+        """Returns the single-sided amplitude of each target frequency on the last N samples."""
+        return self._amp_scale * np.abs(self._states)
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from scipy.signal import welch
+
+from spectrum import SlidingDFT, SpectrumAnalyzer, amplitude_spectrum
+
+FS = 1000.0
+
+
+def test_amplitude_spectrum():
+    t = np.arange(1000) / FS
+    x = 1.5 + 2.0 * np.sin(2 * np.pi * 50.0 * t) + 0.5 * np.cos(2 * np.pi * 500.0 * t)
+    freqs, amps = amplitude_spectrum(x, FS, window='boxcar')
+    assert np.allclose(amps[[0, 50, 500]], [1.5, 2.0, 0.5])
+    assert np.allclose(np.delete(amps, [0, 50, 500]), 0.0, atol=1e-9)
+    assert freqs[50] == 50.0
+
+
+@pytest.mark.parametrize('nperseg, overlap, window', [(256, 0.5, 'hann'), (200, 0.75, 'hamming'),
+                                                      (128, 0.0, ('tukey', 0.25))])
+def test_welch(nperseg, overlap, window):
+    rng = np.random.default_rng(0)
+    x = 3.0 + rng.normal(size=4000) + np.sin(2 * np.pi * 60.0 * np.arange(4000) / FS)
+    analyzer = SpectrumAnalyzer(FS, nperseg=nperseg, overlap=overlap, window=window)
+    spectra_l = []
+    for start in range(0, len(x), 333):
+        spectra_l += analyzer.update(x[start:start + 333])
+    freqs, ref = welch(x, fs=FS, window=window, nperseg=nperseg, noverlap=nperseg - analyzer.hop,
+                       detrend='constant')
+    assert analyzer.frames_nb == len(spectra_l) == (len(x) - nperseg) // analyzer.hop + 1
+    assert np.allclose(analyzer.freqs, freqs)
+    assert np.allclose(analyzer.welch(), ref)
+    # last segment spectrum
+    last = x[(analyzer.frames_nb - 1) * analyzer.hop:][:nperseg]
+    assert np.allclose(spectra_l[-1], amplitude_spectrum(last - last.mean(), FS, window=window)[1])
+
+
+def direct_dft(window: np.ndarray, freqs: np.ndarray) -> np.ndarray:
+    k = np.arange(len(window))
+    return np.array([np.sum(window * np.exp(-2j * np.pi * f / FS * k)) for f in freqs])
+
+
+def test_sliding_dft():
+    rng = np.random.default_rng(1)
+    x = rng.normal(size=12000)
+    freqs = np.array([0.0, 12.5, 50.0, 137.3, FS / 2])
+    n = 200
+    sdft = SlidingDFT(FS, freqs, n, resync=1000)
+    scale = np.where((freqs == 0) | (freqs == FS / 2), 1.0 / n, 2.0 / n)
+    pos = 0
+    # single samples, blocks shorter and longer than the window, an empty block and a block above SDFT_MAX_BLOCK
+    for size in [1] * 30 + [7, 150, 0, 450, 1] + [5000, 3] + [1] * 10:
+        amps = sdft.update(x[pos:pos + size] if size != 1 else x[pos])
+        pos += size
+        window = np.concatenate([np.zeros(n), x[:pos]])[-n:]
+        assert np.allclose(amps, scale * np.abs(direct_dft(window, freqs)), atol=1e-9)
+    assert sdft.samples_nb == pos
+
+
+def test_sliding_dft_amplitudes():
+    n = 100
+    t = np.arange(1000) / FS
+    # DC at the mean, 50 Hz at its amplitude, Nyquist at its amplitude (as amplitude_spectrum)
+    x = 1.5 + 2.0 * np.sin(2 * np.pi * 50.0 * t) + 0.5 * np.cos(2 * np.pi * 500.0 * t)
+    sdft = SlidingDFT(FS, [0.0, 50.0, FS / 2], n)
+    assert np.allclose(sdft.update(x), [1.5, 2.0, 0.5])
+    assert np.allclose(sdft.update(x[:n]), amplitude_spectrum(x[:n], FS, window='boxcar')[1][[0, 5, 50]])
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the StreamFilter throughput (samples/s per channel) by chunk size and number of channels, versus a
+one-shot lfilter(b, a, data) of the whole signal (as bandpass_filter.py).
+"""
+
+import time
+
+import numpy as np
+from scipy.signal import butter, lfilter
+from stream_filter import StreamFilter
+
+# 10 s at 10 kHz
+fs = 10_000
+size = 100_000
+rng = np.random.default_rng(seed=42)
+
+# one-shot reference (single channel, state discarded)
+b, a = butter(5, (1400, 1600), btype='band', fs=fs)
+x = rng.normal(size=size)
+t_start = time.perf_counter()
+lfilter(b, a, x)
+print(f'one-shot lfilter(b, a): {size / (time.perf_counter() - t_start):14,.0f} samples/s')
+
+# streaming filters
+designs = {'butter band 5th order (sos)': lambda ch: StreamFilter.butter(5, (1400, 1600), fs, 'band', channels=ch),
+           'fir low-pass 29 taps': lambda ch: StreamFilter.fir(29, 1500, fs, channels=ch),
+           'fir low-pass 255 taps (fft)': lambda ch: StreamFilter.fir(255, 1500, fs, channels=ch)}
+for name, design in designs.items():
+    print(name)
+    for channels in (1, 16):
+        x = rng.normal(size=(size, channels))
+        for chunk_size in (1, 100, 10_000):
+            flt = design(channels)
+            nb = min(size, 2_000 * chunk_size)
+            t_start = time.perf_counter()
+            for i in range(0, nb, chunk_size):
+                flt.process(x[i:i + chunk_size])
+            rate = nb / (time.perf_counter() - t_start)
+            print(f'  {channels:>3} channel(s) by {chunk_size:>6} samples: {rate:14,.0f} samples/s per channel '
+                  f'({rate * channels:14,.0f} total)')
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+"""Low-pass filter some redis keys (as published by redis/modbus2redis.py) and publish the result on redis."""
+
+import time
+import logging
+# sudo apt install python3-redis
+import redis
+# sudo apt install python3-schedule
+import schedule
+from stream_filter import StreamFilter
+
+# some const
+POLL_PERIOD_S = 2
+SRC_KEYS = ['cvm16:wobbe']
+# 4th order Butterworth low-pass at 0.01 Hz (sampled at 0.5 Hz)
+CUTOFF_HZ = 0.01
+
+
+# define schedule jobs
+def filter_job():
+    """Periodic filter job: one sample of every key."""
+    try:
+        # read all keys at once
+        values_l = rdb.mget(SRC_KEYS)
+        if None in values_l:
+            logging.debug(f'missing value(s) for {SRC_KEYS}: skip this sample')
+            return
+        sample = [float(value) for value in values_l]
+        # init filter state at the first value (avoid startup transient)
+        if lp_filter.samples_nb == 0:
+            lp_filter.reset(x0=sample)
+        filtered = lp_filter.push(sample)
+        for key, value in zip(SRC_KEYS, filtered):
+            rdb.set(f'{key}:filtered', round(float(value), 2), ex=120)
+    except redis.RedisError as e:
+        logging.error(f'redis error occur: {e!r}')
+
+
+if __name__ == '__main__':
+    # logging setup
+    logging.basicConfig(format='%(asctime)s - %(levelname)-8s - %(message)s', level=logging.INFO)
+    logging.getLogger('schedule').setLevel(logging.WARNING)
+    # log startup
+    logging.info('redis-filter-app started')
+
+    # init redis DB
+    rdb = redis.StrictRedis()
+    # init filter (one channel by key)
+    lp_filter = StreamFilter.butter(4, CUTOFF_HZ, fs=1 / POLL_PERIOD_S, channels=len(SRC_KEYS))
+    # set schedule config
+    schedule.every(POLL_PERIOD_S).seconds.do(filter_job)
+
+    # main loop
+    while True:
+        schedule.run_pending()
+        time.sleep(1.0)
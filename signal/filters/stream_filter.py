@@ -0,0 +1,183 @@
+"""
+Filter a stream of samples chunk by chunk: the filter is designed once and its state is kept between chunks, so
+the output is the same as a one-shot filter of the whole signal (unlike lfilter(b, a, data) on each chunk).
+
+Chunks are arrays of (samples, channels) for multi-channel streams (every channel use the same filter).
+"""
+
+from typing import Optional, Union
+
+import numpy as np
+from scipy.signal import butter, firwin, oaconvolve, sosfilt, sosfilt_zi, lfilter, lfilter_zi
+
+# FIR filters with at least this number of taps are applied with an overlap-add FFT convolution
+FFT_MIN_TAPS = 64
+
+
+class StreamFilter:
+    """
+    A streaming IIR (second-order sections) or FIR filter with a persistent state.
+    """
+
+    def __init__(self, sos: Optional[np.ndarray] = None, taps: Optional[np.ndarray] = None, channels: int = 1) -> None:
+        """
+        Args:
+            sos (np.ndarray): The second-order sections of an IIR filter (as returned by butter(output='sos')).
+            taps (np.ndarray): The coefficients of a FIR filter (set sos or taps).
+            channels (int): Number of channels filtered at once.
+        """
+        if (sos is None) == (taps is None):
+            raise ValueError('set sos or taps')
+        # public
+        self.sos = None if sos is None else np.atleast_2d(np.asarray(sos, dtype=float))
+        self.taps = None if taps is None else np.asarray(taps, dtype=float)
+        self.channels = channels
+        self.samples_nb = 0
+        # private: filter state by channel (zi of sosfilt/lfilter or overlap-add tail)
+        self._zi = np.empty(0)
+        self.reset()
+
+    @classmethod
+    def butter(cls, order: int, cutoff: Union[float, tuple], fs: float, btype: str = 'low',
+               channels: int = 1) -> 'StreamFilter':
+        """
+        Designs a Butterworth filter.
+
+        Args:
+            order (int): The filter order.
+            cutoff (float or tuple): The cutoff frequency in Hz (low and high for 'band' or 'bandstop').
+            fs (float): The sampling frequency in Hz.
+            btype (str): The filter type: 'low', 'high', 'band' or 'bandstop'.
+            channels (int): Number of channels filtered at once.
+        """
+        return cls(sos=butter(order, cutoff, btype=btype, fs=fs, output='sos'), channels=channels)
+
+    @classmethod
+    def fir(cls, numtaps: int, cutoff: Union[float, tuple], fs: float, pass_zero: Union[bool, str] = True,
+            channels: int = 1) -> 'StreamFilter':
+        """
+        Designs a FIR filter with the window method (as firwin()).
+
+        Args:
+            numtaps (int): The number of taps.
+            cutoff (float or tuple): The cutoff frequency (or frequencies) in Hz.
+            fs (float): The sampling frequency in Hz.
+            pass_zero (bool or str): True for a low-pass, False for a high-pass (see firwin()).
+            channels (int): Number of channels filtered at once.
+        """
+        return cls(taps=firwin(numtaps, cutoff, pass_zero=pass_zero, fs=fs), channels=channels)
+
+    @property
+    def _use_fft(self) -> bool:
+        return self.taps is not None and len(self.taps) >= FFT_MIN_TAPS
+
+    def reset(self, x0: Optional[np.ndarray] = None) -> None:
+        """
+        Resets the filter state.
+
+        Args:
+            x0 (np.ndarray): If set, start as if the input was steady at this value (one value or one by channel),
+                             this avoids the startup transient.
+        """
+        self.samples_nb = 0
+        level = np.zeros(self.channels) if x0 is None else np.broadcast_to(np.asarray(x0, dtype=float),
+                                                                           (self.channels,))
+        if self.sos is not None:
+            # zi shape for axis=0: (sections, 2, channels)
+            self._zi = sosfilt_zi(self.sos)[:, :, np.newaxis] * level
+        elif self._use_fft:
+            # overlap-add tail: output of past samples on the next len(taps) - 1 samples
+            tail_steady = np.cumsum(self.taps[::-1])[:-1][::-1]
+            self._zi = tail_steady[:, np.newaxis] * level
+        else:
+            # zi shape for axis=0: (taps - 1, channels)
+            self._zi = lfilter_zi(self.taps, 1.0)[:, np.newaxis] * level
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Filters the next chunk of samples.
+
+        Args:
+            chunk (np.ndarray): The samples as (samples, channels), or (samples,) for a single channel.
+
+        Returns:
+            np.ndarray: The filtered samples (same shape as chunk).
+        """
+        x = np.asarray(chunk, dtype=float)
+        x_2d = x[:, np.newaxis] if x.ndim == 1 else x
+        if x_2d.shape[1] != self.channels:
+            raise ValueError(f'chunk have {x_2d.shape[1]} channels, filter expect {self.channels}')
+        if len(x_2d) == 0:
+            return x.copy()
+        if self.sos is not None:
+            y, self._zi = sosfilt(self.sos, x_2d, axis=0, zi=self._zi)
+        elif self._use_fft:
+            y = self._overlap_add(x_2d)
+        else:
+            y, self._zi = lfilter(self.taps, 1.0, x_2d, axis=0, zi=self._zi)
+        self.samples_nb += len(x_2d)
+        return y.reshape(x.shape)
+
+    def push(self, sample: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """
+        Filters one sample (one value or one value by channel), for polling jobs.
+
+        Returns:
+            float or np.ndarray: The filtered sample.
+        """
+        y = self.process(np.asarray(sample, dtype=float).reshape(1, self.channels))[0]
+        return float(y[0]) if np.ndim(sample) == 0 else y
+
+    def _overlap_add(self, x: np.ndarray) -> np.ndarray:
+        n = len(x)
+        full = oaconvolve(x, self.taps[:, np.newaxis], mode='full', axes=0)
+        # add the tail of previous chunks, then keep the part that overflow this chunk
+        tail_len = len(self._zi)
+        head = min(n, tail_len)
+        full[:head] += self._zi[:head]
+        new_tail = full[n:]
+        if tail_len > n:
+            new_tail[:tail_len - n] += self._zi[n:]
+        self._zi = new_tail
+        return full[:n]
+
+
+class FilterBank:
+    """
+    A set of named stream filters applied to the same multi-channel stream (e.g. one filter by frequency band).
+    """
+
+    def __init__(self, filters: dict[str, StreamFilter]) -> None:
+        channels_set = {flt.channels for flt in filters.values()}
+        if len(channels_set) > 1:
+            raise ValueError('all filters of a bank must have the same number of channels')
+        # public
+        self.filters = filters
+
+    @classmethod
+    def bands(cls, bands: dict[str, tuple], fs: float, order: int = 4, channels: int = 1) -> 'FilterBank':
+        """
+        Designs a bank of Butterworth band-pass filters.
+
+        Args:
+            bands (dict): The (low, high) cutoff frequencies in Hz by band name.
+            fs (float): The sampling frequency in Hz.
+            order (int): The order of filters.
+            channels (int): Number of channels filtered at once.
+        """
+        return cls({name: StreamFilter.butter(order, cutoff, fs, btype='band', channels=channels)
+                    for name, cutoff in bands.items()})
+
+    def reset(self, x0: Optional[np.ndarray] = None) -> None:
+        """Resets the state of all filters."""
+        for flt in self.filters.values():
+            flt.reset(x0)
+
+    def process(self, chunk: np.ndarray) -> dict[str, np.ndarray]:
+        """
+        Filters the next chunk of samples with every filter of the bank.
+
+        Returns:
+            dict: The filtered samples by filter name.
+        """
+        return {name: flt.process(chunk) for name, flt in self.filters.items()}
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from scipy.signal import firwin, lfilter, lfilter_zi, sosfilt, sosfilt_zi
+
+from stream_filter import FilterBank, StreamFilter
+
+FS = 1000.0
+
+
+def chunked(flt: StreamFilter, x: np.ndarray, seed: int = 0) -> np.ndarray:
+    """Filters x by random size chunks (empty ones included)."""
+    rng = np.random.default_rng(seed)
+    y_l = []
+    start = 0
+    while start < len(x):
+        size = int(rng.integers(0, 300))
+        y_l.append(flt.process(x[start:start + size]))
+        start += size
+    return np.concatenate(y_l)
+
+
+def signal(channels: int = 0, size: int = 5000) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    shape = (size, channels) if channels else (size,)
+    return 5.0 + rng.normal(size=shape)
+
+
+@pytest.mark.parametrize('channels', [0, 3])
+def test_butter(channels):
+    x = signal(channels)
+    flt = StreamFilter.butter(4, (20.0, 80.0), FS, btype='band', channels=max(1, channels))
+    ref = sosfilt(flt.sos, x, axis=0)
+    assert np.allclose(chunked(flt, x), ref)
+    assert flt.samples_nb == len(x)
+
+
+@pytest.mark.parametrize('numtaps', [15, 101])
+@pytest.mark.parametrize('channels', [0, 3])
+def test_fir(numtaps, channels):
+    x = signal(channels)
+    # 15 taps: lfilter with a state, 101 taps: overlap-add FFT
+    flt = StreamFilter.fir(numtaps, 50.0, FS, channels=max(1, channels))
+    assert np.array_equal(flt.taps, firwin(numtaps, 50.0, fs=FS))
+    assert np.allclose(chunked(flt, x), lfilter(flt.taps, 1.0, x, axis=0))
+
+
+@pytest.mark.parametrize('flt', [StreamFilter.butter(2, 30.0, FS), StreamFilter.fir(15, 30.0, FS),
+                                 StreamFilter.fir(101, 30.0, FS)])
+def test_reset_steady(flt):
+    x = signal()
+    flt.reset(x0=x[0])
+    if flt.sos is not None:
+        ref = sosfilt(flt.sos, x, zi=sosfilt_zi(flt.sos) * x[0])[0]
+    else:
+        ref = lfilter(flt.taps, 1.0, x, zi=lfilter_zi(flt.taps, 1.0) * x[0])[0]
+    assert np.allclose(chunked(flt, x), ref)
+    # steady input: no startup transient
+    flt.reset(x0=5.0)
+    assert np.allclose(flt.process(np.full(200, 5.0)), 5.0)
+
+
+def test_push():
+    x = signal(2, size=300)
+    flt = StreamFilter.butter(4, 50.0, FS, channels=2)
+    ref = sosfilt(flt.sos, x, axis=0)
+    assert np.allclose([flt.push(sample) for sample in x], ref)
+    single = StreamFilter.fir(101, 50.0, FS)
+    y_l = [single.push(sample) for sample in x[:, 0]]
+    assert all(isinstance(y, float) for y in y_l)
+    assert np.allclose(y_l, lfilter(single.taps, 1.0, x[:, 0]))
+
+
+def test_checks():
+    with pytest.raises(ValueError):
+        StreamFilter()
+    with pytest.raises(ValueError):
+        StreamFilter.butter(4, 50.0, FS, channels=2).process(np.zeros((10, 3)))
+    with pytest.raises(ValueError):
+        FilterBank({'a': StreamFilter.butter(2, 10.0, FS), 'b': StreamFilter.butter(2, 10.0, FS, channels=2)})
+
+
+def test_filter_bank():
+    x = signal(2)
+    bank = FilterBank.bands({'low': (5.0, 20.0), 'high': (100.0, 200.0)}, FS, channels=2)
+    out_l = [bank.process(x[start:start + 128]) for start in range(0, len(x), 128)]
+    for name, flt in bank.filters.items():
+        assert np.allclose(np.concatenate([out[name] for out in out_l]), sosfilt(flt.sos, x, axis=0))
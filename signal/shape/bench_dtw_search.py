@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the DTWSearch engine versus the dtw() of dtw_shape_finder_1.py on one week of 1 Hz fake pressure data.
+"""
+
+import time
+
+import numpy as np
+from datasets.sig_gallery import sig_exp_pulse
+from dtw_search import DTWSearch, dtw_distance, normalize
+from dtw_shape_finder_1 import dtw
+
+# one week at 1 Hz: a slow random walk with some pulses
+rng = np.random.default_rng(seed=42)
+raw_sig = 500 + np.cumsum(rng.normal(scale=0.1, size=7 * 24 * 3600))
+pulse = sig_exp_pulse(pulse_len=50, prefix_len=10)
+pulses_at = np.sort(rng.choice(len(raw_sig) - 100, size=30, replace=False))
+for offset in pulses_at:
+    raw_sig[offset:offset + len(pulse)] -= 10 * pulse
+
+# target pattern and detection threshold
+target_pat = -100 * sig_exp_pulse(pulse_len=50, prefix_len=10)
+threshold = 100.0
+windows_nb = len(raw_sig) - len(target_pat) + 1
+
+# current dtw(): full matrix for every window (extrapolated from 200 windows)
+t_start = time.perf_counter()
+for offset in range(200):
+    dtw(normalize(raw_sig[offset:offset + len(target_pat)]), target_pat)
+ref_s = (time.perf_counter() - t_start) / 200 * windows_nb
+print(f'dtw() full scan (estimated): {ref_s:10.1f} s')
+
+# banded DTW, window by window (extrapolated from 200 windows)
+t_start = time.perf_counter()
+for offset in range(200):
+    dtw_distance(normalize(raw_sig[offset:offset + len(target_pat)]), target_pat, band=6)
+print(f'dtw_distance() band=6 full scan (estimated): {(time.perf_counter() - t_start) / 200 * windows_nb:10.1f} s')
+
+# search engine
+search = DTWSearch(target_pat, band=6)
+t_start = time.perf_counter()
+matches = search.find(raw_sig, threshold=threshold)
+find_s = time.perf_counter() - t_start
+print(f'DTWSearch.find(): {find_s:10.2f} s ({ref_s / find_s:.0f}x faster), {len(matches)} matches '
+      f'({len(pulses_at)} pulses)')
+print(f'  {search.windows_nb} windows: {search.kim_pruned_nb} pruned by LB_Kim, '
+      f'{search.keogh_pruned_nb} by LB_Keogh, {search.dtw_nb} DTW')
+t_start = time.perf_counter()
+best_l = search.top_k(raw_sig, k=10)
+print(f'DTWSearch.top_k(k=10): {time.perf_counter() - t_start:10.2f} s, {search.dtw_nb} DTW, '
+      f'best distance {best_l[0].distance:.1f}')
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the windowed lag estimator versus a full scipy correlate (as scipy_correlate_1.py) on one year of
+1 minute fake data, with a lag that drifts from 10 to 20 minutes.
+"""
+
+import time
+
+import numpy as np
+from scipy.signal import correlate, correlation_lags
+from lag_estimator import LagTracker, estimate_lags, lag_drift
+
+# one year at 1 sample/minute: S2 is a delayed and noisy copy of S1
+rng = np.random.default_rng(seed=42)
+size = 365 * 24 * 60
+base = np.cumsum(rng.normal(size=size + 200))
+t = np.arange(size)
+s1 = base[100:100 + size] + rng.normal(scale=0.5, size=size)
+s2 = np.interp(t - (10 + 10 * t / size), np.arange(-100, size + 100), base) + rng.normal(scale=0.5, size=size)
+
+# full correlate: one global lag
+t_start = time.perf_counter()
+s1c, s2c = s1 - s1.mean(), s2 - s2.mean()
+corr = correlate(s1c, s2c, mode='full') / np.sqrt(np.sum(s1c ** 2) * np.sum(s2c ** 2))
+lags = correlation_lags(len(s1c), len(s2c), mode='full')
+print(f'full correlate: {time.perf_counter() - t_start:6.2f} s, lag {lags[np.argmax(corr)]} min')
+
+# one week windows every day, lags searched in +/- 1 hour
+t_start = time.perf_counter()
+estimates = list(estimate_lags(s1, s2, window=7 * 1440, hop=1440, max_lag=60))
+print(f'estimate_lags(): {time.perf_counter() - t_start:6.2f} s, {len(estimates)} windows, '
+      f'lag {estimates[0].lag:.2f} min (r={estimates[0].coef:.3f}) to {estimates[-1].lag:.2f} min '
+      f'(r={estimates[-1].coef:.3f})')
+slope, _ = lag_drift(estimates)
+print(f'lag drift: {slope * 1440 * 365:.2f} min/year (expected {-10:.2f})')
+
+# live feed by blocks of 1 hour
+tracker = LagTracker(window=7 * 1440, hop=1440, max_lag=60)
+t_start = time.perf_counter()
+live_nb = 0
+for i in range(0, size, 60):
+    live_nb += len(tracker.update(s1[i:i + 60], s2[i:i + 60]))
+print(f'LagTracker.update() by 60 samples: {size / (time.perf_counter() - t_start):12,.0f} samples/s, '
+      f'{live_nb} windows')
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark the MASS distance profile versus a per-window normalization + RMS error (as the _anim() of
+euclid_shape_finder_3.py), then the throughput of the stream matcher by block size.
+"""
+
+import time
+
+import numpy as np
+from datasets.sig_gallery import sig_exp_pulse
+from mass_search import MassSearch
+
+# one day of 1 kHz fake sensor data with some pulses
+rng = np.random.default_rng(seed=42)
+raw_sig = 500 + np.cumsum(rng.normal(scale=0.1, size=2_000_000))
+pulse = sig_exp_pulse(pulse_len=50, prefix_len=10)
+pulses_at = np.sort(rng.choice(len(raw_sig) - 100, size=30, replace=False))
+for offset in pulses_at:
+    raw_sig[offset:offset + len(pulse)] -= 10 * pulse
+
+# target pattern and detection threshold
+target_pat = -100 * sig_exp_pulse(pulse_len=50, prefix_len=10)
+threshold = 12.0
+m = len(target_pat)
+
+# per window (extrapolated from 10k windows)
+t_start = time.perf_counter()
+for offset in range(10_000):
+    raw_sig_part = raw_sig[offset:offset + m]
+    sig = 100 * (raw_sig_part - raw_sig_part.min()) / (raw_sig_part.max() - raw_sig_part.min()) - 100
+    np.sqrt(((sig - target_pat) ** 2).mean())
+per_window_s = (time.perf_counter() - t_start) / 10_000
+print(f'per window loop: {1 / per_window_s:12,.0f} windows/s')
+
+# batch
+search = MassSearch(target_pat)
+t_start = time.perf_counter()
+matches = search.find(raw_sig, threshold=threshold)
+batch_s = time.perf_counter() - t_start
+print(f'MassSearch.find(): {len(raw_sig) / batch_s:12,.0f} samples/s ({per_window_s * len(raw_sig) / batch_s:.0f}x), '
+      f'{len(matches)} matches ({len(pulses_at)} pulses)')
+
+# stream
+for block_size in (1, 10, 100, 1000, 10_000):
+    matcher = search.stream(threshold=threshold)
+    nb = min(len(raw_sig), 200 * block_size)
+    found_nb = 0
+    t_start = time.perf_counter()
+    for i in range(0, nb, block_size):
+        found_nb += len(matcher.update(raw_sig[i:i + block_size]))
+    found_nb += len(matcher.flush())
+    print(f'StreamMatcher.update() by {block_size:>6} samples: {nb / (time.perf_counter() - t_start):12,.0f} samples/s')
@@ -0,0 +1,310 @@
+"""
+Search a target shape in a long signal with the Dynamic Time Warping (DTW) distance.
+
+Each window of the signal is min/max normalized (as in the ShapeFinderAnim scripts) and compared with the target
+pattern. Windows are pruned by cheap lower bounds (LB_Kim, then LB_Keogh) before the DTW, which is constrained
+by a Sakoe-Chiba band and computed for many windows at once with numpy.
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass
+import math
+from typing import Iterator, Optional, Union
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+@dataclass
+class Match:
+    offset: int
+    distance: float
+
+
+def rolling_min_max(x: np.ndarray, w: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculates the min and max of every window of w samples in O(n) (van Herk/Gil-Werman algorithm).
+
+    Args:
+        x (np.ndarray): The signal.
+        w (int): The window size.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (min, max) of windows x[i:i+w], for i in 0..len(x)-w.
+    """
+    n = len(x)
+    # cut signal in blocks of w samples, window [i, i+w-1] is a suffix of a block and a prefix of the next one
+    blocks = np.concatenate([x, np.full((-n) % w, x[-1])]).reshape(-1, w)
+    results = []
+    for ufunc in (np.minimum, np.maximum):
+        prefix = ufunc.accumulate(blocks, axis=1).ravel()
+        suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+        results.append(ufunc(suffix[:n - w + 1], prefix[w - 1:n]))
+    return results[0], results[1]
+
+
+def select_matches(offsets: np.ndarray, distances: np.ndarray, exclusion: int) -> list[Match]:
+    """
+    Selects the best windows that don't overlap (greedy selection from the lowest distance).
+
+    Args:
+        offsets (np.ndarray): The offsets of candidate windows.
+        distances (np.ndarray): The distances of candidate windows.
+        exclusion (int): Min offset between two matches.
+
+    Returns:
+        list[Match]: The matches in offset order.
+    """
+    taken_l = []
+    for i in np.argsort(distances, kind='stable'):
+        offset = int(offsets[i])
+        pos = bisect_left(taken_l, offset)
+        if pos > 0 and offset - taken_l[pos - 1] < exclusion:
+            continue
+        if pos < len(taken_l) and taken_l[pos] - offset < exclusion:
+            continue
+        taken_l.insert(pos, offset)
+    dist_d = dict(zip(np.asarray(offsets).tolist(), np.asarray(distances).tolist()))
+    return [Match(offset, dist_d[offset]) for offset in taken_l]
+
+
+def normalize(sig: np.ndarray) -> np.ndarray:
+    """
+    Min/max normalizes a window to the target pattern range [-100, 0] (a flat window is all zeros).
+    """
+    if sig.max() == sig.min():
+        return np.zeros_like(sig, dtype=float)
+    return 100 * (sig - sig.min()) / (sig.max() - sig.min()) - 100
+
+
+def dtw_distance(s1: np.ndarray, s2: np.ndarray, band: Optional[int] = None) -> float:
+    """
+    Calculates the DTW distance between two time series with a Sakoe-Chiba band constraint.
+
+    Args:
+        s1 (np.ndarray): The first time series (segment).
+        s2 (np.ndarray): The second time series (target pattern).
+        band (int): Max distance between aligned indexes, None for an unconstrained DTW.
+
+    Returns:
+        float: The DTW distance (square root of the minimum accumulated squared cost).
+    """
+    n, m = len(s1), len(s2)
+    r = max(n, m) if band is None else max(band, abs(n - m))
+    s1_l, s2_l = np.asarray(s1, dtype=float).tolist(), np.asarray(s2, dtype=float).tolist()
+    # only two rows of the accumulated cost matrix are kept
+    prev = [0.0] + [math.inf] * m
+    for i in range(1, n + 1):
+        cur = [math.inf] * (m + 1)
+        a = s1_l[i - 1]
+        for j in range(max(1, i - r), min(m, i + r) + 1):
+            d = a - s2_l[j - 1]
+            cur[j] = d * d + min(prev[j], prev[j - 1], cur[j - 1])
+        prev = cur
+    return math.sqrt(prev[m])
+
+
+def dtw_batch(windows: np.ndarray, query: np.ndarray, band: int, limit: float = math.inf) -> np.ndarray:
+    """
+    Calculates the DTW distances between many windows and a query, rows of the cost matrix are vectorized
+    over windows.
+
+    Args:
+        windows (np.ndarray): The windows as a (k, n) array.
+        query (np.ndarray): The query (target pattern) of m samples.
+        band (int): The Sakoe-Chiba band radius.
+        limit (float): Windows are abandoned as soon as their distance exceeds this limit.
+
+    Returns:
+        np.ndarray: The k distances (inf for abandoned windows).
+    """
+    k, n = windows.shape
+    m = len(query)
+    r = max(band, abs(n - m))
+    dist = np.full(k, math.inf)
+    idx = np.arange(k)
+    limit_sq = limit * limit
+    # cost matrix rows as (m + 1, k) arrays: a column of the matrix is contiguous over windows
+    win_t = np.ascontiguousarray(windows.T, dtype=float)
+    query_c = np.asarray(query, dtype=float)[:, None]
+    prev = np.full((m + 1, k), math.inf)
+    prev[0] = 0.0
+    cur = np.full((m + 1, k), math.inf)
+    for i in range(1, n + 1):
+        lo, hi = max(1, i - r), min(m, i + r)
+        cost = (win_t[i - 1] - query_c[lo - 1:hi]) ** 2
+        # vertical and diagonal predecessors
+        cur[lo:hi + 1] = cost + np.minimum(prev[lo:hi + 1], prev[lo - 1:hi])
+        cur[lo - 1] = math.inf
+        # horizontal predecessor (sequential along the row)
+        for j in range(lo + 1, hi + 1):
+            np.minimum(cur[j], cost[j - lo] + cur[j - 1], out=cur[j])
+        # early abandon: every warping path crosses this row
+        if limit_sq < math.inf:
+            keep = cur[lo:hi + 1].min(axis=0) <= limit_sq
+            if not keep.all():
+                idx, win_t, cur, prev = idx[keep], win_t[:, keep], cur[:, keep], prev[:, keep]
+                if not len(idx):
+                    return dist
+        prev, cur = cur, prev
+    dist[idx] = np.sqrt(prev[m])
+    return dist
+
+
+class DTWSearch:
+    """
+    Search the windows of a signal that match a target pattern (DTW distance between the normalized window
+    and the pattern).
+
+    Lower bounds are checked in cascade, from the cheapest: LB_Kim (first and last points), LB_Keogh (envelope
+    of the pattern), then the banded DTW with early abandon.
+    """
+
+    def __init__(self, target_pat: np.ndarray, band: Union[int, float] = 0.1, chunk_size: int = 8192,
+                 dtw_batch_size: int = 1024) -> None:
+        """
+        Args:
+            target_pat (np.ndarray): The target pattern (in the normalized range [-100, 0]).
+            band (int | float): Sakoe-Chiba band radius in samples (int) or as a ratio of pattern size (float).
+            chunk_size (int): Number of windows processed at once (bound the memory used).
+            dtw_batch_size (int): Number of windows of a DTW batch (the pruning bound is updated between batches).
+        """
+        # public
+        self.target_pat = np.asarray(target_pat, dtype=float)
+        if len(self.target_pat) < 2:
+            raise ValueError('target pattern must have at least 2 samples')
+        self.band = band if isinstance(band, int) else max(1, round(band * len(self.target_pat)))
+        self.chunk_size = chunk_size
+        self.dtw_batch_size = dtw_batch_size
+        # pruning stats of the last search
+        self.windows_nb = 0
+        self.kim_pruned_nb = 0
+        self.keogh_pruned_nb = 0
+        self.dtw_nb = 0
+        # private: LB_Keogh envelope of the pattern
+        padded = np.pad(self.target_pat, self.band, mode='edge')
+        self._upper = sliding_window_view(padded, 2 * self.band + 1).max(axis=1)
+        self._lower = sliding_window_view(padded, 2 * self.band + 1).min(axis=1)
+
+    def _scan(self, sig: np.ndarray, limit_fn) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """
+        Yields (offsets, distances) of windows not pruned, chunk by chunk.
+
+        The limit_fn() callable returns the current max distance of interest (pruning bound).
+        """
+        sig = np.asarray(sig, dtype=float)
+        m = len(self.target_pat)
+        q_first, q_last = self.target_pat[0], self.target_pat[-1]
+        self.windows_nb = max(0, len(sig) - m + 1)
+        self.kim_pruned_nb = self.keogh_pruned_nb = self.dtw_nb = 0
+        if self.windows_nb == 0:
+            return
+        win_min, win_max = rolling_min_max(sig, m)
+        windows = sliding_window_view(sig, m)
+        for start in range(0, self.windows_nb, self.chunk_size):
+            stop = min(start + self.chunk_size, self.windows_nb)
+            limit_sq = limit_fn() ** 2
+            # normalization factors: x_norm = (x - min) * scale + offset (a flat window is all zeros)
+            w_min = win_min[start:stop]
+            w_rng = win_max[start:stop] - w_min
+            flat = w_rng == 0
+            scale = np.where(flat, 0.0, 100.0 / np.where(flat, 1.0, w_rng))
+            offset = np.where(flat, 0.0, -100.0)
+            # LB_Kim (every warping path starts and ends with the first and last points)
+            first = (sig[start:stop] - w_min) * scale + offset
+            last = (sig[start + m - 1:stop + m - 1] - w_min) * scale + offset
+            lb_kim = (first - q_first) ** 2 + (last - q_last) ** 2
+            cand = np.flatnonzero(lb_kim <= limit_sq)
+            self.kim_pruned_nb += (stop - start) - len(cand)
+            if not len(cand):
+                continue
+            # LB_Keogh on the normalized windows
+            norm = (windows[start + cand] - w_min[cand, None]) * scale[cand, None] + offset[cand, None]
+            lb_keogh = (np.maximum(norm - self._upper, 0.0) ** 2 + np.maximum(self._lower - norm, 0.0) ** 2).sum(axis=1)
+            # DTW of remaining windows, by batches from the lowest bound (so a caller bound can tighten between them)
+            order = np.argsort(lb_keogh, kind='stable')
+            chunk_dtw_nb = 0
+            for batch_start in range(0, len(order), self.dtw_batch_size):
+                limit_sq = limit_fn() ** 2
+                batch = order[batch_start:batch_start + self.dtw_batch_size]
+                batch = batch[lb_keogh[batch] <= limit_sq]
+                if not len(batch):
+                    break
+                chunk_dtw_nb += len(batch)
+                dist = dtw_batch(norm[batch], self.target_pat, self.band, limit=math.sqrt(limit_sq))
+                yield start + cand[batch], dist
+            self.dtw_nb += chunk_dtw_nb
+            self.keogh_pruned_nb += len(cand) - chunk_dtw_nb
+
+    def distance_profile(self, sig: np.ndarray, threshold: float = math.inf) -> np.ndarray:
+        """
+        Calculates the DTW distance of every window of the signal.
+
+        Args:
+            sig (np.ndarray): The signal.
+            threshold (float): Windows above this distance may be pruned (their distance is set to inf).
+
+        Returns:
+            np.ndarray: The distance of each window offset (len(sig) - len(target_pat) + 1 items).
+        """
+        profile = np.full(max(0, len(sig) - len(self.target_pat) + 1), math.inf)
+        for offsets, dist in self._scan(sig, lambda: threshold):
+            profile[offsets] = dist
+        return profile
+
+    def find(self, sig: np.ndarray, threshold: float, exclusion: Optional[int] = None) -> list[Match]:
+        """
+        Finds the windows with a distance below threshold (the best one of overlapping windows).
+
+        Args:
+            sig (np.ndarray): The signal.
+            threshold (float): The max DTW distance of a match.
+            exclusion (int): Min offset between two matches (defaults to half the pattern size).
+
+        Returns:
+            list[Match]: The matches in offset order.
+        """
+        exclusion = len(self.target_pat) // 2 if exclusion is None else exclusion
+        offsets_l, dist_l = [], []
+        for offsets, dist in self._scan(sig, lambda: threshold):
+            ok = dist <= threshold
+            offsets_l.append(offsets[ok])
+            dist_l.append(dist[ok])
+        if not offsets_l:
+            return []
+        return select_matches(np.concatenate(offsets_l), np.concatenate(dist_l), exclusion)
+
+    def top_k(self, sig: np.ndarray, k: int, exclusion: Optional[int] = None) -> list[Match]:
+        """
+        Finds the k best matches that don't overlap (the same as the greedy selection of the distance profile).
+
+        Every evaluated window is kept until the end. The pruning bound is the distance at which k evaluated
+        windows at least 2 * exclusion - 1 apart are found: a window can't overlap two of them, so the greedy
+        selection of all windows reaches k matches below this distance.
+
+        Args:
+            sig (np.ndarray): The signal.
+            k (int): The number of matches.
+            exclusion (int): Min offset between two matches (defaults to half the pattern size).
+
+        Returns:
+            list[Match]: The matches from the best one.
+        """
+        exclusion = len(self.target_pat) // 2 if exclusion is None else exclusion
+        limit = math.inf
+        # evaluated windows (the ones above the bound can't be selected and are dropped)
+        offsets = np.empty(0, dtype=int)
+        distances = np.empty(0)
+        for batch_offsets, batch_dist in self._scan(sig, lambda: limit):
+            ok = batch_dist <= limit
+            offsets = np.concatenate([offsets, batch_offsets[ok]])
+            distances = np.concatenate([distances, batch_dist[ok]])
+            spread = select_matches(offsets, distances, max(0, 2 * exclusion - 1))
+            if len(spread) >= k:
+                limit = min(limit, sorted(match.distance for match in spread)[k - 1])
+                ok = distances <= limit
+                offsets, distances = offsets[ok], distances[ok]
+        # greedy selection in offset order (ties are broken as for the distance profile)
+        order = np.argsort(offsets, kind='stable')
+        matches = select_matches(offsets[order], distances[order], exclusion)
+        return sorted(matches, key=lambda match: match.distance)[:k]
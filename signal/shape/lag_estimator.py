@@ -0,0 +1,155 @@
+"""
+Estimate the time shift (lag) between two long aligned time series (as scipy_correlate_1.py), window by window.
+
+Each window of S1 is correlated with S2 over a restricted lag range (overlap-add FFT correlation) and normalized
+to a Pearson correlation coefficient for every lag, so memory only depends on the window size and the max lag:
+series can be numpy memmaps or live blocks of samples (see LagTracker).
+
+Lags follow the scipy.signal.correlation_lags() convention of correlate(S1, S2): a negative lag means S2 is
+delayed from S1.
+"""
+
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+
+from mass_search import sliding_dot_product
+
+
+@dataclass
+class LagEstimate:
+    index: int
+    lag: float
+    coef: float
+
+
+def window_correlation(x: np.ndarray, y_ext: np.ndarray, max_lag: int) -> np.ndarray:
+    """
+    Calculates the correlation coefficients of a window of S1 with S2 for lags -max_lag to max_lag.
+
+    Args:
+        x (np.ndarray): The window of S1 (samples a to a + n).
+        y_ext (np.ndarray): S2 samples a - max_lag to a + n + max_lag.
+        max_lag (int): The max lag (in samples).
+
+    Returns:
+        np.ndarray: The 2 * max_lag + 1 coefficients, from lag -max_lag to max_lag (0 for a flat part).
+    """
+    n = len(x)
+    x = np.asarray(x, dtype=float)
+    x = x - x.mean()
+    x_norm = np.sqrt(x @ x)
+    # coefficients are shift invariant: center y for accurate rolling sums
+    y = np.asarray(y_ext, dtype=float)
+    y = y - y.mean()
+    # x is centered: sum(x * (y_win - mean(y_win))) = sum(x * y_win)
+    dots = sliding_dot_product(x, y)
+    cumsum = np.concatenate([[0.0], np.cumsum(y)])
+    cumsum_sq = np.concatenate([[0.0], np.cumsum(y * y)])
+    sy = cumsum[n:] - cumsum[:-n]
+    syy = cumsum_sq[n:] - cumsum_sq[:-n]
+    y_var = np.maximum(syy - sy * sy / n, 0.0)
+    flat = (y_var <= 1e-12 * syy) | (x_norm == 0)
+    coefs = np.where(flat, 0.0, dots / np.where(flat, 1.0, x_norm * np.sqrt(y_var)))
+    # y window j is at lag max_lag - j
+    return coefs[::-1]
+
+
+def peak_lag(coefs: np.ndarray, max_lag: int) -> tuple[float, float]:
+    """
+    Locates the peak of correlation coefficients with a parabolic interpolation (sub-sample lag).
+
+    Returns:
+        tuple[float, float]: (lag, coefficient) of the peak.
+    """
+    idx = int(np.argmax(coefs))
+    lag = float(idx - max_lag)
+    if 0 < idx < len(coefs) - 1:
+        left, center, right = coefs[idx - 1], coefs[idx], coefs[idx + 1]
+        curvature = left - 2 * center + right
+        if curvature < 0:
+            lag += float(0.5 * (left - right) / curvature)
+    return lag, float(coefs[idx])
+
+
+def estimate_lags(s1: np.ndarray, s2: np.ndarray, window: int, hop: int, max_lag: int) -> Iterator[LagEstimate]:
+    """
+    Estimates the lag between S1 and S2 for every window.
+
+    Args:
+        s1 (np.ndarray): The first series (an array or a numpy memmap).
+        s2 (np.ndarray): The second series, aligned with S1.
+        window (int): The window size (in samples).
+        hop (int): The offset between two windows (in samples).
+        max_lag (int): The max lag searched (in samples).
+
+    Yields:
+        LagEstimate: The lag of each window (index is the window center), the first window starts at max_lag.
+    """
+    size = min(len(s1), len(s2))
+    for start in range(max_lag, size - window - max_lag + 1, hop):
+        coefs = window_correlation(s1[start:start + window], s2[start - max_lag:start + window + max_lag], max_lag)
+        lag, coef = peak_lag(coefs, max_lag)
+        yield LagEstimate(index=start + window // 2, lag=lag, coef=coef)
+
+
+def lag_drift(estimates: list[LagEstimate], min_coef: float = 0.5) -> tuple[float, float]:
+    """
+    Fits a linear drift of the lag over time, windows with a coefficient below min_coef are ignored.
+
+    Returns:
+        tuple[float, float]: (slope in lag samples per sample, lag at index 0), NaN if less than 2 windows.
+    """
+    good_l = [estimate for estimate in estimates if estimate.coef >= min_coef]
+    if len(good_l) < 2:
+        return float('nan'), float('nan')
+    slope, intercept = np.polyfit([e.index for e in good_l], [e.lag for e in good_l], deg=1)
+    return float(slope), float(intercept)
+
+
+class LagTracker:
+    """
+    Estimate the lag between two live series fed by aligned blocks of samples.
+
+    Only the samples still needed by the next window are kept between updates.
+    """
+
+    def __init__(self, window: int, hop: int, max_lag: int) -> None:
+        # public
+        self.window = window
+        self.hop = hop
+        self.max_lag = max_lag
+        # private: buffers start at sample index _base, the next window starts at _next_start
+        self._s1 = np.empty(0)
+        self._s2 = np.empty(0)
+        self._base = 0
+        self._next_start = max_lag
+
+    def update(self, s1_block: np.ndarray, s2_block: np.ndarray) -> list[LagEstimate]:
+        """
+        Adds aligned blocks of samples (of same size) to the series.
+
+        Returns:
+            list[LagEstimate]: The lag of windows completed by these samples.
+        """
+        if len(s1_block) != len(s2_block):
+            raise ValueError('blocks of S1 and S2 must have the same size')
+        self._s1 = np.concatenate([self._s1, np.asarray(s1_block, dtype=float)])
+        self._s2 = np.concatenate([self._s2, np.asarray(s2_block, dtype=float)])
+        estimates_l = []
+        while self._next_start + self.window + self.max_lag <= self._base + len(self._s1):
+            start = self._next_start - self._base
+            coefs = window_correlation(self._s1[start:start + self.window],
+                                       self._s2[start - self.max_lag:start + self.window + self.max_lag],
+                                       self.max_lag)
+            lag, coef = peak_lag(coefs, self.max_lag)
+            estimates_l.append(LagEstimate(index=self._next_start + self.window // 2, lag=lag, coef=coef))
+            self._next_start += self.hop
+        # drop samples before the next S2 extended window
+        drop = max(0, self._next_start - self.max_lag - self._base)
+        if drop:
+            self._s1 = self._s1[drop:]
+            self._s2 = self._s2[drop:]
+            self._base += drop
+        return estimates_l
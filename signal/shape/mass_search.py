@@ -0,0 +1,207 @@
+"""
+Search a target shape in a signal with a Euclidean distance computed for all windows at once (MASS algorithm:
+FFT sliding dot products and rolling sums), in batch or on a live stream of samples.
+
+Two window normalizations are available:
+- 'minmax': min/max normalization to [-100, 0] and RMS error to the target pattern (as euclid_shape_finder_3.py)
+- 'zscore': z-normalized Euclidean distance (the classic MASS distance profile)
+"""
+
+import math
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import oaconvolve
+
+from dtw_search import Match, rolling_min_max, select_matches
+
+# window normalizations
+NORM_MINMAX = 'minmax'
+NORM_ZSCORE = 'zscore'
+# below this number of multiply-adds, sliding dot products are computed directly (FFT setup cost more)
+DIRECT_MAX_OPS = 1 << 15
+
+
+def sliding_dot_product(query: np.ndarray, sig: np.ndarray) -> np.ndarray:
+    """
+    Calculates the dot product of the query with every window of the signal (overlap-add FFT convolution).
+
+    Returns:
+        np.ndarray: len(sig) - len(query) + 1 dot products.
+    """
+    m = len(query)
+    if (len(sig) - m + 1) * m <= DIRECT_MAX_OPS:
+        return sliding_window_view(sig, m) @ query
+    return oaconvolve(sig, query[::-1], mode='valid')
+
+
+def distance_profile(query: np.ndarray, sig: np.ndarray, norm: str = NORM_MINMAX) -> np.ndarray:
+    """
+    Calculates the distance between the query and every normalized window of the signal.
+
+    Args:
+        query (np.ndarray): The target pattern (in the normalized range [-100, 0] for 'minmax').
+        sig (np.ndarray): The signal.
+        norm (str): The window normalization: 'minmax' (RMS error in %) or 'zscore' (z-normalized Euclidean).
+
+    Returns:
+        np.ndarray: The distance of each window offset (len(sig) - len(query) + 1 items).
+    """
+    query = np.asarray(query, dtype=float)
+    m = len(query)
+    # both normalizations are shift invariant: center the signal for accurate rolling sums
+    x = np.asarray(sig, dtype=float)
+    x = x - x.mean()
+    qt = sliding_dot_product(query, x)
+    cumsum = np.concatenate([[0.0], np.cumsum(x)])
+    cumsum_sq = np.concatenate([[0.0], np.cumsum(x * x)])
+    sx = cumsum[m:] - cumsum[:-m]
+    sxx = cumsum_sq[m:] - cumsum_sq[:-m]
+    if norm == NORM_MINMAX:
+        # normalized window is a * x + b (a flat window is all zeros)
+        w_min, w_max = rolling_min_max(x, m)
+        w_rng = w_max - w_min
+        flat = w_rng == 0
+        a = np.where(flat, 0.0, 100.0 / np.where(flat, 1.0, w_rng))
+        b = np.where(flat, 0.0, -100.0 - a * w_min)
+        # sum((a * x + b - q)^2) expanded with rolling sums
+        sq_sum = a * a * sxx + 2 * a * b * sx + m * b * b - 2 * a * qt - 2 * b * query.sum() + query @ query
+        return np.sqrt(np.maximum(sq_sum, 0.0) / m)
+    elif norm == NORM_ZSCORE:
+        q_mean, q_std = query.mean(), query.std()
+        if q_std == 0:
+            raise ValueError('a flat target pattern can\'t be z-normalized')
+        x_mean = sx / m
+        x_var = np.maximum(sxx / m - x_mean * x_mean, 0.0)
+        flat = x_var <= 1e-12 * (sxx / m)
+        x_std = np.sqrt(np.where(flat, 1.0, x_var))
+        corr = (qt - m * x_mean * q_mean) / (m * x_std * q_std)
+        dist = np.sqrt(2 * m * (1 - np.clip(corr, -1.0, 1.0)))
+        # a flat window is at distance sqrt(m) of any pattern
+        dist[flat] = math.sqrt(m)
+        return dist
+    else:
+        raise ValueError(f'unknown normalization "{norm}"')
+
+
+class MassSearch:
+    """
+    Search the windows of a signal that match a target pattern with the MASS distance profile.
+    """
+
+    def __init__(self, target_pat: np.ndarray, norm: str = NORM_MINMAX, chunk_size: int = 1 << 16) -> None:
+        """
+        Args:
+            target_pat (np.ndarray): The target pattern.
+            norm (str): The window normalization: 'minmax' or 'zscore'.
+            chunk_size (int): Number of windows processed at once (bound the memory used).
+        """
+        if norm not in (NORM_MINMAX, NORM_ZSCORE):
+            raise ValueError(f'unknown normalization "{norm}"')
+        # public
+        self.target_pat = np.asarray(target_pat, dtype=float)
+        self.norm = norm
+        self.chunk_size = chunk_size
+
+    def distance_profile(self, sig: np.ndarray) -> np.ndarray:
+        """
+        Calculates the distance of every window of the signal, chunk by chunk.
+
+        Returns:
+            np.ndarray: The distance of each window offset (len(sig) - len(target_pat) + 1 items).
+        """
+        m = len(self.target_pat)
+        windows_nb = max(0, len(sig) - m + 1)
+        profile = np.empty(windows_nb)
+        for start in range(0, windows_nb, self.chunk_size):
+            stop = min(start + self.chunk_size, windows_nb)
+            profile[start:stop] = distance_profile(self.target_pat, sig[start:stop + m - 1], self.norm)
+        return profile
+
+    def find(self, sig: np.ndarray, threshold: float, exclusion: Optional[int] = None) -> list[Match]:
+        """
+        Finds the windows with a distance below threshold (the best one of overlapping windows).
+
+        Args:
+            sig (np.ndarray): The signal.
+            threshold (float): The max distance of a match.
+            exclusion (int): Min offset between two matches (defaults to half the pattern size).
+
+        Returns:
+            list[Match]: The matches in offset order.
+        """
+        exclusion = len(self.target_pat) // 2 if exclusion is None else exclusion
+        profile = self.distance_profile(sig)
+        offsets = np.flatnonzero(profile <= threshold)
+        return select_matches(offsets, profile[offsets], exclusion)
+
+    def stream(self, threshold: float, exclusion: Optional[int] = None) -> 'StreamMatcher':
+        """Returns a matcher for a live stream of samples."""
+        return StreamMatcher(self, threshold, exclusion)
+
+
+class StreamMatcher:
+    """
+    Match a target pattern on a stream of samples: feed blocks of samples with update(), matches are returned as
+    soon as no later window can change their selection (the same matches as MassSearch.find on the whole stream).
+
+    Only the last len(target_pat) - 1 samples are kept between updates.
+    """
+
+    def __init__(self, search: MassSearch, threshold: float, exclusion: Optional[int] = None) -> None:
+        # public
+        self.search = search
+        self.threshold = threshold
+        self.exclusion = len(search.target_pat) // 2 if exclusion is None else exclusion
+        self.samples_nb = 0
+        # private
+        self._tail = np.empty(0)
+        self._next_offset = 0
+        self._run_offsets: list[int] = []
+        self._run_dist: list[float] = []
+
+    def _close_run(self) -> list[Match]:
+        """Selects the matches of the current run (same greedy selection as MassSearch.find)."""
+        matches_l = select_matches(np.array(self._run_offsets), np.array(self._run_dist), self.exclusion)
+        self._run_offsets, self._run_dist = [], []
+        return matches_l
+
+    def update(self, samples: np.ndarray) -> list[Match]:
+        """
+        Adds new samples to the stream.
+
+        Args:
+            samples (np.ndarray): The new samples (one or more).
+
+        Returns:
+            list[Match]: The matches confirmed by these samples (offsets are counted from the first sample of the
+                         stream).
+        """
+        samples = np.atleast_1d(np.asarray(samples, dtype=float))
+        self.samples_nb += len(samples)
+        buffer = np.concatenate([self._tail, samples])
+        m = len(self.search.target_pat)
+        if len(buffer) < m:
+            self._tail = buffer
+            return []
+        profile = self.search.distance_profile(buffer)
+        self._tail = buffer[len(buffer) - m + 1:].copy()
+        first_offset = self._next_offset
+        self._next_offset += len(profile)
+        # candidates of a run (windows below threshold less than exclusion apart) are selected once the run closes
+        matches_l = []
+        for idx in np.flatnonzero(profile <= self.threshold).tolist():
+            offset = first_offset + idx
+            if self._run_offsets and offset - self._run_offsets[-1] >= self.exclusion:
+                matches_l += self._close_run()
+            self._run_offsets.append(offset)
+            self._run_dist.append(float(profile[idx]))
+        # no more window can extend the run
+        if self._run_offsets and self._next_offset - self._run_offsets[-1] >= self.exclusion:
+            matches_l += self._close_run()
+        return matches_l
+
+    def flush(self) -> list[Match]:
+        """Returns the pending matches (end of stream)."""
+        return self._close_run() if self._run_offsets else []
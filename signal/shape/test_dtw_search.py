@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from dtw_search import DTWSearch, dtw_distance, normalize, select_matches
+
+# (chunk_size, dtw_batch_size): defaults, small chunks and batches, one window at a time
+SIZES = [(8192, 1024), (4, 14), (7, 3), (1, 1)]
+
+
+def random_case(rng: np.random.Generator) -> tuple:
+    """A random walk signal and a pattern from the normalized range [-100, 0]."""
+    m = int(rng.integers(8, 32))
+    sig = np.cumsum(rng.normal(size=int(rng.integers(m, 240))))
+    pattern = -100 * np.abs(np.sin(np.linspace(0.0, rng.uniform(1.0, 4.0), m)))
+    return sig, pattern
+
+
+def greedy_top_k(profile: np.ndarray, k: int, exclusion: int) -> list:
+    offsets = np.flatnonzero(np.isfinite(profile))
+    return sorted(select_matches(offsets, profile[offsets], exclusion), key=lambda match: match.distance)[:k]
+
+
+def test_distance_profile():
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        sig, pattern = random_case(rng)
+        search = DTWSearch(pattern, band=0.3)
+        m = len(pattern)
+        ref = [dtw_distance(normalize(sig[i:i + m]), pattern, band=search.band) for i in range(len(sig) - m + 1)]
+        assert np.allclose(search.distance_profile(sig), ref, rtol=1e-12, atol=1e-9)
+
+
+@pytest.mark.parametrize('chunk_size, dtw_batch_size', SIZES)
+def test_top_k(chunk_size, dtw_batch_size):
+    rng = np.random.default_rng(1)
+    for _ in range(10):
+        sig, pattern = random_case(rng)
+        band = float(rng.choice([0.1, 0.3, 0.5]))
+        profile = DTWSearch(pattern, band=band).distance_profile(sig)
+        search = DTWSearch(pattern, band=band, chunk_size=chunk_size, dtw_batch_size=dtw_batch_size)
+        for k in (1, 3, 6):
+            assert search.top_k(sig, k) == greedy_top_k(profile, k, len(pattern) // 2)
+        assert search.top_k(sig, 3, exclusion=1) == greedy_top_k(profile, 3, 1)
+
+
+def test_top_k_few_windows():
+    pattern = -100 * np.abs(np.sin(np.linspace(0.0, 3.0, 16)))
+    sig = np.sin(np.linspace(0.0, 6.0, 20))
+    # 5 windows, all overlap: a single match
+    assert len(DTWSearch(pattern).top_k(sig, 3)) == 1
+    assert DTWSearch(pattern).top_k(sig[:10], 3) == []
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from scipy.signal import correlate, correlation_lags
+
+from lag_estimator import LagTracker, estimate_lags, window_correlation
+
+
+def delayed_pair(delay: int, size: int = 4000, seed: int = 0) -> tuple:
+    """A random walk S1 and S2 = S1 delayed by delay samples (plus a little noise)."""
+    rng = np.random.default_rng(seed)
+    base = np.cumsum(rng.normal(size=size + 2 * abs(delay)))
+    s1 = base[abs(delay):abs(delay) + size]
+    s2 = base[abs(delay) - delay:abs(delay) - delay + size] + rng.normal(scale=0.1, size=size)
+    return s1, s2
+
+
+def test_window_correlation():
+    rng = np.random.default_rng(1)
+    x, y_ext = rng.normal(size=50), 1e3 + np.cumsum(rng.normal(size=70))
+    max_lag = 10
+    ref = [np.corrcoef(x, y_ext[max_lag - lag:max_lag - lag + 50])[0, 1] for lag in range(-max_lag, max_lag + 1)]
+    assert np.allclose(window_correlation(x, y_ext, max_lag), ref)
+    # a flat window has a 0 coefficient
+    assert not np.any(window_correlation(np.ones(50), y_ext, max_lag))
+
+
+@pytest.mark.parametrize('delay', [-17, -3, 0, 5, 23])
+def test_lag_sign(delay):
+    s1, s2 = delayed_pair(delay)
+    # scipy reference on the whole series
+    corr = correlate(s1 - s1.mean(), s2 - s2.mean())
+    ref_lag = correlation_lags(len(s1), len(s2))[np.argmax(corr)]
+    assert ref_lag == -delay
+    estimates_l = list(estimate_lags(s1, s2, window=500, hop=250, max_lag=40))
+    assert len(estimates_l) == 14
+    for estimate in estimates_l:
+        assert abs(estimate.lag - ref_lag) < 0.5
+        assert estimate.coef > 0.9
+
+
+def test_tracker_vs_batch():
+    s1, s2 = delayed_pair(7)
+    ref = list(estimate_lags(s1, s2, window=300, hop=120, max_lag=20))
+    tracker = LagTracker(window=300, hop=120, max_lag=20)
+    estimates_l = []
+    for start in range(0, len(s1), 97):
+        estimates_l += tracker.update(s1[start:start + 97], s2[start:start + 97])
+    assert [estimate.index for estimate in estimates_l] == [estimate.index for estimate in ref]
+    assert np.allclose([estimate.lag for estimate in estimates_l], [estimate.lag for estimate in ref])
+    with pytest.raises(ValueError):
+        tracker.update(s1[:3], s2[:2])
@@ -0,0 +1,81 @@
+import math
+
+import numpy as np
+import pytest
+
+from dtw_search import normalize, select_matches
+from mass_search import NORM_MINMAX, NORM_ZSCORE, MassSearch, StreamMatcher
+
+
+def naive_profile(pattern: np.ndarray, sig: np.ndarray, norm: str) -> np.ndarray:
+    m = len(pattern)
+    profile = []
+    for i in range(len(sig) - m + 1):
+        window = sig[i:i + m]
+        if norm == NORM_MINMAX:
+            profile.append(math.sqrt(np.mean((normalize(window) - pattern) ** 2)))
+        elif window.std() == 0:
+            profile.append(math.sqrt(m))
+        else:
+            z_window = (window - window.mean()) / window.std()
+            z_pattern = (pattern - pattern.mean()) / pattern.std()
+            profile.append(math.sqrt(np.sum((z_window - z_pattern) ** 2)))
+    return np.array(profile)
+
+
+class IdentitySearch:
+    """A one sample pattern whose distance profile is the signal itself."""
+
+    target_pat = np.zeros(1)
+
+    @staticmethod
+    def distance_profile(sig: np.ndarray) -> np.ndarray:
+        return sig
+
+
+@pytest.mark.parametrize('norm', [NORM_MINMAX, NORM_ZSCORE])
+def test_distance_profile(norm):
+    rng = np.random.default_rng(0)
+    pattern = -100 * np.abs(np.sin(np.linspace(0.0, 3.0, 24)))
+    # a flat part, a random walk far from 0 (the centering keeps rolling sums accurate)
+    sig = np.concatenate([np.full(40, 3.0), 1e4 + np.cumsum(rng.normal(size=400))])
+    ref = naive_profile(pattern, sig, norm)
+    assert np.allclose(MassSearch(pattern, norm=norm).distance_profile(sig), ref, rtol=1e-6, atol=1e-6)
+    # chunks overlap by len(pattern) - 1 samples
+    assert np.allclose(MassSearch(pattern, norm=norm, chunk_size=50).distance_profile(sig), ref, rtol=1e-6, atol=1e-6)
+
+
+@pytest.mark.parametrize('norm, threshold', [(NORM_MINMAX, 30.0), (NORM_ZSCORE, 5.0)])
+def test_stream_vs_find(norm, threshold):
+    rng = np.random.default_rng(1)
+    pattern = -100 * np.abs(np.sin(np.linspace(0.0, 3.0, 32)))
+    sig = np.cumsum(rng.normal(size=3000))
+    search = MassSearch(pattern, norm=norm)
+    ref = search.find(sig, threshold)
+    assert len(ref) > 10
+    for block_size in (1, 7, 100, 1000):
+        matcher = search.stream(threshold)
+        matches_l = []
+        for start in range(0, len(sig), block_size):
+            matches_l += matcher.update(sig[start:start + block_size])
+        matches_l += matcher.flush()
+        assert [match.offset for match in matches_l] == [match.offset for match in ref]
+        assert np.allclose([match.distance for match in matches_l], [match.distance for match in ref])
+
+
+def test_stream_greedy_selection():
+    # windows at 5, 4, 3 (offsets 0, 15, 30): 15 overlaps both others but 30 and 0 are selected first
+    profile = np.full(60, 10.0)
+    profile[[0, 15, 30]] = [5.0, 4.0, 3.0]
+    matcher = StreamMatcher(IdentitySearch(), threshold=5.0, exclusion=20)
+    assert [match.offset for match in matcher.update(profile[:40])] == []
+    # offset 30 is confirmed once no window at offset < 50 can come
+    assert [match.offset for match in matcher.update(profile[40:50])] == [0, 30]
+    assert matcher.flush() == []
+    # same as the batch selection
+    offsets = np.flatnonzero(profile <= 5.0)
+    assert [match.offset for match in select_matches(offsets, profile[offsets], 20)] == [0, 30]
+    # end of stream: pending runs are selected by flush()
+    matcher = StreamMatcher(IdentitySearch(), threshold=5.0, exclusion=20)
+    assert matcher.update(profile[:35]) == []
+    assert [match.offset for match in matcher.flush()] == [0, 30]
@@ -20,7 +20,7 @@ logger = logging.getLogger(__name__)
 
 def main(watched_dir: str, index_name: str = 'index.sha256',
          skip_patterns: list[str] = [], allow_patterns: list[str] = [],
-         debug: bool = False) -> int:
+         hash_workers: int = 4, sync_delay_s: float = 2.0, debug: bool = False) -> int:
     # change this to the path you want to watch
     watched_path = Path(watched_dir)
     # name of the output file
@@ -38,8 +38,10 @@ def main(watched_dir: str, index_name: str = 'index.sha256',
         return 1
 
     # initial setup
-    files_index = FilesIndex(watched_path, index_file_path, allow_patterns=allow_patterns, skip_patterns=skip_patterns)
-    event_handler = EventHandler(watched_path, index_file_path, files_index)
+    files_index = FilesIndex(watched_path, index_file_path, allow_patterns=allow_patterns, skip_patterns=skip_patterns,
+                             hash_workers=hash_workers)
+    event_handler = EventHandler(watched_path, index_file_path, files_index, batch_s=sync_delay_s)
+    event_handler.start()
 
     # set up the observer (ignore sub-directories)
     observer = Observer()
@@ -57,5 +59,6 @@ def main(watched_dir: str, index_name: str = 'index.sha256',
     finally:
         observer.stop()
         observer.join()
+        event_handler.stop()
         logger.info('app stopped')
         return 0
@@ -1,5 +1,7 @@
 import logging
 from pathlib import Path
+from threading import Condition, Thread
+import time
 
 from watchdog.events import (
     FileCreatedEvent,
@@ -15,6 +17,12 @@ from .files_index import FilesIndex
 
 logger = logging.getLogger(__name__)
 
+# pending operations
+OP_ADD = 'add'
+OP_DELETE = 'delete'
+OP_MOVE = 'move'
+OP_SYNC = 'sync'
+
 
 class EventHandler(FileSystemEventHandler):
     """Event handler that triggers the index generation function on file system changes.
@@ -22,10 +30,16 @@ class EventHandler(FileSystemEventHandler):
     This class extends `watchdog`'s `FileSystemEventHandler` to listen for file
     creation, deletion, modification, and move events. It uses an instance of
     `FilesIndex` to manage an in-memory index of files and their SHA256 hashes,
-    synchronizing the index to a file on each change.
+    synchronizing the index to a file on changes.
+
+    Events are queued and processed by batch in a separate thread: a batch starts
+    when no event occurs for `batch_s` seconds (or `max_delay_s` seconds after its
+    first event), files created or closed several times are hashed once and the
+    index file is synchronized once by batch.
     """
 
-    def __init__(self, watched_path: Path, index_path: Path, files_index: FilesIndex):
+    def __init__(self, watched_path: Path, index_path: Path, files_index: FilesIndex,
+                 batch_s: float = 2.0, max_delay_s: float = 30.0):
         """Initializes the event handler with the necessary file paths and index object.
 
         Args:
@@ -34,22 +48,135 @@ class EventHandler(FileSystemEventHandler):
                                this file will be ignored to prevent infinite loops.
             files_index (FilesIndex): An instance of the FilesIndex class to
                                       manage file hashing and indexing.
+            batch_s (float): Quiet time (without event) before a batch is processed.
+                             Defaults to 2.0.
+            max_delay_s (float): Max delay between an event and the sync of the index.
+                                 Defaults to 30.0.
         """
         super().__init__()
         # args
         self.watched_path = watched_path
         self.index_path = index_path
         self.files_index = files_index
+        self.batch_s = batch_s
+        self.max_delay_s = max_delay_s
+        # index, metadata and temporary files of the index
+        self._own_paths = {own_path.resolve() for own_path in files_index.own_paths}
+        # counters
+        self.events_nb = 0
+        self.batches_nb = 0
+        self.hashed_nb = 0
+        self.syncs_nb = 0
+        # pending operations (shared with the batch thread)
+        self._cond = Condition()
+        self._ops_l = []
+        self._t_first = 0.0
+        self._t_last = 0.0
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        """Starts the batch processing thread."""
+        self._stopped = False
+        self._thread = Thread(target=self._run, name='index-sync', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Processes pending events and stops the batch processing thread."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join()
+        logger.info(f'{self.events_nb} events received: {self.batches_nb} batches, '
+                    f'{self.hashed_nb} files hashed, {self.syncs_nb} index syncs')
+
+    def _push(self, op: tuple):
+        """Queues an operation for the next batch."""
+        with self._cond:
+            t_now = time.monotonic()
+            if not self._ops_l:
+                self._t_first = t_now
+                self._cond.notify()
+            self._t_last = t_now
+            self._ops_l.append(op)
+            self.events_nb += 1
+
+    def _run(self):
+        """Batch thread: waits for a quiet time, then processes pending operations."""
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if not self._ops_l:
+                        self._cond.wait()
+                        continue
+                    wait_s = min(self._t_last + self.batch_s, self._t_first + self.max_delay_s) - time.monotonic()
+                    if wait_s <= 0:
+                        break
+                    self._cond.wait(wait_s)
+                ops_l, self._ops_l = self._ops_l, []
+                stopped = self._stopped
+            if ops_l:
+                try:
+                    self._process(ops_l)
+                except Exception as e:
+                    logger.error(f'error processing events batch: {e!r}')
+            if stopped:
+                return
+
+    def _process(self, ops_l: list[tuple]):
+        """Applies a batch of operations to the files index and synchronizes the index file once.
+
+        Deletions and moves are applied in order, files to hash are collected (a path
+        added several times is hashed once) then hashed concurrently.
+
+        Args:
+            ops_l (list[tuple]): The pending operations, in event order.
+        """
+        self.batches_nb += 1
+        must_sync = False
+        # path -> force flag
+        to_hash_d = {}
+        for op in ops_l:
+            if op[0] == OP_ADD:
+                _, path, force = op
+                to_hash_d[path] = to_hash_d.get(path, False) or force
+            elif op[0] == OP_DELETE:
+                _, path = op
+                to_hash_d.pop(path, None)
+                must_sync |= self.files_index.delete(path)
+            elif op[0] == OP_MOVE:
+                _, src_path, dest_path = op
+                if src_path in to_hash_d:
+                    # content of source is not hashed yet: remove its old entry, hash the destination
+                    to_hash_d.pop(src_path)
+                    must_sync |= self.files_index.delete(src_path)
+                    to_hash_d[dest_path] = True
+                else:
+                    # the moved entry keeps its hash
+                    to_hash_d.pop(dest_path, None)
+                    must_sync |= self.files_index.move(src_path, dest_path)
+            elif op[0] == OP_SYNC:
+                must_sync = True
+        # hash created and updated files
+        forced_l = [path for path, force in to_hash_d.items() if force]
+        others_l = [path for path, force in to_hash_d.items() if not force]
+        changed_nb = self.files_index.add_many(forced_l, force=True) + self.files_index.add_many(others_l)
+        self.hashed_nb += len(to_hash_d)
+        if must_sync or changed_nb:
+            self.files_index.sync()
+            self.syncs_nb += 1
+        logger.debug(f'batch of {len(ops_l)} events: {len(to_hash_d)} files to hash, {changed_nb} changed '
+                     f'(total: {self.events_nb} events, {self.syncs_nb} syncs)')
 
     def on_any_event(self, event: FileSystemEvent):
-        """Handles any file system event by updating the file index.
+        """Handles any file system event by queuing an update of the file index.
 
         This method is the primary entry point for all file system events. It
         first filters out directory events and events related to the index file
         itself. Based on the event type (`Created`, `Deleted`, `Modified`, `Moved`),
-        it calls the corresponding method on the `FilesIndex` object to update the
-        in-memory index. After each successful update, it triggers a
-        synchronization to persist the changes to the index file. 
+        it queues the corresponding `FilesIndex` operation for the batch thread,
+        which updates the in-memory index and persists the changes to the index file.
 
         This method also ensures that the index file is regenerated in case of accidental deletion.
 
@@ -67,32 +194,28 @@ class EventHandler(FileSystemEventHandler):
         event_src_path = Path(event.src_path)
         # log unignored event message
         logger.debug(f'receive {event}')
-        # event for index file ?
-        if event_src_path.resolve() == self.index_path.resolve():
+        # event for index files (index, metadata or temporary files) ?
+        if event_src_path.resolve() in self._own_paths:
             # deletion of the index file -> regenerate it
-            if isinstance(event, FileDeletedEvent):
+            if isinstance(event, FileDeletedEvent) and event_src_path.resolve() == self.index_path.resolve():
                 logger.info(f'index file "{self.index_path.name}" removed: rebuild it from in-memory cache')
-                self.files_index.sync()
+                self._push((OP_SYNC,))
             return
         # trigger index generation on any change
         if isinstance(event, FileCreatedEvent):
             logger.info(f'file created "{event_src_path.name}"')
-            if self.files_index.add(event_src_path):
-                self.files_index.sync()
+            self._push((OP_ADD, event_src_path, False))
             return
         if isinstance(event, FileDeletedEvent):
             logger.info(f'file deleted "{event_src_path.name}"')
-            if self.files_index.delete(event_src_path):
-                self.files_index.sync()
+            self._push((OP_DELETE, event_src_path))
             return
         if isinstance(event, FileClosedEvent):
             logger.info(f'file closed (probably updated) "{event_src_path.name}"')
-            if self.files_index.add(event_src_path, force=True):
-                self.files_index.sync()
+            self._push((OP_ADD, event_src_path, True))
             return
         if isinstance(event, FileMovedEvent):
             event_dest_path = Path(event.dest_path)
             logger.info(f'file moved from "{event_src_path.name}" to "{event_dest_path.name}"')
-            if self.files_index.move(event_src_path, event_dest_path):
-                self.files_index.sync()
+            self._push((OP_MOVE, event_src_path, event_dest_path))
             return
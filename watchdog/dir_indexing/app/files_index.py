@@ -1,10 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import os
 from pathlib import Path
+import time
 
 from .sha256 import calculate_sha256
 
 logger = logging.getLogger(__name__)
 
+# number of files submitted at once to the hash workers
+HASH_BATCH = 1024
+
 
 class FilesIndex:
     """
@@ -13,10 +19,14 @@ class FilesIndex:
     This class provides methods to add, delete, and move files within a watched
     directory, keeping an in-memory index of their SHA256 checksums. The index
     can be synchronized to a physical file in watched directory.
+
+    Size, mtime and inode of indexed files are stored in a metadata file next to
+    the index ("index.sha256.meta"), so a restart only re-hashes changed files.
     """
 
     def __init__(self, watched_path: Path, index_path: Path,
-                 allow_patterns: list[str] = [], skip_patterns: list[str] = []) -> None:
+                 allow_patterns: list[str] = [], skip_patterns: list[str] = [],
+                 hash_workers: int = 4) -> None:
         """
         Initializes the FilesIndex with the watched directory and index file path.
 
@@ -25,14 +35,23 @@ class FilesIndex:
             index_path (Path): The path to the file that will store the SHA256 index.
             skip_patterns (list[str]): A list of glob-style patterns to skip files.
                                        Defaults to an empty list.
+            hash_workers (int): Number of threads used to hash files at startup.
+                                Defaults to 4.
         """
         # args
         self.watched_path = watched_path
         self.index_path = index_path
         self.allow_patterns = allow_patterns
         self.skip_patterns = skip_patterns
-        # internal sha256 cache
+        self.hash_workers = hash_workers
+        # metadata file (size, mtime and inode of indexed files)
+        self.meta_path = index_path.with_name(index_path.name + '.meta')
+        # files of this class: index, metadata and their temporary files (see sync())
+        self.own_paths = (self.index_path, self.meta_path,
+                          self._tmp_path(self.index_path), self._tmp_path(self.meta_path))
+        # internal sha256 cache and (size, mtime_ns, inode) of files
         self._files_sha256_d = {}
+        self._files_stat_d = {}
 
     def _get_index_name(self, file_path: Path) -> str:
         """
@@ -71,6 +90,38 @@ class FilesIndex:
             return False
         return True
 
+    @staticmethod
+    def _tmp_path(file_path: Path) -> Path:
+        """Returns the temporary path used to atomically rewrite a file."""
+        return file_path.with_name(f'.{file_path.name}.tmp')
+
+    def _is_own_file(self, file_path: Path) -> bool:
+        """Checks if a file path is the index file, its metadata file or one of their temporary files."""
+        for own_path in self.own_paths:
+            if file_path.name == own_path.name and own_path.exists() and file_path.samefile(own_path):
+                return True
+        return False
+
+    def _is_eligible(self, file_path: Path) -> bool:
+        """Checks if a file path is a file of the watched directory that must be indexed."""
+        # allow only file
+        if not file_path.is_file():
+            return False
+        # skip file which are not in the watched directory
+        if not file_path.is_relative_to(self.watched_path):
+            return False
+        # exclude index files to prevent infinite loop
+        if self._is_own_file(file_path):
+            return False
+        # skip file if any skip pattern match
+        return self._is_indexable(file_path)
+
+    @staticmethod
+    def _file_stat(file_path: Path) -> tuple[int, int, int]:
+        """Returns (size, mtime_ns, inode) of a file."""
+        stat = file_path.stat()
+        return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
     def add(self, file_path: Path, force: bool = False) -> bool:
         """
         Adds a file to the index, optionally forcing a hash re-computation.
@@ -89,26 +140,21 @@ class FilesIndex:
             bool: True if the file was successfully added or updated in the index.
                   False if the file was skipped or an error occurred during hash computation.
         """
-        # allow only file
-        if not file_path.is_file():
-            return False
-        # skip file which are not in the watched directory
-        if not file_path.is_relative_to(self.watched_path):
-            return False
-        # exclude index file to prevent infinite loop
-        if file_path.exists() and self.index_path.exists() and file_path.samefile(self.index_path):
-            return False
-        # skip file if any skip pattern match
-        if not self._is_indexable(file_path):
+        if not self._is_eligible(file_path):
             return False
         # already in index ?
         index_name = self._get_index_name(file_path)
         if index_name in self._files_sha256_d and not force:
             return False
         # file_path to relative_path ("watched_dir_path/filename" -> "filename")
+        try:
+            stat = self._file_stat(file_path)
+        except OSError:
+            return False
         checksum = calculate_sha256(file_path)
         if not checksum:
             return False
+        self._files_stat_d[index_name] = stat
         # log short hash
         short_hash = checksum[:7]
         logger.debug(f'compute sha256 for "{file_path.name}" ({short_hash})')
@@ -130,8 +176,10 @@ class FilesIndex:
             bool: True if the entry was successfully deleted. False if the
                   file was not found in the index.
         """
+        index_name = self._get_index_name(file_path)
+        self._files_stat_d.pop(index_name, None)
         try:
-            del self._files_sha256_d[self._get_index_name(file_path)]
+            del self._files_sha256_d[index_name]
             return True
         except KeyError:
             return False
@@ -155,6 +203,7 @@ class FilesIndex:
         # destination file match the skip patterns ?
         if not self._is_indexable(dest_file_path):
             # delete source file from in-memory cache, lose destination file ignored
+            self._files_stat_d.pop(src_index_name, None)
             try:
                 self._files_sha256_d.pop(src_index_name)
                 return True
@@ -165,24 +214,131 @@ class FilesIndex:
         # attempt to efficiently rename the key in cache by reusing the hash from the source file entry
         try:
             self._files_sha256_d[dest_index_name] = self._files_sha256_d.pop(src_index_name)
+            # a rename keeps the inode and mtime
+            if src_index_name in self._files_stat_d:
+                self._files_stat_d[dest_index_name] = self._files_stat_d.pop(src_index_name)
             return True
         except KeyError:
             # do a full add since source file was not found in the cache
             return self.add(dest_file_path)
 
+    def add_many(self, file_paths: list[Path], force: bool = False) -> int:
+        """
+        Adds several files to the index, hashes are computed concurrently.
+
+        Args:
+            file_paths (list[Path]): The pathlib.Path objects of the files to add.
+            force (bool): If True, re-computed the SHA256 hash of files already present.
+                          Defaults to False.
+
+        Returns:
+            int: The number of files added or updated in the index.
+        """
+        to_hash_l = []
+        for file_path in file_paths:
+            if not self._is_eligible(file_path):
+                continue
+            index_name = self._get_index_name(file_path)
+            if index_name in self._files_sha256_d and not force:
+                continue
+            try:
+                to_hash_l.append((file_path, index_name, self._file_stat(file_path)))
+            except OSError:
+                continue
+        changed_nb, _ = self._hash_files(to_hash_l)
+        return changed_nb
+
+    def _hash_files(self, to_hash_l: list[tuple[Path, str, tuple[int, int, int]]]) -> tuple[int, int]:
+        """
+        Hashes files with a pool of `hash_workers` threads and updates the in-memory cache.
+
+        Args:
+            to_hash_l (list): The (file path, index name, stat) items of files to hash.
+
+        Returns:
+            tuple[int, int]: The number of index entries added or updated and the number of bytes hashed.
+        """
+        changed_nb = 0
+        hashed_bytes = 0
+        with ThreadPoolExecutor(max_workers=self.hash_workers) as executor:
+            for i in range(0, len(to_hash_l), HASH_BATCH):
+                batch_l = to_hash_l[i:i + HASH_BATCH]
+                checksums = executor.map(calculate_sha256, [file_path for file_path, _, _ in batch_l])
+                for (file_path, index_name, stat), checksum in zip(batch_l, checksums):
+                    if not checksum:
+                        continue
+                    logger.debug(f'compute sha256 for "{file_path.name}" ({checksum[:7]})')
+                    hashed_bytes += stat[0]
+                    self._files_stat_d[index_name] = stat
+                    if self._files_sha256_d.get(index_name) != checksum:
+                        self._files_sha256_d[index_name] = checksum
+                        changed_nb += 1
+        return changed_nb, hashed_bytes
+
+    def _load_meta(self) -> dict[str, tuple[str, tuple[int, int, int]]]:
+        """
+        Loads the metadata file of a previous run.
+
+        Returns:
+            dict: {index name: (sha256, (size, mtime_ns, inode))}, empty if the file is missing.
+        """
+        previous_d = {}
+        try:
+            with open(self.meta_path, 'r') as f:
+                for line in f:
+                    try:
+                        sha256, size, mtime_ns, inode, file = line.rstrip('\n').split(' ', 4)
+                        previous_d[file] = (sha256, (int(size), int(mtime_ns), int(inode)))
+                    except ValueError:
+                        logger.warning(f'skip bad line in metadata file: {line!r}')
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f'error reading metadata file: {e}')
+        return previous_d
+
     def index_all(self):
         """
         Walks on the watched directory and adds all eligible files to the index.
 
         This method clears the current in-memory cache, recursively finds all
-        files in the `watched_path`, calculates their SHA256 hashes, and adds them
-        to the index. Finally, it synchronizes the index to the physical file.
+        files in the `watched_path` and adds them to the index. Files with the same
+        size, mtime and inode as in the previous run metadata file reuse their
+        SHA256 hash, others are hashed by a pool of `hash_workers` threads.
+        Finally, it synchronizes the index to the physical file.
         """
+        t_start = time.monotonic()
+        previous_d = self._load_meta()
         # clean before populate cache
         self._files_sha256_d.clear()
-        # add all files in the watched directory
-        for file in self.watched_path.rglob('*'):
-            self.add(file)
+        self._files_stat_d.clear()
+        # walk the watched directory, keep hash of unchanged files
+        to_hash_l = []
+        for file_path in self.watched_path.rglob('*'):
+            if not self._is_eligible(file_path):
+                continue
+            index_name = self._get_index_name(file_path)
+            try:
+                stat = self._file_stat(file_path)
+            except OSError:
+                continue
+            previous = previous_d.get(index_name)
+            if previous and previous[1] == stat:
+                self._files_sha256_d[index_name] = previous[0]
+                self._files_stat_d[index_name] = stat
+            else:
+                to_hash_l.append((file_path, index_name, stat))
+        reused_nb = len(self._files_sha256_d)
+        # hash new and changed files
+        t_hash = time.monotonic()
+        _, hashed_bytes = self._hash_files(to_hash_l)
+        # throughput report
+        hash_s = time.monotonic() - t_hash
+        hashed_mb = hashed_bytes / 1e6
+        rate_mb_s = hashed_mb / hash_s if hash_s > 0 else 0.0
+        logger.info(f'{len(self._files_sha256_d)} files indexed in {time.monotonic() - t_start:.1f} s: '
+                    f'{reused_nb} unchanged, {len(to_hash_l)} hashed ({hashed_mb:.1f} MB at {rate_mb_s:.1f} MB/s, '
+                    f'{self.hash_workers} workers)')
         # create or update index file
         self.sync()
 
@@ -193,12 +349,29 @@ class FilesIndex:
         The index file is written to the path specified in `self.index_path`.
         Each line in the file contains the SHA256 hash followed by the relative
         file path, separated by a space. The entries are sorted alphabetically
-        by file path.
+        by file path. The metadata file is rewritten with the same order.
+
+        Files are written to a temporary file then renamed, so readers never
+        see a partial index.
         """
+        items_l = sorted(self._files_sha256_d.items())
         try:
-            with open(self.watched_path / self.index_path, 'w') as f:
-                for file, sha256 in sorted(self._files_sha256_d.items()):
+            tmp_path = self._tmp_path(self.index_path)
+            with open(tmp_path, 'w') as f:
+                for file, sha256 in items_l:
                     f.write(f'{sha256} {file}\n')
+            os.replace(tmp_path, self.index_path)
             logger.info(f'index file "{self.index_path.name}" has been regenerated')
         except Exception as e:
             logger.error(f'error writing to output file: {e}')
+        # metadata file: "sha256 size mtime_ns inode file" lines
+        try:
+            tmp_path = self._tmp_path(self.meta_path)
+            with open(tmp_path, 'w') as f:
+                for file, sha256 in items_l:
+                    stat = self._files_stat_d.get(file)
+                    if stat:
+                        f.write(f'{sha256} {stat[0]} {stat[1]} {stat[2]} {file}\n')
+            os.replace(tmp_path, self.meta_path)
+        except Exception as e:
+            logger.error(f'error writing to metadata file: {e}')
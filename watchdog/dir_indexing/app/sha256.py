@@ -5,17 +5,22 @@ from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# read buffer size (hashlib release the GIL on large updates, so threads can hash files concurrently)
+BUFFER_SIZE = 1024 * 1024
 
-def calculate_sha256(file_path: Path) -> Optional[str]:
+
+def calculate_sha256(file_path: Path, buffer_size: int = BUFFER_SIZE) -> Optional[str]:
     """
     Calculates the SHA256 checksum of a file.
     """
     sha256_hash = hashlib.sha256()
     try:
-        with open(file_path, 'rb') as f:
+        with open(file_path, 'rb', buffering=0) as f:
             # read and update hash in chunks to handle large files efficiently
-            for byte_block in iter(lambda: f.read(4096), b''):
-                sha256_hash.update(byte_block)
+            buffer = bytearray(buffer_size)
+            view = memoryview(buffer)
+            while size := f.readinto(buffer):
+                sha256_hash.update(view[:size])
         return sha256_hash.hexdigest()
     except Exception as e:
         logger.error(f'error processing file {file_path}: {e}')
@@ -8,8 +8,12 @@ from app import main
 # parse command line args
 parser = argparse.ArgumentParser()
 parser.add_argument('watched_directory', type=str, help='path to the watched directory')
+parser.add_argument('-w', '--workers', type=int, default=4, help='number of threads to hash files at startup')
+parser.add_argument('-s', '--sync_delay', type=float, default=2.0,
+                    help='quiet time in seconds before the index update of a burst of events')
 parser.add_argument('-d', '--debug', action='store_true', help='set debug mode')
 args = parser.parse_args()
 
 # main (index files as "file.txt" but not as "_file.txt")
-sys.exit(main(watched_dir=args.watched_directory, skip_patterns=['_*'], debug=args.debug))
+sys.exit(main(watched_dir=args.watched_directory, skip_patterns=['_*'], hash_workers=args.workers,
+              sync_delay_s=args.sync_delay, debug=args.debug))